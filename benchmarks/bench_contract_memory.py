@@ -0,0 +1,93 @@
+"""
+Memory per loaded contract: the compact representation DataLoader keeps
+(pooled CompactGraph records, text left in the source) against one NetworkX
+DiGraph pair plus the text per contract, measured at rest and after every
+contract has been analysed. "released" runs ContractData.release() after
+each analysis as main.py does; "kept" leaves the unpacked graphs, combined
+view and risk index resident, as a long-running server does. The networkx
+baselines keep the DiGraph pairs (and their text) either way, and drop or
+keep the derived state the same way.
+
+Usage: python benchmarks/bench_contract_memory.py [--contracts 1000] [--nodes 30 120] [--text 2000]
+"""
+import argparse
+import gc
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.data_loader import ContractData, DataLoader
+from src.synthetic_data import SyntheticConfig, SyntheticForest
+
+def traced(fn):
+    """Runs fn under tracemalloc, returning (result, bytes still allocated)."""
+    tracemalloc.start()
+    result = fn()
+    # DiGraphs hold reference cycles (cached edge views); count only live objects
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size
+
+def load_networkx(loader):
+    """Every contract with both graphs as DiGraphs and its text in memory."""
+    return [
+        ContractData(
+            entry["contract_id"], entry["title"], entry["contract_text"],
+            loader.json_to_graph(entry["base_graph"]), loader.json_to_graph(entry["news_sequence"]),
+        )
+        for entry in loader._iter_entries()
+    ]
+
+def analyse(contracts, release):
+    """Builds what analysis keeps per contract: unpacked graphs, combined view, risk index."""
+    for contract in contracts:
+        contract.combined_graph.indexed()
+        contract.risk_index
+        if release:
+            contract.release()
+    return contracts
+
+def measure(n_contracts, nodes_per_contract, text_chars):
+    """Bytes per contract for one synthetic forest: compact at rest / released / kept, networkx released / kept."""
+    forest = SyntheticForest(SyntheticConfig(n_contracts=n_contracts, nodes_per_contract=nodes_per_contract))
+    fd, path = tempfile.mkstemp(suffix=".json")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump([dict(entry, contract_text="x" * text_chars) for entry in forest], f)
+        loader = DataLoader(path)
+        # Compact first: its size includes growing the shared pools
+        _, at_rest = traced(lambda: loader.load(verbose=False))
+        _, released = traced(lambda: analyse(loader.load(verbose=False), release=True))
+        _, kept = traced(lambda: analyse(loader.load(verbose=False), release=False))
+        _, nx_released = traced(lambda: analyse(load_networkx(loader), release=True))
+        _, nx_kept = traced(lambda: analyse(load_networkx(loader), release=False))
+    finally:
+        os.remove(path)
+    return tuple(size / n_contracts for size in (at_rest, released, kept, nx_released, nx_kept))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--contracts", type=int, default=1000)
+    parser.add_argument("--nodes", type=int, nargs="+", default=[30, 120])
+    parser.add_argument("--text", type=int, default=2000, help="Characters of contract text per contract.")
+    args = parser.parse_args()
+
+    print(f"{'nodes':>6} {'at rest B':>10} {'released B':>11} {'kept B':>10} {'nx rel. B':>10} {'nx kept B':>10} "
+          f"{'released x':>11} {'kept x':>7}")
+    for n_nodes in args.nodes:
+        # A fresh interpreter per row, so the shared pools start out empty
+        with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context("spawn")) as pool:
+            at_rest, released, kept, nx_released, nx_kept = pool.submit(
+                measure, args.contracts, n_nodes, args.text).result()
+        print(f"{n_nodes:>6} {at_rest:>10.0f} {released:>11.0f} {kept:>10.0f} {nx_released:>10.0f} {nx_kept:>10.0f} "
+              f"{nx_released / released:>11.1f} {nx_kept / kept:>7.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Compares the NetworkX and CSR backends of ReasoningEngine.discover_causal_chain:
+resident memory per contract and causal-discovery time on dense synthetic graphs.
+
+Usage: python benchmarks/bench_csr_backend.py [--nodes 60 200] [--density 2.5] [--repeat 5]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.combined_graph import CombinedGraph
+from src.csr_graph import CSRGraph
+from src.data_loader import DataLoader
+from src.reasoning_engine import ReasoningEngine
+from src.synthetic_data import SyntheticConfig, SyntheticForest
+
+def make_contract(n_nodes, density, seed):
+    """
+    One dense synthetic contract: (base graph, news graph, news event). The
+    generator's tree contributes about one edge per node and back edges the
+    rest; few targets, so most paths run deep before terminating.
+    """
+    config = SyntheticConfig(n_contracts=1, nodes_per_contract=n_nodes, cycle_density=max(density - 1, 0),
+                             target_ratio=0.04, seed=seed)
+    fd, path = tempfile.mkstemp(suffix=".json")
+    os.close(fd)
+    try:
+        SyntheticForest(config).write(path)
+        contract = DataLoader(path).load(verbose=False)[0]
+        return contract.base_graph, contract.news_graph, f"{contract.contract_id}_Event"
+    finally:
+        os.remove(path)
+
+def traced(fn):
+    """Runs fn under tracemalloc, returning (result, bytes still allocated)."""
+    tracemalloc.start()
+    result = fn()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size
+
+def timed(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return result, best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--nodes", type=int, nargs="+", default=[60, 120, 200])
+    parser.add_argument("--density", type=float, default=2.5, help="Edges per node in the base graph.")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    engine = ReasoningEngine()
+    print(f"{'nodes':>6} {'paths':>8} {'nx KB':>9} {'csr KB':>8} {'mem x':>6} "
+          f"{'nx compose s':>13} {'nx cached s':>12} {'csr s':>9} {'speedup':>8}")
+
+    for n_nodes in args.nodes:
+        (base, news, event), nx_bytes = traced(lambda: make_contract(n_nodes, args.density, seed=n_nodes))
+        combined = CombinedGraph(base, news)
+        union, union_bytes = traced(lambda: combined.graph)
+        csr, csr_bytes = traced(lambda: CSRGraph.from_networkx(union))
+        nx_bytes += union_bytes
+
+        nx_paths, nx_time = timed(lambda: engine.discover_causal_chain(base, news, event), args.repeat)
+        _, cached_time = timed(lambda: engine.discover_causal_chain(combined, start_event=event), args.repeat)
+        csr_paths, csr_time = timed(lambda: engine.discover_causal_chain(csr, start_event=event), args.repeat)
+        assert nx_paths == csr_paths, "backends disagree"
+
+        print(f"{n_nodes:>6} {len(csr_paths):>8} {nx_bytes / 1024:>9.1f} {csr_bytes / 1024:>8.1f} "
+              f"{nx_bytes / csr_bytes:>6.1f} {nx_time:>13.4f} {cached_time:>12.4f} {csr_time:>9.4f} "
+              f"{nx_time / csr_time:>8.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Ingestion throughput of Neo4jManager: per-row queries vs UNWIND batches,
+sequential and on a thread pool.
+
+By default it runs against the recording stand-in driver (src/fake_driver.py)
+with a simulated per-round-trip latency; pass --uri to benchmark a real
+local Neo4j instead (the database is NOT cleared).
+
+Usage: python benchmarks/bench_neo4j_ingest.py [--latency-ms 1.0] [--repeat 5]
+       python benchmarks/bench_neo4j_ingest.py --uri bolt://localhost:7687 --user neo4j --password ...
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.data_loader import DataLoader
+from src.neo4j_manager import Neo4jManager
+from src.fake_driver import FakeDriver
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'raw', 'contracts_and_news.json')
+
+def make_driver(args):
+    if args.uri:
+        from neo4j import GraphDatabase
+        return GraphDatabase.driver(args.uri, auth=(args.user, args.password))
+    return FakeDriver(latency=args.latency_ms / 1000.0)
+
+def run(args, contracts, bulk, workers=1):
+    driver = make_driver(args)
+    manager = Neo4jManager(driver=driver, batch_size=args.batch_size)
+    t0 = time.perf_counter()
+    # Silence the per-contract progress lines
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(args.repeat):
+            if bulk:
+                manager.ingest_contracts(contracts, max_workers=workers)
+            else:
+                for contract in contracts:
+                    manager.ingest_contract_data(contract, bulk=False)
+    elapsed = time.perf_counter() - t0
+    trips = len(driver.queries) if isinstance(driver, FakeDriver) else None
+    manager.close()
+    return elapsed, trips
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--latency-ms", type=float, default=1.0, help="Simulated round-trip latency of the stand-in.")
+    parser.add_argument("--repeat", type=int, default=5, help="Times the bundled dataset is ingested.")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=4, help="Thread-pool size for the concurrent UNWIND run.")
+    parser.add_argument("--uri")
+    parser.add_argument("--user", default="neo4j")
+    parser.add_argument("--password", default="")
+    args = parser.parse_args()
+
+    contracts = DataLoader(DATA_PATH).load(verbose=False)
+    rows = args.repeat * sum(
+        c.base_graph.number_of_nodes() + c.base_graph.number_of_edges()
+        + c.news_graph.number_of_nodes() + c.news_graph.number_of_edges()
+        for c in contracts
+    )
+
+    print(f"{'mode':>10} {'seconds':>9} {'rows/s':>10} {'round trips':>12}")
+    modes = [("per-row", False, 1), ("unwind", True, 1)]
+    if args.workers > 1:
+        modes.append((f"unwind x{args.workers}", True, args.workers))
+    for mode, bulk, workers in modes:
+        elapsed, trips = run(args, contracts, bulk, workers)
+        print(f"{mode:>10} {elapsed:>9.3f} {rows / elapsed:>10.0f} {trips if trips is not None else '-':>12}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Offline benchmark suite: time and peak memory of loading, bridge detection,
+causal discovery, formatting and (stand-in) Neo4j ingestion on synthetic
+graph forests at several scale points.
+
+Results are saved as JSON (outputs/benchmarks/ by default); pass --compare
+with an earlier file to print per-phase ratios and flag regressions.
+
+Usage: python benchmarks/run_benchmarks.py [--scales 10x30 100x30 1000x30 100x120] [--repeat 3]
+       python benchmarks/run_benchmarks.py --compare outputs/benchmarks/bench-20260101-120000.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import asdict
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from main import find_news_root_cause
+from src.data_loader import DataLoader
+from src.neo4j_manager import Neo4jManager
+from src.reasoning_engine import ReasoningEngine
+from src.synthetic_data import SyntheticConfig, SyntheticForest
+from src.fake_driver import FakeDriver
+
+OUTPUT_DIR = os.path.join(os.path.dirname(__file__), '..', 'outputs', 'benchmarks')
+
+def phases(path):
+    """
+    The measured phases, in order. Each takes the state left by the previous
+    ones and returns (new state entries, items processed).
+    """
+    engine = ReasoningEngine()
+
+    def load(state):
+        contracts = DataLoader(path).load(verbose=False)
+        return {"contracts": contracts}, len(contracts)
+
+    def bridges(state):
+        found = [engine.find_bridge_nodes(c.combined_graph) for c in state["contracts"]]
+        return {}, sum(len(b) for b in found)
+
+    def causal(state):
+        chains = []
+        for c in state["contracts"]:
+            start = find_news_root_cause(c.news_graph)
+            chains.append((c, engine.discover_causal_chain(c.combined_graph, start_event=start)))
+        return {"chains": chains}, sum(len(results) for _, results in chains)
+
+    def format_chains(state):
+        lines = [
+            engine.get_formatted_chain(r["path"], c.combined_graph)
+            for c, results in state["chains"] for r in results
+        ]
+        return {}, len(lines)
+
+    def ingest(state):
+        manager = Neo4jManager(driver=FakeDriver())
+        with contextlib.redirect_stdout(io.StringIO()):
+            stats = manager.ingest_contracts(state["contracts"])
+        return {}, stats.rows
+
+    return [("load", load), ("bridges", bridges), ("causal", causal),
+            ("format", format_chains), ("ingest", ingest)]
+
+def run_scale(config, repeat):
+    """Best-of-`repeat` wall time per phase, plus peak traced memory from one extra run."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = SyntheticForest(config).write(os.path.join(tmp, "forest.json"))
+        timings, items = {}, {}
+        for _ in range(repeat):
+            state = {}
+            for name, fn in phases(path):
+                t0 = time.perf_counter()
+                update, items[name] = fn(state)
+                elapsed = time.perf_counter() - t0
+                state.update(update)
+                timings[name] = min(timings.get(name, elapsed), elapsed)
+
+        # Separate traced run: tracemalloc slows execution, so it is not timed
+        rows = []
+        state = {}
+        for name, fn in phases(path):
+            tracemalloc.start()
+            update, _ = fn(state)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            state.update(update)
+            rows.append({
+                "phase": name,
+                "seconds": timings[name],
+                "peak_kb": peak / 1024,
+                "items": items[name],
+            })
+        return rows
+
+def parse_scale(text):
+    contracts, nodes = text.lower().split("x")
+    return int(contracts), int(nodes)
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True, cwd=os.path.dirname(__file__)).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(current, previous_path, threshold):
+    with open(previous_path, encoding="utf-8") as f:
+        previous = json.load(f)
+    before = {(r["scale"], r["phase"]): r for r in previous["results"]}
+    print(f"\nCompared with {previous_path} (revision {previous['meta'].get('revision')}):")
+    print(f"{'scale':>10} {'phase':>8} {'time x':>7} {'mem x':>7}")
+    for r in current["results"]:
+        old = before.get((r["scale"], r["phase"]))
+        if old is None:
+            continue
+        t = r["seconds"] / old["seconds"] if old["seconds"] else float("inf")
+        m = r["peak_kb"] / old["peak_kb"] if old["peak_kb"] else float("inf")
+        flag = "  REGRESSION" if t > threshold or m > threshold else ""
+        print(f"{r['scale']:>10} {r['phase']:>8} {t:>7.2f} {m:>7.2f}{flag}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scales", nargs="+", default=["10x30", "100x30", "1000x30", "100x120"],
+                        help="Scale points as <contracts>x<nodes per contract>.")
+    parser.add_argument("--branching", type=int, default=3)
+    parser.add_argument("--cycle-density", type=float, default=0.2)
+    parser.add_argument("--shared-ratio", type=float, default=0.1)
+    parser.add_argument("--target-ratio", type=float, default=0.15)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="Result file (default: outputs/benchmarks/bench-<timestamp>.json).")
+    parser.add_argument("--compare", help="Earlier result file to compare against.")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="Ratio above which a phase is flagged as a regression.")
+    args = parser.parse_args()
+
+    results = []
+    configs = {}
+    print(f"{'scale':>10} {'phase':>8} {'seconds':>10} {'peak KB':>10} {'items':>9}")
+    for scale in args.scales:
+        n_contracts, nodes = parse_scale(scale)
+        config = SyntheticConfig(
+            n_contracts=n_contracts, nodes_per_contract=nodes, branching=args.branching,
+            cycle_density=args.cycle_density, shared_ratio=args.shared_ratio,
+            target_ratio=args.target_ratio, seed=args.seed
+        )
+        configs[scale] = asdict(config)
+        for row in run_scale(config, args.repeat):
+            row["scale"] = scale
+            results.append(row)
+            print(f"{scale:>10} {row['phase']:>8} {row['seconds']:>10.4f} {row['peak_kb']:>10.1f} {row['items']:>9}")
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+            "configs": configs,
+        },
+        "results": results,
+    }
+    output = args.output or os.path.join(OUTPUT_DIR, time.strftime("bench-%Y%m%d-%H%M%S.json"))
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nSaved {output}")
+
+    if args.compare:
+        compare(report, args.compare, args.threshold)
+
+if __name__ == "__main__":
+    main()
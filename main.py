@@ -1,11 +1,16 @@
 import sys
 import os
+import argparse
+import multiprocessing
+from itertools import islice
 import networkx as nx
+from typing import Optional
 
 # Ensure we can import from src
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
 from src.data_loader import DataLoader
+from src.path_engine import TraversalStats
 from src.reasoning_engine import ReasoningEngine
 
 def find_news_root_cause(news_graph: nx.DiGraph):
@@ -19,57 +24,247 @@ def find_news_root_cause(news_graph: nx.DiGraph):
     # Fallback: pick the first node
     return list(news_graph.nodes())[0] if news_graph.number_of_nodes() > 0 else None
 
-def main():
+def find_news_roots(news_graph: nx.DiGraph):
+    """
+    All candidate starting points in the news graph: every node with
+    in-degree 0, falling back to the first node like find_news_root_cause.
+    """
+    roots = [node for node in news_graph.nodes() if news_graph.in_degree(node) == 0]
+    if not roots and news_graph.number_of_nodes() > 0:
+        roots = [next(iter(news_graph.nodes()))]
+    return roots
+
+def format_paths(engine: ReasoningEngine, results, graph, out, indent="      "):
+    """Appends discovered chains (or the no-path notice) for one trigger to `out`."""
+    if results:
+        out.append(f"  [+] {len(results)} potential risk paths discovered.")
+        for i, res in enumerate(results): # Show all paths
+            chain_str = engine.get_formatted_chain(res['path'], graph)
+            # Top-k results are ranked by weighted cost rather than length
+            cost = f" (cost {res['cost']:.2f})" if 'cost' in res else ""
+            out.append(f"{indent}Path {i+1}{cost}: {chain_str}")
+    else:
+        out.append("  [-] No causal path found to any Risk/Obligation.")
+
+def analyze_contract(engine: ReasoningEngine, contract, backend="networkx", all_roots=False,
+                     stats: Optional[TraversalStats] = None, top_k: Optional[int] = None,
+                     limit: Optional[int] = None) -> str:
+    """
+    Runs bridge detection and causal discovery for one contract and returns
+    its report block, exactly as printed by the sequential loop.
+    With `stats`, traversal counters and phase timings are collected into it
+    and a profile line is added to the block. With `top_k`, only the k
+    cheapest chains per trigger are searched for (discover_top_k_chains).
+    With `limit`, the search for each trigger stops after its first `limit`
+    (shortest) chains (iter_causal_chain).
+    """
+    out = []
+    out.append(f"--- Contract: {contract.contract_id} ({contract.title}) ---")
+
+    if stats is not None:
+        stats.start()
+    # Union of contract and news graphs, built once per contract
+    combined = contract.csr if backend == "csr" else contract.combined_graph
+    if stats is not None:
+        stats.lap("compose")
+
+    # Step A: Identify Bridge Nodes
+    bridges = engine.find_bridge_nodes(contract.combined_graph)
+    if stats is not None:
+        stats.lap("bridges")
+    if not bridges:
+        out.append("  [!] No intersection between News and Contract. Skipping.")
+        if stats is not None:
+            out.append(f"  [profile] {stats.summary()}")
+        return "\n".join(out) + "\n"
+    # Sorted, so the report does not depend on the process's hash seed (spawned workers have their own)
+    out.append(f"  [*] Bridge Nodes found: {{{', '.join(map(repr, sorted(bridges, key=str)))}}}")
+
+    if all_roots:
+        # Step B: Every root of the news is a candidate trigger
+        start_events = find_news_roots(contract.news_graph)
+        out.append(f"  [*] News Event Triggers: {', '.join(map(str, start_events))}")
+
+        # Step C: Discover Causal Chains for all triggers in one traversal
+        if top_k:
+            batch = {event: engine.discover_top_k_chains(combined, start_event=event, k=top_k) for event in start_events}
+        elif limit:
+            # Separate lazy searches, each abandoned after `limit` chains
+            batch = {
+                event: list(islice(engine.iter_causal_chain(combined, start_event=event, stats=stats), limit))
+                for event in start_events
+            }
+        else:
+            batch = engine.discover_causal_chains_batch(combined, start_events=start_events, stats=stats)
+        for start_event in start_events:
+            out.append(f"  [*] Trigger: {start_event}")
+            format_paths(engine, batch[start_event], combined, out)
+    else:
+        # Step B: Determine Start Event (Root of the news)
+        start_event = find_news_root_cause(contract.news_graph)
+        out.append(f"  [*] News Event Trigger: {start_event}")
+
+        # Step C: Discover Causal Chain
+        if top_k:
+            results = engine.discover_top_k_chains(combined, start_event=start_event, k=top_k)
+        elif limit:
+            results = list(islice(engine.iter_causal_chain(combined, start_event=start_event, stats=stats), limit))
+        else:
+            results = engine.discover_causal_chain(combined, start_event=start_event, stats=stats)
+        format_paths(engine, results, combined, out)
+
+    if stats is not None:
+        stats.lap("format")
+        out.append(f"  [profile] {stats.summary()}")
+    out.append("\n" + "="*50 + "\n")
+    return "\n".join(out) + "\n"
+
+# --- Parallel mode: contracts are shared with workers once, tasks are index ranges ---
+_WORKER_CONTRACTS = None
+_WORKER_ENGINE = None
+
+def _init_worker(data_path, use_cache, build_csr):
+    """
+    Pool initializer. Forked workers inherit the parent's contracts; spawned
+    workers reload them, which is a cheap memory-map when the graph cache is
+    enabled.
+    """
+    global _WORKER_CONTRACTS, _WORKER_ENGINE
+    if _WORKER_CONTRACTS is None:
+        _WORKER_CONTRACTS = DataLoader(data_path, use_cache=use_cache).load(build_csr=build_csr, verbose=False)
+    _WORKER_ENGINE = ReasoningEngine()
+
+def analyze_one(engine, contract, args):
+    """
+    (report block, TraversalStats or None) for one contract. The contract's
+    graphs go back to their compact form afterwards.
+    """
+    stats = TraversalStats() if args.profile else None
+    block = analyze_contract(engine, contract, args.backend, args.all_roots, stats, args.top_k, args.limit)
+    contract.release()
+    return block, stats
+
+def _analyze_chunk(task):
+    start, stop, args = task
+    return [analyze_one(_WORKER_ENGINE, _WORKER_CONTRACTS[i], args) for i in range(start, stop)]
+
+def analyze_parallel(contracts, workers, args, start_method=None):
+    """
+    Yields (report block, stats) pairs in contract order while a process pool
+    analyses contiguous chunks of contracts. Uses fork where available,
+    unless start_method says otherwise.
+    """
+    global _WORKER_CONTRACTS
+    if start_method is None:
+        start_method = "fork" if "fork" in multiprocessing.get_all_start_methods() else None
+    ctx = multiprocessing.get_context(start_method)
+    if ctx.get_start_method() == "fork":
+        _WORKER_CONTRACTS = contracts
+
+    n = len(contracts)
+    # A few chunks per worker balances load without per-contract IPC
+    chunk = max(1, -(-n // (workers * 4)))
+    tasks = [(i, min(i + chunk, n), args) for i in range(0, n, chunk)]
+
+    try:
+        with ctx.Pool(workers, initializer=_init_worker,
+                      initargs=(args.data, not args.no_cache, args.backend == "csr")) as pool:
+            for blocks in pool.imap(_analyze_chunk, tasks):
+                yield from blocks
+    finally:
+        _WORKER_CONTRACTS = None
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="SGSA causal chain discovery over contracts and news.")
+    parser.add_argument(
+        "--backend", choices=["networkx", "csr"], default="networkx",
+        help="Graph representation used for causal discovery (default: networkx)."
+    )
+    parser.add_argument(
+        "--data", default=os.path.join("data/raw", "contracts_and_news.json"),
+        help="Contracts file: a JSON array or newline-delimited JSON (.jsonl)."
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true",
+        help="Always re-parse the data file instead of using the compiled graph cache next to it."
+    )
+    parser.add_argument(
+        "--stream", action="store_true",
+        help="Parse and analyse contracts one at a time instead of loading them all first."
+    )
+    parser.add_argument(
+        "--all-roots", action="store_true",
+        help="Analyse every in-degree-0 news root in one batched traversal instead of just the first."
+    )
+    parser.add_argument(
+        "--workers", type=int, default=1,
+        help="Analyse contracts in a pool of N processes; output order is unchanged (default: 1)."
+    )
+    parser.add_argument(
+        "--profile", action="store_true",
+        help="Print traversal counters and phase timings per contract and in aggregate."
+    )
+    parser.add_argument(
+        "--top-k", type=int, default=None, metavar="K",
+        help="Only report the K most relevant chains per trigger, ranked by weighted cost (best-first search)."
+    )
+    parser.add_argument(
+        "--limit", type=int, default=None, metavar="N",
+        help="Stop each trigger's search after its N shortest chains instead of enumerating every path."
+    )
+    args = parser.parse_args(argv)
+    if args.limit is not None and args.limit < 1:
+        parser.error("--limit must be at least 1")
+    if args.limit is not None and args.top_k is not None:
+        parser.error("--limit cannot be combined with --top-k")
+    if args.top_k is not None and args.top_k < 1:
+        parser.error("--top-k must be at least 1")
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.workers > 1 and args.stream:
+        parser.error("--workers cannot be combined with --stream")
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
     print("=== SGSA: GraphRAG Causal Discovery System ===\n")
 
     # 1. Load Data
-    data_path = os.path.join("data/raw", "contracts_and_news.json")
+    data_path = args.data
     if not os.path.exists(data_path):
         print(f"Error: Data file not found at {data_path}")
         return
 
-    loader = DataLoader(data_path)
-    contracts = loader.load()
+    loader = DataLoader(data_path, use_cache=not args.no_cache)
+    build_csr = args.backend == "csr"
+    if args.stream:
+        # Contracts are parsed lazily, one at a time, as the loop consumes them
+        contracts = loader.iter_contracts(build_csr=build_csr)
+    else:
+        contracts = loader.load(build_csr=build_csr)
     
     # 2. Initialize Engine
     engine = ReasoningEngine()
 
-    print(f"\nProcessing {len(contracts)} contracts for risk analysis...\n")
+    if args.stream:
+        print(f"\nStreaming contracts from {os.path.basename(data_path)} for risk analysis...\n")
+    else:
+        print(f"\nProcessing {len(contracts)} contracts for risk analysis...\n")
 
     # 3. Analyze each contract
-    for contract in contracts:
-        print(f"--- Contract: {contract.contract_id} ({contract.title}) ---")
-        
-        # Step A: Identify Bridge Nodes
-        bridges = engine.find_bridge_nodes(contract.base_graph, contract.news_graph)
-        if not bridges:
-            print("  [!] No intersection between News and Contract. Skipping.")
-            continue
-        print(f"  [*] Bridge Nodes found: {bridges}")
+    if args.workers > 1:
+        blocks = analyze_parallel(contracts, args.workers, args)
+    else:
+        blocks = (analyze_one(engine, contract, args) for contract in contracts)
 
-        # Step B: Determine Start Event (Root of the news)
-        start_event = find_news_root_cause(contract.news_graph)
-        print(f"  [*] News Event Trigger: {start_event}")
+    total = TraversalStats()
+    for block, stats in blocks:
+        print(block, end="")
+        if stats is not None:
+            total.merge(stats)
 
-        # Step C: Discover Causal Chain
-        results = engine.discover_causal_chain(
-            contract.base_graph, 
-            contract.news_graph, 
-            start_event
-        )
-
-        if results:
-            print(f"  [+] {len(results)} potential risk paths discovered.")
-            for i, res in enumerate(results): # Show all paths
-                chain_str = engine.get_formatted_chain(
-                    res['path'], 
-                    nx.compose(contract.base_graph, contract.news_graph)
-                )
-                print(f"      Path {i+1}: {chain_str}")
-        else:
-            print("  [-] No causal path found to any Risk/Obligation.")
-        
-        print("\n" + "="*50 + "\n")
+    if args.profile:
+        print(f"[profile] total: {total.summary()}")
 
 if __name__ == "__main__":
     main()
@@ -1,33 +1,56 @@
+import argparse
+import asyncio
 import sys
 import os
 from src.data_loader import DataLoader
 from src.neo4j_manager import Neo4jManager
-from src.graph_rag_engine import GraphRAGEngine
 
 # Ensure src is in path
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
-def main():
-    print("=== GraphRAG with Neo4j & LLM ===\n")
+DEFAULT_DATA_PATH = os.path.join("data/raw", "contracts_and_news.json")
 
+def sync_data(data_path=DEFAULT_DATA_PATH, prune=True, max_workers=4):
+    """Loads the data file and syncs it into Neo4j. Returns the open Neo4jManager."""
     # 1. Load Data from JSON
-    data_path = os.path.join("data/raw", "contracts_and_news.json")
-    loader = DataLoader(data_path)
+    loader = DataLoader(data_path, use_cache=True)
     contracts = loader.load()
 
     # 2. Initialize Neo4j Manager
     neo_manager = Neo4jManager()
-    
-    # Optional: Clear DB to start fresh
-    neo_manager.clear_database()
 
-    # 3. Ingest Data into Neo4j
-    print("\n--- Ingesting Data into Graph Database ---")
-    for contract in contracts:
-        neo_manager.ingest_contract_data(contract)
+    # 3. Sync Data into Neo4j: only contracts changed since the last run are
+    # re-sent, and contracts no longer in the file are removed
+    print("\n--- Syncing Data into Graph Database ---")
+    # Batches run on a small thread pool sharing the driver's connection pool
+    stats = neo_manager.sync_contracts(contracts, prune=prune, max_workers=max_workers)
+    print(f"[Neo4j] {stats.summary()}")
+    return neo_manager
+
+def ingest(argv=None):
+    """Sync only: no LLM, so LangChain is never imported."""
+    parser = argparse.ArgumentParser(description="Sync contracts into Neo4j (changed contracts only).")
+    parser.add_argument("--data", default=DEFAULT_DATA_PATH)
+    parser.add_argument("--keep-removed", action="store_true",
+                        help="Keep contracts that are no longer in the data file.")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent write batches (default: 4).")
+    args = parser.parse_args(argv)
+    neo_manager = sync_data(args.data, prune=not args.keep_removed, max_workers=args.workers)
+    neo_manager.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sync contracts into Neo4j, then analyse events with the LLM.")
+    parser.add_argument("--data", default=DEFAULT_DATA_PATH)
+    args = parser.parse_args(argv)
+    print("=== GraphRAG with Neo4j & LLM ===\n")
+
+    neo_manager = sync_data(args.data)
     
-    # 4. Initialize GraphRAG Engine
+    # 4. Initialize GraphRAG Engine (LangChain and the Gemini client load here)
+    from src.graph_rag_engine import GraphRAGEngine
     rag_engine = GraphRAGEngine()
+    # Later ingestions invalidate the engine's cached answers
+    neo_manager.add_listener(rag_engine.on_data_changed)
 
     print("\n--- Starting LLM-based Risk Analysis ---")
     
@@ -39,16 +62,20 @@ def main():
         ("Trade_Union_GDL", "C03")
     ]
 
+    contract_of = dict(test_cases)
     for event, contract_id in test_cases:
         print(f"\n[?] Analyzing Impact of: {event} (Contract {contract_id})")
-        
-        # The Magic Happens Here:
-        # The LLM generates the Cypher query, runs it against Neo4j, 
-        # reads the result, and synthesizes an answer.
-        analysis = rag_engine.analyze_risk(event)
-        
-        print(f"\n[LLM Response]:\n{analysis}")
-        print("-" * 50)
+
+    # The Magic Happens Here:
+    # The LLM generates the Cypher query, runs it against Neo4j,
+    # reads the result, and synthesizes an answer.
+    # All events are analysed concurrently; answers print as they arrive.
+    async def run_analyses():
+        async for event, analysis in rag_engine.analyze_risks(contract_of, max_concurrency=4, rate=2):
+            print(f"\n[LLM Response] {event} (Contract {contract_of[event]}):\n{analysis}")
+            print("-" * 50)
+
+    asyncio.run(run_analyses())
 
     # Cleanup
     neo_manager.close()
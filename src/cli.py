@@ -0,0 +1,49 @@
+"""
+One entry point for every SGSA tool:
+
+  python -m src analyze [...]   causal chain discovery (main.py), NetworkX / CSR only
+  python -m src ingest  [...]   sync contracts into Neo4j, no LLM
+  python -m src rag     [...]   sync, then LLM risk analysis (main_neo4j.py)
+  python -m src render  [...]   interactive HTML graphs (src/show_graphs.py)
+  python -m src serve   [...]   resident screening server (src/server.py)
+
+Everything after the subcommand goes to that tool's own options
+(`python -m src analyze --help`). A subcommand's module is imported only
+when it runs, so `analyze` never loads the Neo4j driver, LangChain or pyvis.
+"""
+import argparse
+import importlib
+import os
+import sys
+
+# main.py and main_neo4j.py live in the project root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# subcommand -> (module, function taking argv, help)
+COMMANDS = {
+    "analyze": ("main", "main", "Causal chain discovery over contracts and news."),
+    "ingest": ("main_neo4j", "ingest", "Sync contracts into Neo4j (changed contracts only)."),
+    "rag": ("main_neo4j", "main", "Sync into Neo4j, then analyse events with the LLM."),
+    "render": ("src.show_graphs", "main", "Render contract + news graphs as interactive HTML."),
+    "serve": ("src.server", "main", "Risk screening server with resident graphs."),
+}
+
+def load_command(name):
+    """Imports the module of a subcommand and returns its entry function."""
+    module, function, _ = COMMANDS[name]
+    return getattr(importlib.import_module(module), function)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m src",
+        description="SGSA: supply-chain risk discovery over contract and news graphs.",
+        epilog="\n".join(f"  {name:<8} {text}" for name, (_, _, text) in COMMANDS.items()),
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("command", choices=list(COMMANDS), metavar="command", help=", ".join(COMMANDS))
+    parser.add_argument("args", nargs=argparse.REMAINDER, help="Options of the subcommand.")
+    args = parser.parse_args(argv)
+    return load_command(args.command)(args.args)
+
+if __name__ == "__main__":
+    main()
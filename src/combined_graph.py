@@ -0,0 +1,160 @@
+import networkx as nx
+from typing import Callable, Dict, Hashable, List, Sequence, Set, Tuple, TypeVar
+
+T = TypeVar("T")
+_MISSING = object()
+
+
+class VersionedDiGraph(nx.DiGraph):
+    """
+    DiGraph that counts mutations made through its public API, so views
+    derived from it (e.g. CombinedGraph) can detect when they are stale.
+    Attribute dicts edited in place (G.nodes[n]['type'] = ...) are not
+    tracked; use add_node/add_edge to update attributes instead.
+    """
+
+    def __init__(self, incoming_graph_data=None, **attr):
+        self.version = 0
+        super().__init__(incoming_graph_data, **attr)
+
+    def _touch(self):
+        self.version += 1
+
+    def add_node(self, node_for_adding, **attr):
+        super().add_node(node_for_adding, **attr)
+        self._touch()
+
+    def add_nodes_from(self, nodes_for_adding, **attr):
+        super().add_nodes_from(nodes_for_adding, **attr)
+        self._touch()
+
+    def remove_node(self, n):
+        super().remove_node(n)
+        self._touch()
+
+    def remove_nodes_from(self, nodes):
+        super().remove_nodes_from(nodes)
+        self._touch()
+
+    def add_edge(self, u_of_edge, v_of_edge, **attr):
+        super().add_edge(u_of_edge, v_of_edge, **attr)
+        self._touch()
+
+    def add_edges_from(self, ebunch_to_add, **attr):
+        super().add_edges_from(ebunch_to_add, **attr)
+        self._touch()
+
+    def remove_edge(self, u, v):
+        super().remove_edge(u, v)
+        self._touch()
+
+    def remove_edges_from(self, ebunch):
+        super().remove_edges_from(ebunch)
+        self._touch()
+
+    def clear(self):
+        super().clear()
+        self._touch()
+
+    def clear_edges(self):
+        super().clear_edges()
+        self._touch()
+
+
+def graph_signature(G: nx.DiGraph) -> Tuple:
+    """
+    Fingerprint of a graph's state. O(1) for VersionedDiGraph; any other
+    graph is hashed by content (nodes, edges and their attributes) in
+    O(V + E), so swapped edges or changed attributes are still detected.
+    """
+    version = getattr(G, "version", None)
+    if version is not None:
+        return (id(G), version)
+    # repr() because attribute values need not be hashable
+    return (id(G), hash((
+        tuple((n, repr(data)) for n, data in G.nodes(data=True)),
+        tuple((u, v, repr(data)) for u, v, data in G.edges(data=True)),
+    )))
+
+
+class CombinedGraph:
+    """
+    Read-only union of a contract's base graph and its news graph.
+
+    The union (nx.compose) and its integer interning are built once and
+    reused by every query; they are rebuilt automatically the next time
+    they are accessed after either underlying graph has changed.
+    """
+
+    def __init__(self, base_graph: nx.DiGraph, news_graph: nx.DiGraph):
+        self.base_graph = base_graph
+        self.news_graph = news_graph
+        self._signature = None
+        self._graph = None
+        self._node_ids: List = []
+        self._index: Dict = {}
+        self._adjacency: List = []
+        self._derived: Dict = {}
+
+    def invalidate(self):
+        """Drops the cached union so it is rebuilt on next access."""
+        self._signature = None
+        self._graph = None
+
+    def _ensure_fresh(self):
+        signature = (graph_signature(self.base_graph), graph_signature(self.news_graph))
+        if self._graph is not None and signature == self._signature:
+            return
+
+        # Frozen so callers cannot mutate the shared cached union by accident
+        G = nx.freeze(nx.compose(self.base_graph, self.news_graph))
+        self._graph = G
+        self._node_ids = list(G.nodes())
+        self._index = {node: i for i, node in enumerate(self._node_ids)}
+        self._adjacency = [None] * len(self._node_ids)
+        self._derived = {}
+        self._signature = signature
+
+    @property
+    def graph(self) -> nx.DiGraph:
+        """The composed (base + news) DiGraph; news attributes take precedence."""
+        self._ensure_fresh()
+        return self._graph
+
+    def indexed(self) -> Tuple[List, Dict, Callable[[int], Sequence[int]]]:
+        """
+        Returns (node_ids, index, neighbors) for integer-indexed traversal.
+        neighbors(i) lists successors then predecessors of node i, resolved
+        lazily and cached until the union is rebuilt.
+        """
+        self._ensure_fresh()
+        G, node_ids, index, adjacency = self._graph, self._node_ids, self._index, self._adjacency
+
+        def neighbors(i):
+            adj = adjacency[i]
+            if adj is None:
+                node = node_ids[i]
+                adj = [index[n] for n in G.successors(node)]
+                adj += [index[n] for n in G.predecessors(node)]
+                adjacency[i] = adj
+            return adj
+
+        return node_ids, index, neighbors
+
+    def derived(self, key: Hashable, build: Callable[[], T]) -> T:
+        """
+        Returns build(), computed once per key for the current union and
+        dropped with the indexed() adjacency when the union is rebuilt. For
+        read-only structures derived from the graph (e.g. weighted adjacency).
+        """
+        self._ensure_fresh()
+        value = self._derived.get(key, _MISSING)
+        if value is _MISSING:
+            value = self._derived[key] = build()
+        return value
+
+    def bridge_nodes(self) -> Set:
+        """Entities that exist in both the contract and the news (V_base ∩ V_news)."""
+        nodes_base = set(self.base_graph.nodes())
+        nodes_news = set(self.news_graph.nodes())
+        return nodes_base.intersection(nodes_news)
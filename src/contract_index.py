@@ -0,0 +1,82 @@
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Set, Tuple
+
+
+class ContractIndex:
+    """
+    Inverted index from entity id to the contracts whose base graph contains it.
+
+    Each contract gets an integer ordinal, increasing in the order contracts
+    are added; posting lists are compact int arrays of ordinals, sorted
+    because ordinals are only ever appended. Looking up which contracts a
+    news graph touches costs time proportional to the news graph size plus
+    the matches, independent of the number of contracts in the portfolio.
+    Contracts can be added, replaced and removed incrementally; removal
+    finds the ordinal by bisection and closes the gap in place.
+    """
+
+    def __init__(self):
+        self._contract_ids: Dict[int, str] = {}   # ordinal -> contract id
+        self._ordinals: Dict[str, int] = {}       # contract id -> ordinal
+        self._entities: Dict[int, Tuple] = {}     # ordinal -> indexed entity ids
+        self._postings: Dict[str, array] = {}     # entity id -> sorted ordinals
+        self._next_ordinal = 0
+
+    def __len__(self) -> int:
+        return len(self._ordinals)
+
+    def __contains__(self, contract_id: str) -> bool:
+        return contract_id in self._ordinals
+
+    def add(self, contract_id: str, entities: Iterable[str]):
+        """
+        Indexes a contract's base-graph entities. Re-adding an existing
+        contract id replaces its previous entry.
+        """
+        if contract_id in self._ordinals:
+            self.remove(contract_id)
+
+        ordinal = self._next_ordinal
+        self._next_ordinal += 1
+        self._contract_ids[ordinal] = contract_id
+        self._ordinals[contract_id] = ordinal
+
+        entities = tuple(dict.fromkeys(entities))
+        self._entities[ordinal] = entities
+        for entity in entities:
+            posting = self._postings.get(entity)
+            if posting is None:
+                posting = self._postings[entity] = array('i')
+            posting.append(ordinal)
+
+    def add_contract(self, contract):
+        """Indexes a ContractData by the nodes of its base graph."""
+        self.add(contract.contract_id, contract.base_graph.nodes())
+
+    def remove(self, contract_id: str):
+        """Drops a contract from every posting list it appears in."""
+        ordinal = self._ordinals.pop(contract_id)
+        del self._contract_ids[ordinal]
+        for entity in self._entities.pop(ordinal):
+            posting = self._postings[entity]
+            del posting[bisect_left(posting, ordinal)]
+            if not posting:
+                del self._postings[entity]
+
+    def contracts_for(self, entity: str) -> List[str]:
+        """Contract ids whose base graph contains `entity`."""
+        return [self._contract_ids[o] for o in self._postings.get(entity, ())]
+
+    def find_bridges(self, news_graph) -> Dict[str, Set[str]]:
+        """
+        Given a news graph (or any iterable of entity ids), returns
+        {contract_id: bridge nodes} for every indexed contract it touches,
+        in the order the contracts were added.
+        """
+        nodes = news_graph.nodes() if hasattr(news_graph, "nodes") else news_graph
+        hits: Dict[int, Set[str]] = {}
+        for node in nodes:
+            for ordinal in self._postings.get(node, ()):
+                hits.setdefault(ordinal, set()).add(node)
+        return {self._contract_ids[o]: hits[o] for o in sorted(hits)}
@@ -0,0 +1,198 @@
+import networkx as nx
+import numpy as np
+from typing import Dict, Iterator, List, Optional
+
+
+class CSRGraph:
+    """
+    Compact, integer-indexed snapshot of a (combined) directed graph.
+
+    Entity ids are interned to ints; forward and reverse adjacency are kept
+    as NumPy CSR arrays together with per-edge relation codes and per-node
+    type codes. Neighbor order follows the source graph's successor and
+    predecessor order, so traversals return exactly the same paths as the
+    NetworkX backend. String ids are only needed again at output time.
+    """
+
+    def __init__(self, node_ids: List, node_type: np.ndarray, node_type_names: List,
+                 fwd_indptr: np.ndarray, fwd_indices: np.ndarray, fwd_edge_type: np.ndarray,
+                 rev_indptr: np.ndarray, rev_indices: np.ndarray, rev_edge_type: np.ndarray,
+                 edge_type_names: List):
+        self.node_ids = node_ids
+        self.node_type = node_type
+        self.node_type_names = node_type_names
+        self.fwd_indptr = fwd_indptr
+        self.fwd_indices = fwd_indices
+        self.fwd_edge_type = fwd_edge_type
+        self.rev_indptr = rev_indptr
+        self.rev_indices = rev_indices
+        self.rev_edge_type = rev_edge_type
+        self.edge_type_names = edge_type_names
+        self._index: Optional[Dict] = None
+        self._both: Optional[tuple] = None
+
+    @classmethod
+    def from_networkx(cls, G: nx.DiGraph) -> "CSRGraph":
+        """
+        Interns the nodes of G (in G's node order) and builds the CSR arrays.
+        Missing 'type' attributes are kept as a None type code.
+        """
+        node_ids = list(G.nodes())
+        index = {node: i for i, node in enumerate(node_ids)}
+
+        node_type_codes: Dict = {}
+        node_type = np.fromiter(
+            (node_type_codes.setdefault(attr.get("type"), len(node_type_codes))
+             for _, attr in G.nodes(data=True)),
+            dtype=np.int16, count=len(node_ids)
+        )
+
+        edge_type_codes: Dict = {}
+
+        def build(adjacency):
+            indptr = np.zeros(len(node_ids) + 1, dtype=np.int32)
+            indices, codes = [], []
+            for i, node in enumerate(node_ids):
+                for nb, attr in adjacency[node].items():
+                    indices.append(index[nb])
+                    codes.append(edge_type_codes.setdefault(attr.get("type"), len(edge_type_codes)))
+                indptr[i + 1] = len(indices)
+            return indptr, np.array(indices, dtype=np.int32), np.array(codes, dtype=np.int16)
+
+        fwd = build(G.succ)
+        rev = build(G.pred)
+
+        return cls(
+            node_ids, node_type, list(node_type_codes),
+            *fwd, *rev,
+            list(edge_type_codes)
+        )
+
+    @property
+    def index(self) -> Dict:
+        """String id -> int, built on first use (only needed to resolve inputs)."""
+        if self._index is None:
+            self._index = {node: i for i, node in enumerate(self.node_ids)}
+        return self._index
+
+    def number_of_nodes(self) -> int:
+        return len(self.node_ids)
+
+    def has_node(self, node) -> bool:
+        return node in self.index
+
+    def has_edge(self, u, v) -> bool:
+        return self._edge_code(u, v) is not None
+
+    def get_edge_data(self, u, v, default=None):
+        """Mirrors nx.DiGraph.get_edge_data for the 'type' attribute."""
+        code = self._edge_code(u, v)
+        if code is None:
+            return default
+        rel_type = self.edge_type_names[code]
+        return {} if rel_type is None else {"type": rel_type}
+
+    def _edge_code(self, u, v) -> Optional[int]:
+        index = self.index
+        if u not in index or v not in index:
+            return None
+        i, j = index[u], index[v]
+        lo, hi = self.fwd_indptr[i], self.fwd_indptr[i + 1]
+        hits = np.flatnonzero(self.fwd_indices[lo:hi] == j)
+        if len(hits) == 0:
+            return None
+        return int(self.fwd_edge_type[lo + hits[0]])
+
+    def type_mask(self, types) -> np.ndarray:
+        """Boolean array flagging nodes whose type is in `types`."""
+        codes = [code for code, name in enumerate(self.node_type_names) if name in types]
+        return np.isin(self.node_type, codes)
+
+    def _bidirectional(self):
+        """
+        Per-node neighbor lists (successors then predecessors) flattened into
+        one CSR pair, cached for vectorised frontier expansion.
+        """
+        if self._both is None:
+            fwd_deg = np.diff(self.fwd_indptr)
+            rev_deg = np.diff(self.rev_indptr)
+            indptr = np.zeros(len(self.node_ids) + 1, dtype=np.int64)
+            np.cumsum(fwd_deg + rev_deg, out=indptr[1:])
+
+            indices = np.empty(indptr[-1], dtype=np.int32)
+            node_of_fwd = np.repeat(np.arange(len(self.node_ids)), fwd_deg)
+            fwd_pos = indptr[node_of_fwd] + (np.arange(len(node_of_fwd)) - self.fwd_indptr[node_of_fwd])
+            indices[fwd_pos] = self.fwd_indices
+            node_of_rev = np.repeat(np.arange(len(self.node_ids)), rev_deg)
+            rev_pos = indptr[node_of_rev] + fwd_deg[node_of_rev] + (np.arange(len(node_of_rev)) - self.rev_indptr[node_of_rev])
+            indices[rev_pos] = self.rev_indices
+            self._both = (indptr, indices)
+        return self._both
+
+    def simple_paths(self, starts, is_target: np.ndarray, max_length: int, stats=None) -> Iterator[np.ndarray]:
+        """
+        Level-synchronous BFS over simple paths from one start index (or a list
+        of them), vectorised per level. Yields, level by level, an
+        (n_paths x length) array of the paths ending on their first target node;
+        column 0 is the path's origin. Rows keep breadth-first order, so the
+        sequence for each origin matches a FIFO path-record BFS exactly.
+        An optional TraversalStats is updated once per level.
+
+        Like PathEnumerator, partial paths are parent-pointer records: each
+        level keeps only a node array and a parent-row array, and the cycle
+        check walks the (at most max_length) levels above a row. Whole paths
+        are only rebuilt for the rows that are yielded.
+        """
+        indptr, indices = self._bidirectional()
+        level_nodes = [np.array(starts, dtype=np.int32).reshape(-1)]
+        level_parents = [np.full(len(level_nodes[0]), -1, dtype=np.int64)]
+        if stats is not None:
+            stats.searches += len(level_nodes[0])
+
+        while len(level_nodes[-1]):
+            last = level_nodes[-1]
+            if stats is not None:
+                # A whole level is queued at once
+                stats.generated += len(last)
+                stats.peak_frontier = max(stats.peak_frontier, len(last))
+            # Start nodes themselves never count as reached targets
+            hit = is_target[last] if len(level_nodes) > 1 else np.zeros(len(last), dtype=bool)
+            if hit.any():
+                if stats is not None:
+                    stats.paths += int(hit.sum())
+                yield self._rebuild(level_nodes, level_parents, np.flatnonzero(hit))
+                keep = ~hit
+                last = level_nodes[-1] = last[keep]
+                level_parents[-1] = level_parents[-1][keep]
+
+            if len(level_nodes) > max_length or not len(last):
+                if stats is not None:
+                    stats.depth_pruned += len(last)
+                break
+            if stats is not None:
+                stats.expanded += len(last)
+
+            # Gather every (row, neighbor) pair in row order, then neighbor order
+            starts = indptr[last]
+            counts = indptr[last + 1] - starts
+            rows = np.repeat(np.arange(len(last)), counts)
+            offsets = np.arange(len(rows)) - np.repeat(np.cumsum(counts) - counts, counts)
+            nbrs = indices[np.repeat(starts, counts) + offsets]
+
+            # Cycle check: compare each neighbor with its row's ancestors, level by level
+            simple = np.ones(len(rows), dtype=bool)
+            ancestor = rows
+            for depth in range(len(level_nodes) - 1, -1, -1):
+                simple &= level_nodes[depth][ancestor] != nbrs
+                ancestor = level_parents[depth][ancestor]
+            level_nodes.append(nbrs[simple].astype(np.int32, copy=False))
+            level_parents.append(rows[simple])
+
+    @staticmethod
+    def _rebuild(level_nodes, level_parents, rows) -> np.ndarray:
+        """(len(rows) x depth) node matrix of the given rows of the deepest level."""
+        paths = np.empty((len(rows), len(level_nodes)), dtype=np.int32)
+        for depth in range(len(level_nodes) - 1, -1, -1):
+            paths[:, depth] = level_nodes[depth][rows]
+            rows = level_parents[depth][rows]
+        return paths
@@ -1,34 +1,254 @@
+import codecs
 import json
+import os
 import networkx as nx
-from typing import List, Dict, Optional
-from dataclasses import dataclass
+from array import array
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
 from pathlib import Path
 
-@dataclass
+from src.combined_graph import CombinedGraph, VersionedDiGraph, graph_signature
+from src.contract_index import ContractIndex
+from src.csr_graph import CSRGraph
+from src.entity_pool import CompactGraph, EntityPools
+from src.graph_cache import CachedContractTable, GraphCache
+from src.risk_index import RiskDistanceIndex
+
+GraphLike = Union[nx.DiGraph, CompactGraph, None]
+
+def _repack(graph, packed):
+    """(graph, packed) after release: the CompactGraph again if the DiGraph is unchanged since unpacking."""
+    if packed is not None and getattr(graph, "version", None) == packed[1]:
+        return packed[0], None
+    return graph, packed
+
 class ContractData:
     """
     Data structure holding the parsed contract and its associated news graph.
+
+    The loader stores both graphs as CompactGraph records over the entity
+    pools of its load; each becomes a NetworkX DiGraph the first time it is
+    accessed, and release() packs it back once analysis is done.
+    contract_text is read back on access from the source snapshot the
+    contract was loaded from, instead of being held for every contract
+    (None if that snapshot is a file that has changed since).
+    Graphs and text passed in directly are kept as they are.
+    """
+    __slots__ = ("contract_id", "title", "_csr", "_csr_key", "_text", "_text_source", "_ordinal",
+                 "_base_graph", "_news_graph", "_base_packed", "_news_packed", "_combined", "_risk_index")
+
+    def __init__(self, contract_id: str, title: str, contract_text: Optional[str] = None,
+                 base_graph: GraphLike = None, news_graph: GraphLike = None, csr: Optional[CSRGraph] = None,
+                 text_source=None, ordinal: int = -1):
+        self.contract_id = contract_id
+        self.title = title
+        self._text = contract_text
+        # The snapshot the contract came from: a CachedContractTable or SourceTexts
+        self._text_source = text_source
+        self._ordinal = ordinal
+        self._base_graph = base_graph if base_graph is not None else CompactGraph()
+        self._news_graph = news_graph if news_graph is not None else CompactGraph()
+        # (CompactGraph, DiGraph version) each graph was unpacked from
+        self._base_packed: Optional[Tuple[CompactGraph, int]] = None
+        self._news_packed: Optional[Tuple[CompactGraph, int]] = None
+        self._combined: Optional[CombinedGraph] = None
+        self._risk_index: Optional[RiskDistanceIndex] = None
+        self.csr = csr
+
+    def __repr__(self) -> str:
+        return f"ContractData(contract_id={self.contract_id!r}, title={self.title!r})"
+
+    @property
+    def contract_text(self) -> Optional[str]:
+        if self._text is None and self._text_source is not None:
+            return self._text_source.contract_text(self._ordinal)
+        return self._text
+
+    @contract_text.setter
+    def contract_text(self, value: Optional[str]):
+        self._text = value
+
+    @property
+    def base_graph(self) -> nx.DiGraph:
+        if isinstance(self._base_graph, CompactGraph):
+            packed, self._base_graph = self._base_graph, self._base_graph.to_networkx()
+            self._base_packed = (packed, self._base_graph.version)
+        return self._base_graph
+
+    @base_graph.setter
+    def base_graph(self, graph: nx.DiGraph):
+        self._base_graph = graph
+        self._base_packed = None
+
+    @property
+    def news_graph(self) -> nx.DiGraph:
+        if isinstance(self._news_graph, CompactGraph):
+            packed, self._news_graph = self._news_graph, self._news_graph.to_networkx()
+            self._news_packed = (packed, self._news_graph.version)
+        return self._news_graph
+
+    @news_graph.setter
+    def news_graph(self, graph: nx.DiGraph):
+        self._news_graph = graph
+        self._news_packed = None
+
+    def release(self):
+        """
+        Drops the working state analysis builds (combined graph, risk index)
+        and packs the unpacked DiGraphs back into their CompactGraph records,
+        unless they were modified or replaced since. The next access unpacks
+        them again; an attached CSR snapshot is kept.
+        """
+        self._combined = None
+        self._risk_index = None
+        self._base_graph, self._base_packed = _repack(self._base_graph, self._base_packed)
+        self._news_graph, self._news_packed = _repack(self._news_graph, self._news_packed)
+
+    @property
+    def combined_graph(self) -> CombinedGraph:
+        """
+        Cached union of base_graph and news_graph, rebuilt only when either changes.
+        """
+        if (self._combined is None
+                or self._combined.base_graph is not self.base_graph
+                or self._combined.news_graph is not self.news_graph):
+            self._combined = CombinedGraph(self.base_graph, self.news_graph)
+        return self._combined
+
+    def _graphs_key(self) -> tuple:
+        return graph_signature(self.base_graph), graph_signature(self.news_graph)
+
+    @property
+    def csr(self) -> Optional[CSRGraph]:
+        """
+        CSR snapshot of combined_graph, if one was attached (DataLoader's
+        build_csr). Rebuilt when either graph changed since it was taken.
+        """
+        if self._csr is not None and self._csr_key != self._graphs_key():
+            self._csr = CSRGraph.from_networkx(self.combined_graph.graph)
+            self._csr_key = self._graphs_key()
+        return self._csr
+
+    @csr.setter
+    def csr(self, csr: Optional[CSRGraph]):
+        self._csr = csr
+        self._csr_key = self._graphs_key() if csr is not None else None
+
+    @property
+    def risk_index(self) -> RiskDistanceIndex:
+        """
+        Risk-distance index of base_graph, built on first use and rebuilt only
+        when the base graph changes (news updates never invalidate it).
+        """
+        if self._risk_index is None or self._risk_index.base_graph is not self.base_graph:
+            self._risk_index = RiskDistanceIndex(self.base_graph)
+        return self._risk_index.ensure_current()
+
+class LazyContracts(Sequence):
+    """
+    List-like view over a compiled graph cache. Each ContractData (and its
+    graphs) is only built the first time it is accessed.
+    """
+
+    def __init__(self, table: CachedContractTable, build: Callable[[int, Dict], ContractData]):
+        self._table = table
+        self._build = build
+        self._built: Dict[int, ContractData] = {}
+
+    def __len__(self) -> int:
+        return len(self._table)
+
+    def contract_id(self, i: int) -> Optional[str]:
+        """Id of contract i, without building it."""
+        return self._table.contract_id(i)
+
+    def digest(self, i: int) -> bytes:
+        """Digest of contract i's graphs as stored in the cache, without building it."""
+        return self._table.digest(i)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("contract index out of range")
+        contract = self._built.get(i)
+        if contract is None:
+            contract = self._built[i] = self._build(i, self._table.entry(i, text=False))
+        return contract
+
+def _file_stamp(path: Path) -> Tuple[int, int]:
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+def _read_json_value(f, chunk_size: int = 1 << 16):
+    """Decodes the JSON value starting at the current position of binary file f."""
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    buf = ""
+    while True:
+        chunk = f.read(max(chunk_size, len(buf)))
+        buf += utf8.decode(chunk, final=not chunk)
+        try:
+            return decoder.raw_decode(buf.lstrip())[0]
+        except json.JSONDecodeError:
+            if not chunk:
+                raise
+
+class SourceTexts:
+    """
+    Contract texts of one version of a source file, read back on demand.
+    A load pass records each record's byte offset and contract_id along with
+    the file's (mtime_ns, size) stamp; contract_text(i) seeks straight to
+    record i. It returns None, never another contract's text, once the file
+    has changed, moved or been removed since the pass.
     """
-    contract_id: str
-    title: str
-    contract_text: str
-    base_graph: nx.DiGraph
-    news_graph: nx.DiGraph
+    __slots__ = ("path", "jsonl", "stamp", "offsets", "contract_ids")
+
+    def __init__(self, path: Path, jsonl: bool):
+        self.path = path
+        self.jsonl = jsonl
+        self.stamp = _file_stamp(path)
+        self.offsets = array("q")
+        self.contract_ids: List[Optional[str]] = []
+
+    def add(self, offset: int, contract_id: Optional[str]):
+        self.offsets.append(offset)
+        self.contract_ids.append(contract_id)
+
+    def contract_text(self, i: int) -> Optional[str]:
+        try:
+            if _file_stamp(self.path) != self.stamp:
+                return None
+            with open(self.path, "rb") as f:
+                f.seek(self.offsets[i])
+                entry = json.loads(f.readline()) if self.jsonl else _read_json_value(f)
+        except (OSError, ValueError):
+            # Removed, or rewritten within the stamp's resolution
+            return None
+        if not isinstance(entry, dict) or entry.get("contract_id") != self.contract_ids[i]:
+            return None
+        return entry.get("contract_text")
 
 class DataLoader:
     """
     Responsible for loading raw JSON data and converting it into 
     NetworkX graph objects for the reasoning engine.
+    With use_cache=True the parsed data is compiled into a binary cache next
+    to the source file, and later loads memory-map it instead of re-parsing.
     """
 
-    def __init__(self, filepath: str):
+    def __init__(self, filepath: str, use_cache: bool = False, cache_path: Optional[str] = None):
         self.filepath = Path(filepath)
+        self.use_cache = use_cache
+        self.cache = GraphCache(self.filepath, cache_path)
 
-    def _json_to_graph(self, graph_data: Dict) -> nx.DiGraph:
+    def json_to_graph(self, graph_data: Dict) -> nx.DiGraph:
         """
         Converts a dictionary with 'entities' and 'relations' into a NetworkX DiGraph.
+        The graph tracks its own mutations so cached combined views stay valid.
         """
-        G = nx.DiGraph()
+        G = VersionedDiGraph()
         
         # Add nodes with attributes
         for entity in graph_data.get("entities", []):
@@ -46,34 +266,187 @@ class DataLoader:
             
         return G
 
-    def load(self) -> List[ContractData]:
+    def build_csr(self, contract: ContractData) -> CSRGraph:
         """
-        Parses the JSON file and returns a list of ContractData objects.
+        Interns the contract's combined graph into integer CSR arrays
+        for the compact reasoning backend.
+        """
+        return CSRGraph.from_networkx(contract.combined_graph.graph)
+
+    def build_contract_index(self, contracts: List[ContractData]) -> ContractIndex:
+        """
+        Builds the portfolio-wide entity -> contracts inverted index used to
+        find every contract a breaking news graph bridges into.
+        """
+        index = ContractIndex()
+        for contract in contracts:
+            index.add_contract(contract)
+        return index
+
+    def _entry_to_contract(self, entry: Dict, build_csr: bool = False, text_source=None,
+                           ordinal: int = -1, pools: Optional[EntityPools] = None) -> ContractData:
+        """
+        Converts one raw contract record into a ContractData object. Graphs are
+        packed over `pools` (shared by one load; fresh ones if not given); given
+        the snapshot the record came from and its position there, the contract
+        text is dropped and read back on access.
+        """
+        pools = pools if pools is not None else EntityPools()
+        # Parse Base Graph (Contract) and News Graph (Sequence)
+        base_G = CompactGraph.from_json(entry.get("base_graph", {}), pools)
+        news_G = CompactGraph.from_json(entry.get("news_sequence", {}), pools)
+
+        contract_obj = ContractData(
+            contract_id=entry.get("contract_id"),
+            title=entry.get("title"),
+            contract_text=entry.get("contract_text") if text_source is None else None,
+            base_graph=base_G,
+            news_graph=news_G,
+            text_source=text_source,
+            ordinal=ordinal
+        )
+        if build_csr:
+            contract_obj.csr = self.build_csr(contract_obj)
+        return contract_obj
+
+    def _iter_json_array(self, f, chunk_size: int) -> Iterator[Tuple[int, Dict]]:
+        """
+        Incrementally decodes the elements of a top-level JSON array, yielding
+        (byte offset, element) pairs. f must be a UTF-8 text file opened with
+        newline='' so the offsets match the file.
+        Only the current element (plus one read-ahead chunk) is buffered.
+        """
+        decoder = json.JSONDecoder()
+        buf = ""
+        pos = 0
+        started = False
+        eof = False
+        # Bytes before buf[0], and before buf[mark] (each character is encoded once)
+        base = 0
+        mark = mark_bytes = 0
+
+        while True:
+            # Skip whitespace and element separators
+            while pos < len(buf) and (buf[pos].isspace() or (started and buf[pos] == ",")):
+                pos += 1
+
+            if pos < len(buf):
+                if not started:
+                    if buf[pos] != "[":
+                        raise ValueError(f"Expected a JSON array in {self.filepath}")
+                    started = True
+                    pos += 1
+                    continue
+                if buf[pos] == "]":
+                    return
+                try:
+                    entry, end = decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                    # Element not fully buffered yet; fall through and read more
+                else:
+                    mark_bytes += len(buf[mark:pos].encode("utf-8"))
+                    mark = pos
+                    yield base + mark_bytes, entry
+                    pos = end
+                    continue
+            elif eof:
+                raise ValueError(f"Unterminated JSON array in {self.filepath}")
+
+            # Drop consumed input, then grow the buffer (geometrically, so a
+            # large element is not re-parsed once per fixed-size chunk)
+            base += mark_bytes + len(buf[mark:pos].encode("utf-8"))
+            mark = mark_bytes = 0
+            buf = buf[pos:]
+            pos = 0
+            chunk = f.read(max(chunk_size, len(buf)))
+            eof = not chunk
+            buf += chunk
+
+    def _is_jsonl(self) -> bool:
+        return self.filepath.suffix.lower() in (".jsonl", ".ndjson")
+
+    def iter_contracts(self, build_csr: bool = False, chunk_size: int = 1 << 16) -> Iterator[ContractData]:
+        """
+        Lazily yields ContractData objects one at a time, so peak memory is
+        bounded by the largest single contract rather than the whole feed.
+        Reads either a JSON array (streamed incrementally) or newline-delimited
+        JSON (one contract per line, for .jsonl / .ndjson files).
         """
         if not self.filepath.exists():
             raise FileNotFoundError(f"Dataset not found at: {self.filepath}")
+        texts = SourceTexts(self.filepath, self._is_jsonl())
+        # One set of pools per pass, freed with its contracts
+        pools = EntityPools()
+        for i, (offset, entry) in enumerate(self._iter_records(chunk_size)):
+            texts.add(offset, entry.get("contract_id"))
+            yield self._entry_to_contract(entry, build_csr, text_source=texts, ordinal=i, pools=pools)
 
-        with open(self.filepath, 'r', encoding='utf-8') as f:
-            raw_data = json.load(f)
+    def _iter_entries(self, chunk_size: int = 1 << 16) -> Iterator[Dict]:
+        """
+        Yields the raw contract records of the source file one at a time.
+        """
+        return (entry for _, entry in self._iter_records(chunk_size))
 
-        contracts = []
-        for entry in raw_data:
-            # Parse Base Graph (Contract)
-            base_G = self._json_to_graph(entry.get("base_graph", {}))
-            
-            # Parse News Graph (Sequence)
-            news_G = self._json_to_graph(entry.get("news_sequence", {}))
-
-            contract_obj = ContractData(
-                contract_id=entry.get("contract_id"),
-                title=entry.get("title"),
-                contract_text=entry.get("contract_text"),
-                base_graph=base_G,
-                news_graph=news_G
+    def _iter_records(self, chunk_size: int = 1 << 16) -> Iterator[Tuple[int, Dict]]:
+        """
+        Yields (byte offset, raw record) pairs for the source file.
+        """
+        if not self.filepath.exists():
+            raise FileNotFoundError(f"Dataset not found at: {self.filepath}")
+
+        with open(self.filepath, 'r', encoding='utf-8', newline='') as f:
+            if self._is_jsonl():
+                offset = 0
+                for line in f:
+                    if line.strip():
+                        yield offset, json.loads(line)
+                    offset += len(line.encode("utf-8"))
+            else:
+                yield from self._iter_json_array(f, chunk_size)
+
+    def _open_cache(self) -> Optional[CachedContractTable]:
+        """
+        Returns the memory-mapped cache, (re)compiling it first if the source
+        changed. Falls back to None if the cache cannot be written.
+        """
+        if not self.filepath.exists():
+            raise FileNotFoundError(f"Dataset not found at: {self.filepath}")
+        try:
+            if not self.cache.is_valid():
+                self.cache.build(self._iter_entries())
+            try:
+                return self.cache.open()
+            except ValueError:
+                # Truncated or corrupt file behind a valid header: recompile once
+                self.cache.build(self._iter_entries())
+                return self.cache.open()
+        except OSError as e:
+            print(f"[!] Graph cache unavailable ({e}); parsing {self.filepath.name} directly.")
+            return None
+
+    def load(self, build_csr: bool = False, verbose: bool = True) -> List[ContractData]:
+        """
+        Parses the JSON file and returns a list of ContractData objects.
+        With build_csr=True each contract also carries its CSRGraph.
+        With caching enabled the result is a lazily materialised sequence.
+        """
+        table = self._open_cache() if self.use_cache else None
+        if table is not None:
+            # Contracts read their text from this exact table, even after a later
+            # load() recompiles the cache (the old mapping stays valid), and share
+            # entity pools that are freed with them
+            pools = EntityPools()
+            contracts = LazyContracts(
+                table, lambda i, entry: self._entry_to_contract(entry, build_csr, text_source=table, ordinal=i,
+                                                                pools=pools)
             )
-            contracts.append(contract_obj)
+        else:
+            contracts = list(self.iter_contracts(build_csr))
 
-        print(f"Successfully loaded {len(contracts)} contracts from {self.filepath.name}")
+        if verbose:
+            print(f"Successfully loaded {len(contracts)} contracts from {self.filepath.name}")
         return contracts
 
 # --- Quick Test Block (Optional, requires main execution) ---
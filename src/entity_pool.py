@@ -0,0 +1,106 @@
+import threading
+from array import array
+from typing import Dict, Hashable, List, Optional
+
+from src.combined_graph import VersionedDiGraph
+
+
+class StringPool:
+    """
+    Append-only intern table: every distinct value gets one small int code
+    and one canonical object, shared by all graphs packed over it.
+    Lookups are lock-free; only adding a new value takes the lock.
+    """
+    __slots__ = ("_codes", "_values", "_lock")
+
+    def __init__(self):
+        self._codes: Dict[Hashable, int] = {}
+        self._values: List[Hashable] = []
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def code(self, value: Hashable) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            with self._lock:
+                code = self._codes.get(value)
+                if code is None:
+                    code = self._codes[value] = len(self._values)
+                    self._values.append(value)
+        return code
+
+    def value(self, code: int) -> Hashable:
+        return self._values[code]
+
+    def intern(self, value: Hashable) -> Hashable:
+        """The canonical object equal to `value`."""
+        return self._values[self.code(value)]
+
+
+class EntityPools:
+    """
+    The pools one load packs its graphs over. Entity ids repeat across
+    contracts (countries, ports, shared suppliers); entity and relation
+    types are a small closed vocabulary, so their codes stay small ints.
+    Every CompactGraph references its pools, so they are freed with the last
+    contract of the load (e.g. after a reload) instead of growing forever.
+    """
+    __slots__ = ("entities", "entity_types", "relation_types", "__weakref__")
+
+    def __init__(self):
+        self.entities = StringPool()
+        self.entity_types = StringPool()
+        self.relation_types = StringPool()
+
+
+class CompactGraph:
+    """
+    A contract or news graph packed into two int arrays of pool codes:
+    entities as (id, type) pairs and relations as (source, target, type)
+    triples, in source order. About a tenth of the size of the equivalent
+    DiGraph; to_networkx() replays it into the graph json_to_graph builds.
+    """
+    __slots__ = ("entities", "relations", "pools")
+
+    def __init__(self, entities: Optional[array] = None, relations: Optional[array] = None,
+                 pools: Optional[EntityPools] = None):
+        self.entities = entities if entities is not None else array("i")
+        self.relations = relations if relations is not None else array("i")
+        self.pools = pools if pools is not None else EntityPools()
+
+    @classmethod
+    def from_json(cls, graph_data: Dict, pools: EntityPools) -> "CompactGraph":
+        """Packs a dictionary with 'entities' and 'relations' (the source JSON shape) over `pools`."""
+        entity, entity_type, relation_type = pools.entities.code, pools.entity_types.code, pools.relation_types.code
+        entities = array("i")
+        for e in graph_data.get("entities", []):
+            entities.extend((entity(e["id"]), entity_type(e["type"])))
+        relations = array("i")
+        for r in graph_data.get("relations", []):
+            relations.extend((entity(r["source"]), entity(r["target"]), relation_type(r["type"])))
+        return cls(entities, relations, pools)
+
+    def number_of_entities(self) -> int:
+        return len(self.entities) // 2
+
+    def number_of_relations(self) -> int:
+        return len(self.relations) // 3
+
+    def nbytes(self) -> int:
+        """Bytes held by the two code arrays."""
+        return (len(self.entities) + len(self.relations)) * self.entities.itemsize
+
+    def to_networkx(self) -> VersionedDiGraph:
+        """The equivalent VersionedDiGraph, keyed by the pooled (interned) strings."""
+        pools = self.pools
+        entity, entity_type, relation_type = pools.entities.value, pools.entity_types.value, pools.relation_types.value
+        G = VersionedDiGraph()
+        codes = self.entities
+        for i in range(0, len(codes), 2):
+            G.add_node(entity(codes[i]), type=entity_type(codes[i + 1]))
+        codes = self.relations
+        for i in range(0, len(codes), 3):
+            G.add_edge(entity(codes[i]), entity(codes[i + 1]), type=relation_type(codes[i + 2]))
+        return G
@@ -0,0 +1,91 @@
+"""
+Recording stand-in for the Neo4j driver (driver -> session -> transaction),
+for running Neo4jManager without a server in tests and benchmarks. It
+records every round trip instead of talking to a server, and can inject a
+fixed per-round-trip latency to mimic network cost.
+"""
+import threading
+import time
+
+class FakeResult:
+    def __init__(self, records=None):
+        self._records = records or []
+
+    def consume(self):
+        return None
+
+    def data(self):
+        return list(self._records)
+
+    def __iter__(self):
+        return iter(self._records)
+
+class FakeTransaction:
+    def __init__(self, session):
+        self._session = session
+
+    def run(self, query, parameters=None, **params):
+        return self._session._round_trip(query, dict(parameters or {}, **params), in_tx=True)
+
+class FakeSession:
+    def __init__(self, driver):
+        self._driver = driver
+
+    def _round_trip(self, query, params, in_tx=False):
+        return self._driver._record(query, params, in_tx)
+
+    def run(self, query, parameters=None, **params):
+        return self._round_trip(query, dict(parameters or {}, **params))
+
+    def execute_write(self, fn, *args, **kwargs):
+        return fn(FakeTransaction(self), *args, **kwargs)
+
+    def execute_read(self, fn, *args, **kwargs):
+        return fn(FakeTransaction(self), *args, **kwargs)
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class FakeDriver:
+    """
+    Records (query, params, in_transaction) for every round trip.
+    `responder(query, params)` may return records for read queries.
+    """
+
+    def __init__(self, latency: float = 0.0, responder=None):
+        self.latency = latency
+        self.responder = responder
+        self.queries = []
+        self.sessions = 0
+        self._failures = []
+        self._lock = threading.Lock()
+
+    def inject_failure(self, match: str, exc: Exception, times: int = 1):
+        """Raises `exc` on the next `times` round trips whose query contains `match`."""
+        self._failures.extend([(match, exc)] * times)
+
+    def _record(self, query, params, in_tx):
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            for i, (match, exc) in enumerate(self._failures):
+                if match in query:
+                    del self._failures[i]
+                    raise exc
+            self.queries.append((query, params, in_tx))
+        records = self.responder(query, params) if self.responder else None
+        return FakeResult(records)
+
+    def session(self, **kwargs):
+        with self._lock:
+            self.sessions += 1
+        return FakeSession(self)
+
+    def close(self):
+        pass
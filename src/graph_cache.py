@@ -0,0 +1,242 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+from array import array
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+
+# magic, format version, source size, source mtime (ns), source sha256,
+# string count, contract count, node count, edge count
+_HEADER = struct.Struct("<8sIQq32sIIQQ")
+_MTIME = struct.Struct("<q")
+_MTIME_OFFSET = struct.calcsize("<8sIQ")
+_MAGIC = b"SGSAGC01"
+_FORMAT_VERSION = 2
+
+# Per-contract row: id, title, text (string refs), then start/count of
+# base nodes, base edges, news nodes and news edges
+_CONTRACT_COLS = 11
+# Per-contract SHA-256 of its two graphs (see graph_digest)
+_DIGEST_SIZE = 32
+_NONE = -1
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+def graph_digest(entry: Dict) -> bytes:
+    """SHA-256 of a raw record's base and news graphs, the part of a contract that gets drawn."""
+    graphs = [entry.get("base_graph", {}), entry.get("news_sequence", {})]
+    return hashlib.sha256(json.dumps(graphs, sort_keys=True).encode("utf-8")).digest()
+
+
+def file_sha256(path: Path, chunk_size: int = 1 << 20) -> bytes:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.digest()
+
+
+class GraphCache:
+    """
+    Compiled binary cache of a contracts file, stored next to the source.
+
+    Layout: a fixed header keyed by the source's size, mtime and SHA-256,
+    then an interned string table (offsets + UTF-8 blob), int arrays for
+    contracts, nodes and edges, and one graph_digest per contract. Readers memory-map the file and only decode
+    the strings and rows of the contracts they actually access.
+    """
+
+    def __init__(self, source_path, cache_path=None):
+        self.source_path = Path(source_path)
+        self.cache_path = Path(cache_path) if cache_path else self.source_path.with_name(
+            self.source_path.name + ".sgsa-cache"
+        )
+
+    def _read_header(self):
+        with open(self.cache_path, "rb") as f:
+            raw = f.read(_HEADER.size)
+        if len(raw) < _HEADER.size:
+            return None
+        header = _HEADER.unpack(raw)
+        if header[0] != _MAGIC or header[1] != _FORMAT_VERSION:
+            return None
+        return header
+
+    def is_valid(self) -> bool:
+        """
+        True if the cache matches the current source. Size and mtime are
+        checked first; when only the mtime moved (e.g. after a checkout) the
+        content hash decides, and a match records the new mtime so later
+        checks take the fast path again.
+        """
+        if not self.cache_path.exists():
+            return False
+        header = self._read_header()
+        if header is None:
+            return False
+        _, _, size, mtime_ns, sha256 = header[:5]
+        stat = self.source_path.stat()
+        if stat.st_size != size:
+            return False
+        if stat.st_mtime_ns == mtime_ns:
+            return True
+        if file_sha256(self.source_path) != sha256:
+            return False
+        try:
+            with open(self.cache_path, "r+b") as f:
+                f.seek(_MTIME_OFFSET)
+                f.write(_MTIME.pack(stat.st_mtime_ns))
+        except OSError:
+            pass  # read-only cache: still valid, just rehashed next time
+        return True
+
+    def build(self, entries: Iterable[Dict]):
+        """
+        Compiles raw contract records into the cache file (written atomically).
+        """
+        stat = self.source_path.stat()
+        sha256 = file_sha256(self.source_path)
+
+        strings: Dict[str, int] = {}
+
+        def ref(value: Optional[str]) -> int:
+            if value is None:
+                return _NONE
+            return strings.setdefault(value, len(strings))
+
+        contracts = array("q")
+        nodes = array("i")
+        edges = array("i")
+        digests = bytearray()
+        for entry in entries:
+            digests += graph_digest(entry)
+            contracts.extend((ref(entry.get("contract_id")), ref(entry.get("title")), ref(entry.get("contract_text"))))
+            for key in ("base_graph", "news_sequence"):
+                graph_data = entry.get(key, {})
+                entities = graph_data.get("entities", [])
+                relations = graph_data.get("relations", [])
+                contracts.extend((len(nodes) // 2, len(entities)))
+                for entity in entities:
+                    nodes.extend((ref(entity["id"]), ref(entity["type"])))
+                contracts.extend((len(edges) // 3, len(relations)))
+                for relation in relations:
+                    edges.extend((ref(relation["source"]), ref(relation["target"]), ref(relation["type"])))
+
+        blob = bytearray()
+        string_offsets = array("q", [0])
+        for value in strings:
+            blob += value.encode("utf-8")
+            string_offsets.append(len(blob))
+
+        tmp_path = self.cache_path.with_name(self.cache_path.name + f".tmp{os.getpid()}")
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(_HEADER.pack(
+                    _MAGIC, _FORMAT_VERSION, stat.st_size, stat.st_mtime_ns, sha256,
+                    len(strings), len(contracts) // _CONTRACT_COLS, len(nodes) // 2, len(edges) // 3
+                ))
+                for section in (string_offsets, contracts, nodes, edges, bytes(digests), bytes(blob)):
+                    f.write(b"\0" * (_align(f.tell()) - f.tell()))
+                    f.write(section if isinstance(section, bytes) else section.tobytes())
+            os.replace(tmp_path, self.cache_path)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+
+    def open(self) -> "CachedContractTable":
+        return CachedContractTable(self.cache_path)
+
+
+class CachedContractTable:
+    """
+    Memory-mapped, read-only view of a compiled cache. entry(i) rebuilds
+    the raw record of contract i (same shape as the source JSON) on demand.
+    Raises ValueError if the file is shorter than its header describes.
+    """
+
+    def __init__(self, cache_path: Path):
+        with open(cache_path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        header = _HEADER.unpack_from(self._mmap, 0)
+        n_strings, n_contracts, n_nodes, n_edges = header[5:]
+
+        offset = _HEADER.size
+
+        def section(dtype, count):
+            nonlocal offset
+            offset = _align(offset)
+            arr = np.frombuffer(self._mmap, dtype=dtype, count=count, offset=offset)
+            offset += arr.nbytes
+            return arr
+
+        self._string_offsets = section(np.int64, n_strings + 1)
+        self._contracts = section(np.int64, n_contracts * _CONTRACT_COLS).reshape(n_contracts, _CONTRACT_COLS)
+        self._nodes = section(np.int32, n_nodes * 2).reshape(n_nodes, 2)
+        self._edges = section(np.int32, n_edges * 3).reshape(n_edges, 3)
+        self._digests = section(np.uint8, n_contracts * _DIGEST_SIZE).reshape(n_contracts, _DIGEST_SIZE)
+        self._blob_offset = _align(offset)
+        if self._blob_offset + int(self._string_offsets[-1]) > len(self._mmap):
+            raise ValueError(f"truncated graph cache: {cache_path}")
+        self._strings: Dict[int, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._contracts)
+
+    def string(self, ref: int) -> Optional[str]:
+        if ref == _NONE:
+            return None
+        value = self._strings.get(ref)
+        if value is None:
+            start = self._blob_offset + int(self._string_offsets[ref])
+            end = self._blob_offset + int(self._string_offsets[ref + 1])
+            # Interned so repeated entities share one str object
+            value = self._strings[ref] = self._mmap[start:end].decode("utf-8")
+        return value
+
+    def contract_id(self, i: int) -> Optional[str]:
+        return self.string(int(self._contracts[i, 0]))
+
+    def digest(self, i: int) -> bytes:
+        """graph_digest of contract i, computed when the cache was built."""
+        return self._digests[i].tobytes()
+
+    def contract_text(self, i: int) -> Optional[str]:
+        """Decodes the text of contract i (not interned: texts are large and rarely read)."""
+        ref = int(self._contracts[i, 2])
+        if ref == _NONE:
+            return None
+        start = self._blob_offset + int(self._string_offsets[ref])
+        end = self._blob_offset + int(self._string_offsets[ref + 1])
+        return self._mmap[start:end].decode("utf-8")
+
+    def entry(self, i: int, text: bool = True) -> Dict:
+        """The raw record of contract i; text=False leaves contract_text out (None)."""
+        row = self._contracts[i].tolist()
+        string = self.string
+
+        def graph(node_start, node_count, edge_start, edge_count):
+            return {
+                "entities": [
+                    {"id": string(n), "type": string(t)}
+                    for n, t in self._nodes[node_start:node_start + node_count].tolist()
+                ],
+                "relations": [
+                    {"source": string(u), "target": string(v), "type": string(t)}
+                    for u, v, t in self._edges[edge_start:edge_start + edge_count].tolist()
+                ],
+            }
+
+        return {
+            "contract_id": string(row[0]),
+            "title": string(row[1]),
+            "contract_text": self.contract_text(i) if text else None,
+            "base_graph": graph(*row[3:7]),
+            "news_sequence": graph(*row[7:11]),
+        }
@@ -0,0 +1,125 @@
+import hashlib
+import json
+import os
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+def force_layout(n_nodes: int, edges: Sequence[Tuple[int, int]], iterations: int = 50, seed: int = 0,
+                 chunk: int = 256) -> np.ndarray:
+    """
+    Fruchterman-Reingold force-directed layout, vectorised with NumPy.
+
+    Returns an (n_nodes x 2) array of positions in [-1, 1]. Repulsion between
+    all pairs is computed in row blocks of `chunk` nodes, so memory stays
+    O(chunk * n_nodes) while each iteration is a handful of array operations;
+    attraction is applied along `edges` (pairs of node indices). The result
+    only depends on the graph and the arguments.
+    """
+    rng = np.random.default_rng(seed)
+    pos = rng.random((n_nodes, 2))
+    if n_nodes <= 1:
+        return np.zeros((n_nodes, 2))
+
+    edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+    src, dst = edges[:, 0], edges[:, 1]
+    k = np.sqrt(1.0 / n_nodes)
+    temperature = 0.1
+    cooling = temperature / (iterations + 1)
+    disp = np.empty_like(pos)
+    for _ in range(iterations):
+        disp[:] = 0.0
+        # Repulsion k^2 / d along each pair's direction
+        x, y = pos[:, 0], pos[:, 1]
+        for start in range(0, n_nodes, chunk):
+            dx = x[start:start + chunk, None] - x
+            dy = y[start:start + chunk, None] - y
+            weight = dx * dx
+            weight += dy * dy
+            np.maximum(weight, 1e-4, out=weight)
+            np.divide(k * k, weight, out=weight)
+            disp[start:start + chunk, 0] += (dx * weight).sum(axis=1)
+            disp[start:start + chunk, 1] += (dy * weight).sum(axis=1)
+        # Attraction d^2 / k along each edge
+        delta = pos[src] - pos[dst]
+        dist = np.maximum(np.sqrt((delta ** 2).sum(axis=-1)), 1e-2)
+        pull = delta * (dist / k)[:, None]
+        np.subtract.at(disp, src, pull)
+        np.add.at(disp, dst, pull)
+        # Move each node at most `temperature` along its displacement
+        length = np.maximum(np.sqrt((disp ** 2).sum(axis=-1)), 1e-2)
+        pos += disp * (np.minimum(length, temperature) / length)[:, None]
+        temperature -= cooling
+
+    pos -= pos.mean(axis=0)
+    scale = np.abs(pos).max()
+    return pos / scale if scale > 0 else pos
+
+
+class LayoutCache:
+    """
+    Layouts stored as JSON files named by a hash of the graph structure and
+    layout parameters, so an unchanged graph is never laid out twice.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    @staticmethod
+    def key(node_ids: Sequence, edges: Sequence[Tuple[int, int]], **params) -> str:
+        payload = json.dumps([list(map(str, node_ids)), [list(e) for e in edges], sorted(params.items())])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str) -> Optional[List[List[float]]]:
+        try:
+            with open(self._path(key), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def set(self, key: str, positions: List[List[float]]):
+        os.makedirs(self.directory, exist_ok=True)
+        # Write-then-rename: worker processes may store the same key concurrently
+        tmp = f"{self._path(key)}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(positions, f)
+        os.replace(tmp, self._path(key))
+
+    def prune(self, keep: Iterable[str]) -> int:
+        """Deletes every stored layout whose key is not in `keep`. Returns the number deleted."""
+        keep = set(keep)
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return 0
+        removed = 0
+        for name in names:
+            if name.endswith(".json") and name[:-len(".json")] not in keep:
+                os.remove(os.path.join(self.directory, name))
+                removed += 1
+        return removed
+
+
+def layout_key(node_ids: Sequence, edges: Sequence[Tuple[int, int]], iterations: int = 50, seed: int = 0,
+               scale: float = 1000.0) -> str:
+    """LayoutCache key under which cached_layout stores the same arguments' layout."""
+    return LayoutCache.key(node_ids, edges, iterations=iterations, seed=seed, scale=scale)
+
+
+def cached_layout(node_ids: Sequence, edges: Sequence[Tuple[int, int]], cache: Optional[LayoutCache] = None,
+                  iterations: int = 50, seed: int = 0, scale: float = 1000.0) -> Dict:
+    """{node id: (x, y)} in pixels for the graph, from the cache when possible."""
+    positions = None
+    key = None
+    if cache is not None:
+        key = layout_key(node_ids, edges, iterations, seed, scale)
+        positions = cache.get(key)
+    if positions is None:
+        positions = np.round(force_layout(len(node_ids), edges, iterations, seed) * scale, 1).tolist()
+        if cache is not None:
+            cache.set(key, positions)
+    return {node: (x, y) for node, (x, y) in zip(node_ids, positions)}
@@ -1,93 +1,368 @@
+import asyncio
+import hashlib
 import os
+import time
+from typing import AsyncIterator, Dict, Iterable, Optional, Tuple
 from langchain_neo4j import Neo4jGraph, GraphCypherQAChain # آپدیت شده برای رفع Warning
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.prompts import PromptTemplate
 from dotenv import load_dotenv
 
-load_dotenv()
+from src.neo4j_manager import DATA_VERSION_LABEL, DATA_VERSION_QUERY
+from src.rag_cache import LRUCache
+from src.rate_limiter import TokenBucket
+from src.reasoning_engine import MAX_PATH_LENGTH, RISK_TARGET_TYPES
+
+# Prepared traversal mirroring ReasoningEngine.discover_causal_chain: undirected
+# simple paths from the event that stop at the first risk target, at most
+# MAX_PATH_LENGTH hops. Used when the server has the APOC plugin (otherwise
+# see RISK_TRAVERSAL_FALLBACK_QUERY), which expands breadth-first and prunes while expanding:
+# NODE_PATH uniqueness keeps every path simple, and the terminator label filter
+# ("/Risk|/Penalty|...") ends a path at its first target instead of matching all
+# bounded paths and filtering afterwards. Results come out shortest first, so
+# `limit` stops the expansion early. Everything is a parameter, so the query
+# plan is cached server-side and no LLM is needed to generate it.
+RISK_TRAVERSAL_QUERY = """
+MATCH (s:Entity {id: $event_id})
+CALL apoc.path.expandConfig(s, {
+  minLevel: 1,
+  maxLevel: $max_hops,
+  uniqueness: 'NODE_PATH',
+  labelFilter: $label_filter,
+  bfs: true,
+  limit: $limit
+}) YIELD path
+RETURN [n IN nodes(path) | n.id] AS path,
+       [r IN relationships(path) | {type: type(r), source: startNode(r).id, target: endNode(r).id}] AS relations
+"""
+
+# The same traversal in plain Cypher, for servers without APOC. The path
+# conditions filter every bounded path instead of pruning the expansion, so
+# it is slower on dense graphs. Variable-length bounds cannot be parameters,
+# so the depth is fixed in the text.
+RISK_TRAVERSAL_FALLBACK_QUERY = f"""
+MATCH p = (s:Entity {{id: $event_id}})-[*1..{MAX_PATH_LENGTH}]-(t:Entity)
+WHERE any(label IN labels(t) WHERE label IN $target_types)
+  AND none(n IN nodes(p)[1..-1] WHERE any(label IN labels(n) WHERE label IN $target_types))
+  AND all(i IN range(0, size(nodes(p)) - 2) WHERE NOT nodes(p)[i] IN nodes(p)[i + 1..])
+RETURN [n IN nodes(p) | n.id] AS path,
+       [r IN relationships(p) | {{type: type(r), source: startNode(r).id, target: endNode(r).id}}] AS relations
+ORDER BY length(p)
+LIMIT $limit
+"""
+
+APOC_PROBE_QUERY = """
+SHOW PROCEDURES YIELD name WHERE name = 'apoc.path.expandConfig' RETURN count(*) AS found
+"""
+
+def terminator_filter(target_types: Iterable[str]) -> str:
+    """APOC label filter ending paths at the first node of any target type."""
+    return "|".join("/" + t for t in sorted(target_types))
+
+RISK_SUMMARY_TEMPLATE = """
+You are a supply-chain risk analyst. The news event '{event_id}' is connected
+to contract risks through the following causal chains (arrows show the
+direction of each stored relationship):
+
+{chains}
+
+Summarise which contracts, companies and obligations are affected and how
+the event propagates to them. Be concise.
+"""
+
+CYPHER_GENERATION_TEMPLATE = """
+Task: Generate a Cypher statement to query a graph database.
+Instructions:
+1. Find paths starting from a node where id = '{event_id}'.
+2. Limit the path depth to maximum 3 steps: -[*1..3]-
+3. Use undirected relationships (--) to find all connected entities.
+4. IMPORTANT: Do not filter by specific labels like 'Company' or 'Supplier' unless requested. 
+   Just return the whole path 'p' to see all connections.
+5. Do not include any markdown formatting.
+
+Schema:
+{schema}
+
+Question: {question}
+
+Cypher Query:"""
+
+RISK_QUESTION_TEMPLATE = "Analyze the impact of the event '{event_id}' on contracts and companies. List the chain of affected entities."
 
 class GraphRAGEngine:
-    def __init__(self):
+    def __init__(self, graph=None, llm=None, use_llm: bool = True, cache_size: int = 256,
+                 cache_ttl: float = 3600.0, cache_path=None, version_ttl: float = 5.0,
+                 use_apoc: Optional[bool] = None):
+        # Credentials come from .env, read on construction rather than at import time
+        load_dotenv()
         # 1. اتصال به Neo4j با استفاده از کلاس جدید
-        self.graph = Neo4jGraph(
+        # (an existing graph or an in-memory stand-in can be injected instead)
+        self.graph = graph or Neo4jGraph(
             url=os.getenv("NEO4J_URI"),
             username=os.getenv("NEO4J_USERNAME"),
             password=os.getenv("NEO4J_PASSWORD")
         )
-        
-        google_api_key = os.getenv("GOOGLE_API_KEY")
-        if not google_api_key:
-            raise ValueError("کلید GOOGLE_API_KEY در فایل .env یافت نشد!")
 
         # 2. راه‌اندازی مدل جمنای
-        self.llm = ChatGoogleGenerativeAI(
-            model="gemini-flash-latest",
-            temperature=0,
-            google_api_key=google_api_key
-        )
+        # use_llm=False allows LLM-free deterministic screening (find_risk_paths / screen_risk)
+        self.llm = llm
+        if self.llm is None and use_llm:
+            google_api_key = os.getenv("GOOGLE_API_KEY")
+            if not google_api_key:
+                raise ValueError("کلید GOOGLE_API_KEY در فایل .env یافت نشد!")
 
-        self.graph.refresh_schema()
+            self.llm = ChatGoogleGenerativeAI(
+                model="gemini-flash-latest",
+                temperature=0,
+                google_api_key=google_api_key
+            )
 
-    def analyze_risk(self, news_event_id: str):
-        # این پرامپت به مدل یاد می‌دهد که کوئری استاندارد و سبک بنویسد
-        # cypher_generation_template = """
-        # Task: Generate a Cypher statement to query a graph database.
-        # Instructions:
-        # 1. Find paths starting from a node where id = '{event_id}'.
-        # 2. Limit the path depth to maximum 3 steps: -[*1..3]-
-        # 3. Use undirected relationships (--) to find any connection.
-        # 4. If you need to filter by multiple labels, use this syntax:
-        #    WHERE labels(m) IN ['Risk', 'Penalty', 'Company', 'Product'] 
-        #    or just match the connections without complex filters.
-        # 5. Return the path 'p'.
-        
-        # Schema:
-        # {schema}
-        
-        # Question: {question}
-        
-        # Cypher Query:"""
-        cypher_generation_template = """
-        Task: Generate a Cypher statement to query a graph database.
-        Instructions:
-        1. Find paths starting from a node where id = '{event_id}'.
-        2. Limit the path depth to maximum 3 steps: -[*1..3]-
-        3. Use undirected relationships (--) to find all connected entities.
-        4. IMPORTANT: Do not filter by specific labels like 'Company' or 'Supplier' unless requested. 
-           Just return the whole path 'p' to see all connections.
-        5. Do not include any markdown formatting.
-        
-        Schema:
-        {schema}
-        
-        Question: {question}
-        
-        Cypher Query:"""
-
-        
-        cypher_prompt = PromptTemplate(
-            template=cypher_generation_template,
+        self.graph.refresh_schema()
+        self.summary_prompt = PromptTemplate(
+            template=RISK_SUMMARY_TEMPLATE,
+            input_variables=["event_id", "chains"]
+        )
+        self.cypher_prompt = PromptTemplate(
+            template=CYPHER_GENERATION_TEMPLATE,
             input_variables=["schema", "question", "event_id"]
         )
 
+        # Two-level cache, optionally persisted to one SQLite file:
+        # L1 (event id, schema hash) -> generated Cypher, skips Cypher generation;
+        # L2 (Cypher, data version) -> final answer, skips the query and the QA call
+        self.cypher_cache = LRUCache(cache_size, cache_ttl, cache_path, namespace="cypher")
+        self.answer_cache = LRUCache(cache_size, cache_ttl, cache_path, namespace="answer")
+        # The data version is re-read after version_ttl seconds, so answers cached
+        # on disk by engines in other processes stop matching after a re-ingest
+        self.version_ttl = version_ttl
+        self._data_version = None
+        self._data_version_read = 0.0
+        self._schema_hash = None
+        self._chain = None
+        # Whether find_risk_paths can use APOC; None probes the server on first use
+        self.use_apoc = use_apoc
+        # event id -> running analysis task, shared by concurrent analyze_risks calls
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    @property
+    def schema_hash(self) -> str:
+        if self._schema_hash is None:
+            schema = getattr(self.graph, "schema", "") or ""
+            self._schema_hash = hashlib.sha256(schema.encode("utf-8")).hexdigest()
+        return self._schema_hash
+
+    @property
+    def chain(self):
+        """
+        The QA chain, built on first use and then reused for every analysis
+        until the schema changes (it captures the schema string when built).
+        """
+        if self._chain is None:
+            if self.llm is None:
+                raise ValueError("analyze_risk requires an LLM (use_llm=True or llm=...).")
+            self._chain = self._build_chain()
+        return self._chain
+
+    def _build_chain(self):
         # ساخت زنجیره با تنظیمات اصلاحی
-        chain = GraphCypherQAChain.from_llm(
+        return GraphCypherQAChain.from_llm(
             self.llm,
             graph=self.graph,
             verbose=True,
-            cypher_prompt=cypher_prompt,
+            cypher_prompt=self.cypher_prompt,
             validate_cypher=True, # این گزینه خطاهای سینتکسی را اصلاح می‌کند
-            allow_dangerous_requests=True
+            allow_dangerous_requests=True,
+            return_intermediate_steps=True,
+            exclude_types=[DATA_VERSION_LABEL]
         )
 
-        query = f"Analyze the impact of the event '{news_event_id}' on contracts and companies. List the chain of affected entities."
+    def data_version(self) -> str:
+        """
+        Version token of the stored data (see Neo4jManager). Kept up to date by
+        on_data_changed for ingestions in this process, and re-read once it is
+        older than version_ttl seconds to catch ingestions by other processes.
+        """
+        now = time.monotonic()
+        if self._data_version is None or now - self._data_version_read >= self.version_ttl:
+            rows = self.graph.query(DATA_VERSION_QUERY)
+            self._data_version = (rows[0]["version"] if rows else None) or "unversioned"
+            self._data_version_read = now
+        return self._data_version
 
-        try:
-            # ارسال متغیرها به پرامپت
-            result = chain.invoke({
-                "query": query, 
-                "event_id": news_event_id
+    def on_data_changed(self, data_version=None):
+        """
+        Ingestion listener (Neo4jManager.add_listener): refreshes the schema,
+        rebuilds the chain and drops cached answers of older data versions.
+        Cached Cypher stays valid as long as the schema hash is unchanged.
+        """
+        self._data_version = data_version
+        self._data_version_read = time.monotonic()
+        self.graph.refresh_schema()
+        self._schema_hash = None
+        self._chain = None
+        self.answer_cache.clear()
+
+    def _has_apoc(self) -> bool:
+        if self.use_apoc is None:
+            try:
+                rows = self.graph.query(APOC_PROBE_QUERY)
+                self.use_apoc = bool(rows and rows[0].get("found"))
+            except Exception:
+                # SHOW PROCEDURES unsupported or not permitted: use plain Cypher
+                self.use_apoc = False
+        return self.use_apoc
+
+    def _traverse(self, news_event_id: str, target_types, limit: int):
+        if self._has_apoc():
+            return self.graph.query(RISK_TRAVERSAL_QUERY, {
+                "event_id": news_event_id,
+                "max_hops": MAX_PATH_LENGTH,
+                "label_filter": terminator_filter(target_types),
+                "limit": limit
             })
-            return result['result']
+        return self.graph.query(RISK_TRAVERSAL_FALLBACK_QUERY, {
+            "event_id": news_event_id,
+            "target_types": sorted(target_types),
+            "limit": limit
+        })
+
+    def find_risk_paths(self, news_event_id: str, limit: int = 100):
+        """
+        Deterministic screening: runs the prepared RISK_TRAVERSAL_QUERY (no LLM
+        round trip; RISK_TRAVERSAL_FALLBACK_QUERY on servers without APOC) and
+        returns structured paths shaped like ReasoningEngine results, plus
+        the traversed relationships:
+        {"target", "path", "length", "relations": [{"type", "source", "target"}]}
+        Like ReasoningEngine, falls back to Company targets (the contract
+        owner) when the event reaches no risk target.
+        """
+        rows = self._traverse(news_event_id, RISK_TARGET_TYPES, limit)
+        if not rows:
+            rows = self._traverse(news_event_id, {"Company"}, limit)
+        return [
+            {
+                "target": row["path"][-1],
+                "path": row["path"],
+                "length": len(row["path"]),
+                "relations": row["relations"]
+            }
+            for row in rows
+        ]
+
+    def format_path(self, result) -> str:
+        """
+        Renders a find_risk_paths result like ReasoningEngine.get_formatted_chain.
+        """
+        path = result["path"]
+        chain_str = f"{path[0]}"
+        for (u, v), rel in zip(zip(path, path[1:]), result["relations"]):
+            if rel["source"] == u and rel["target"] == v:
+                relation = f"--({rel['type']})-->"
+            else:
+                # Arrow points back, meaning we traversed upstream
+                relation = f"<--({rel['type']})--"
+            chain_str += f" {relation} {v}"
+        return chain_str
+
+    def screen_risk(self, news_event_id: str, summarize: bool = False, limit: int = 100):
+        """
+        High-volume screening without LLM query generation. Returns
+        {"event", "paths", "summary"}; the LLM is only called (once) when
+        summarize=True and at least one path was found.
+        """
+        paths = self.find_risk_paths(news_event_id, limit=limit)
+        summary = None
+        if summarize and paths:
+            if self.llm is None:
+                raise ValueError("summarize=True requires an LLM (use_llm=True or llm=...).")
+            chains = "\n".join(f"- {self.format_path(p)}" for p in paths)
+            message = self.llm.invoke(self.summary_prompt.format(event_id=news_event_id, chains=chains))
+            summary = getattr(message, "content", message)
+        return {"event": news_event_id, "paths": paths, "summary": summary}
+
+    def analyze_risk(self, news_event_id: str):
+        chain = self.chain
+        query = RISK_QUESTION_TEMPLATE.format(event_id=news_event_id)
+
+        try:
+            cypher_key = (news_event_id, self.schema_hash)
+            cypher = self.cypher_cache.get(cypher_key)
+            if cypher is None:
+                # ارسال متغیرها به پرامپت
+                result = chain.invoke({
+                    "query": query,
+                    "event_id": news_event_id
+                })
+                cypher = result["intermediate_steps"][0]["query"]
+                self.cypher_cache.set(cypher_key, cypher)
+                self.answer_cache.set((cypher, self.data_version()), result["result"])
+                return result["result"]
+
+            answer_key = (cypher, self.data_version())
+            answer = self.answer_cache.get(answer_key)
+            if answer is None:
+                # Cypher is known: run it and only ask the LLM to answer
+                context = self.graph.query(cypher)[:chain.top_k] if cypher else []
+                answer = chain.qa_chain.invoke({"question": query, "context": context})
+                self.answer_cache.set(answer_key, answer)
+            return answer
         except Exception as e:
-            return f"Error in GraphRAG analysis: {str(e)}"
\ No newline at end of file
+            return f"Error in GraphRAG analysis: {str(e)}"
+
+    async def analyze_risks(self, events: Iterable[str], max_concurrency: int = 4,
+                            rate: Optional[float] = None, burst: Optional[float] = None,
+                            timeout: Optional[float] = 120.0) -> AsyncIterator[Tuple[str, str]]:
+        """
+        Analyses many events concurrently and yields (event id, answer) pairs
+        as they complete, so LLM and Neo4j latency of different events overlap.
+
+        - max_concurrency bounds the analyses running at once (each runs
+          analyze_risk on a worker thread).
+        - rate / burst apply a token-bucket limit in requests per second.
+        - timeout (seconds) bounds each analysis; a timed-out event yields an
+          error string like analyze_risk does (its worker thread is not
+          interrupted and holds its max_concurrency slot until it finishes;
+          its result still lands in the cache).
+        - Duplicate events, within this call or already in flight from
+          another call, share one analysis and are yielded once.
+        """
+        # Build the chain before fanning out, so workers never race to build it
+        self.chain
+        semaphore = asyncio.Semaphore(max_concurrency)
+        limiter = TokenBucket(rate, burst) if rate else None
+
+        tasks: Dict[str, asyncio.Task] = {}
+        for event in events:
+            if event in tasks:
+                continue
+            task = self._inflight.get(event)
+            if task is None or task.done():
+                task = asyncio.ensure_future(self._analyze_async(event, semaphore, limiter, timeout))
+                self._inflight[event] = task
+                task.add_done_callback(lambda t, event=event: self._inflight.get(event) is t and self._inflight.pop(event))
+            tasks[event] = task
+
+        async def paired(event, task):
+            # shield: a consumer that stops early must not cancel a shared analysis
+            return event, await asyncio.shield(task)
+
+        for next_result in asyncio.as_completed([paired(event, task) for event, task in tasks.items()]):
+            yield await next_result
+
+    async def _analyze_async(self, news_event_id: str, semaphore: asyncio.Semaphore,
+                             limiter: Optional[TokenBucket], timeout: Optional[float]) -> str:
+        await semaphore.acquire()
+        try:
+            if limiter is not None:
+                await limiter.acquire()
+            worker = asyncio.ensure_future(asyncio.to_thread(self.analyze_risk, news_event_id))
+        except BaseException:
+            semaphore.release()
+            raise
+        # A timed-out worker thread keeps running, so it keeps its slot until it
+        # finishes; otherwise timeouts would let unbounded threads pile up
+        worker.add_done_callback(lambda _: semaphore.release())
+        try:
+            return await asyncio.wait_for(asyncio.shield(worker), timeout)
+        except asyncio.TimeoutError:
+            return f"Error in GraphRAG analysis: timed out after {timeout}s"
@@ -1,40 +1,542 @@
+import hashlib
+import json
 import os
+import random
+import threading
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Tuple
 from neo4j import GraphDatabase
+from neo4j.exceptions import TransientError
 from dotenv import load_dotenv
 
-# Load environment variables
-load_dotenv()
+# Singleton node holding a token that changes on every ingest / clear, so
+# readers (e.g. the GraphRAG answer cache) can tell when the data changed
+DATA_VERSION_LABEL = "SGSAMeta"
+DATA_VERSION_QUERY = f"MATCH (m:{DATA_VERSION_LABEL} {{key: 'data'}}) RETURN m.version AS version"
+# Per-contract sync manifests live on the same label, keyed 'contract:<id>'
+CONTRACT_KEY_PREFIX = "contract:"
+
+def _quote(name: str) -> str:
+    """Backtick-quotes a label / relationship type for interpolation into Cypher."""
+    return "`" + str(name).replace("`", "``") + "`"
+
+def _batches(rows, size):
+    for i in range(0, len(rows), size):
+        yield rows[i:i + size]
+
+def _run_write(tx, query, **params):
+    tx.run(query, **params).consume()
+
+def contract_manifest(contract_data) -> Dict:
+    """
+    What a contract contributes to the database, in a canonical JSON form:
+    {"nodes": {id: [category, [types]]}, "edges": [[rel type, source, target, category]]}.
+    Within a contract, the news graph's category wins, as in ingestion.
+    """
+    nodes: Dict = {}
+    edges: Dict = {}
+    for nx_graph, graph_category in ((contract_data.base_graph, "Base"), (contract_data.news_graph, "News")):
+        for node_id, attrs in nx_graph.nodes(data=True):
+            types = nodes[node_id][1] if node_id in nodes else set()
+            types.add(attrs.get("type", "Entity"))
+            nodes[node_id] = (graph_category, types)
+        for u, v, attrs in nx_graph.edges(data=True):
+            edges[(attrs.get("type", "RELATED_TO"), u, v)] = graph_category
+    return {
+        "nodes": {node_id: [category, sorted(types)] for node_id, (category, types) in sorted(nodes.items())},
+        "edges": sorted([rel_type, u, v, category] for (rel_type, u, v), category in edges.items()),
+    }
+
+def manifest_fingerprint(manifest: Dict) -> str:
+    """Content hash of a contract manifest; equal hashes mean nothing to sync."""
+    return hashlib.sha256(json.dumps(manifest, sort_keys=True).encode("utf-8")).hexdigest()
+
+@dataclass
+class IngestStats:
+    """
+    Throughput / latency counters for bulk ingestion. Updated from worker
+    threads, so mutations go through the lock.
+    """
+    contracts: int = 0
+    batches: int = 0
+    rows: int = 0
+    retries: int = 0
+    failures: int = 0
+    elapsed: float = 0.0
+    latencies: List[float] = field(default_factory=list)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def record_batch(self, rows: int, latency: float, attempts: int):
+        with self._lock:
+            self.batches += 1
+            self.rows += rows
+            self.retries += max(attempts - 1, 0)
+            self.latencies.append(latency)
+
+    def record_failure(self, attempts: int):
+        with self._lock:
+            self.failures += 1
+            self.retries += max(attempts - 1, 0)
+
+    def merge(self, other: "IngestStats"):
+        with self._lock:
+            self.contracts += other.contracts
+            self.batches += other.batches
+            self.rows += other.rows
+            self.retries += other.retries
+            self.failures += other.failures
+            self.elapsed += other.elapsed
+            self.latencies.extend(other.latencies)
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+    def latency_percentile(self, pct: float) -> float:
+        """Batch latency (seconds) at the given percentile, 0-100."""
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+    def summary(self) -> str:
+        return (
+            f"{self.contracts} contracts, {self.rows} rows in {self.batches} batches, "
+            f"{self.elapsed:.2f}s ({self.rows_per_second:.0f} rows/s), "
+            f"batch p50 {self.latency_percentile(50) * 1000:.1f}ms / p95 {self.latency_percentile(95) * 1000:.1f}ms, "
+            f"{self.retries} retries, {self.failures} failures"
+        )
+
+@dataclass
+class SyncStats(IngestStats):
+    """IngestStats of a delta sync, plus what the diff found."""
+    unchanged: int = 0
+    pruned: int = 0
+    nodes_added: int = 0
+    nodes_removed: int = 0
+    edges_added: int = 0
+    edges_removed: int = 0
+
+    def summary(self) -> str:
+        return (
+            f"{self.contracts} changed, {self.unchanged} unchanged, {self.pruned} pruned contracts; "
+            f"+{self.nodes_added}/-{self.nodes_removed} nodes, +{self.edges_added}/-{self.edges_removed} edges | "
+            + super().summary()
+        )
 
 class Neo4jManager:
-    def __init__(self):
+    def __init__(self, driver=None, batch_size: int = 1000, max_connection_pool_size: int = 50,
+                 connection_acquisition_timeout: float = 60.0, max_retries: int = 5,
+                 retry_backoff: float = 0.05):
+        # Load environment variables (here rather than at import time)
+        load_dotenv()
         self.uri = os.getenv("NEO4J_URI")
         self.user = os.getenv("NEO4J_USERNAME")
         self.password = os.getenv("NEO4J_PASSWORD")
-        self.driver = GraphDatabase.driver(self.uri, auth=(self.user, self.password))
+        # An existing driver (or a local stand-in) can be injected for tests and benchmarks.
+        # The pool must be at least as large as the number of ingestion workers.
+        self.driver = driver or GraphDatabase.driver(
+            self.uri, auth=(self.user, self.password),
+            max_connection_pool_size=max_connection_pool_size,
+            connection_acquisition_timeout=connection_acquisition_timeout
+        )
+        # Rows per UNWIND batch in bulk ingestion
+        self.batch_size = batch_size
+        # Outer retries for transient errors that escape the driver's own retry loop
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        # Cumulative counters across all bulk ingestions
+        self.stats = IngestStats()
+        self._schema_ready = False
+        # Token written to the database on every change, plus callbacks notified with it
+        self.data_version = None
+        self._listeners: List[Callable[[str], None]] = []
 
     def close(self):
         self.driver.close()
 
     def clear_database(self):
-        """Wipes the database clean before loading new data."""
+        """
+        Wipes the database clean before loading new data. Deletes commit every
+        batch_size nodes, so a large database never builds one huge transaction.
+        """
         with self.driver.session() as session:
-            session.run("MATCH (n) DETACH DELETE n")
+            session.run(
+                f"MATCH (n) CALL {{ WITH n DETACH DELETE n }} IN TRANSACTIONS OF {int(self.batch_size)} ROWS"
+            ).consume()
             print("[Neo4j] Database cleared.")
+        self._bump_data_version()
 
-    def ingest_contract_data(self, contract_data):
+    def add_listener(self, callback: Callable[[str], None]):
+        """
+        Registers callback(data_version), called after every ingestion or
+        clear, e.g. GraphRAGEngine.on_data_changed to invalidate its caches.
+        """
+        self._listeners.append(callback)
+
+    def _bump_data_version(self):
+        """
+        Stores a fresh random version token in the database (random rather than
+        a counter, so a cleared and re-filled database never reuses an old
+        version) and notifies the listeners.
+        """
+        version = uuid.uuid4().hex
+        with self.driver.session() as session:
+            session.run(
+                f"MERGE (m:{DATA_VERSION_LABEL} {{key: 'data'}}) SET m.version = $version",
+                version=version
+            ).consume()
+        self.data_version = version
+        for callback in self._listeners:
+            callback(version)
+
+    def ensure_schema(self):
+        """
+        Creates the Entity(id) uniqueness constraint (and its backing index)
+        so MERGE/MATCH on Entity ids are index seeks instead of label scans.
+        """
+        with self.driver.session() as session:
+            session.run(
+                "CREATE CONSTRAINT entity_id IF NOT EXISTS "
+                "FOR (n:Entity) REQUIRE n.id IS UNIQUE"
+            ).consume()
+        self._schema_ready = True
+
+    def ingest_contract_data(self, contract_data, bulk: bool = True):
         """
         Takes a single ContractData object (from your existing DataLoader)
         and inserts nodes/relationships into Neo4j using Cypher.
+        By default rows are sent in UNWIND batches (see ingest_contracts);
+        bulk=False issues one query per node and per edge.
         """
+        if bulk:
+            self.ingest_contracts([contract_data])
+            return
+
         with self.driver.session() as session:
             # 1. Insert Base Graph
             self._insert_graph(session, contract_data.base_graph, "Base")
-            
+
             # 2. Insert News Graph
             self._insert_graph(session, contract_data.news_graph, "News")
-            
+
             print(f"[Neo4j] Ingested contract: {contract_data.contract_id}")
 
+    def ingest_contracts(self, contracts, max_workers: int = 1) -> "IngestStats":
+        """
+        Bulk-ingests many contracts at once. Rows from all contracts are grouped
+        by node type and relationship type (labels and types cannot be query
+        parameters), then MERGEd with one parameterised UNWIND query per group
+        and batch, each batch in its own write transaction.
+        The final state equals ingesting the contracts one by one: labels
+        accumulate, and the last write of `category` wins.
+
+        With max_workers > 1 the batches run on a bounded thread pool sharing
+        the driver's connection pool: all node batches first, then all edge
+        batches. Rows are sorted so concurrent transactions lock shared
+        entities (e.g. Taiwan) in the same order, and transient errors such
+        as deadlocks are retried with backoff. Returns this call's IngestStats.
+        No sync manifests are written, so sync_contracts(prune=True) cannot
+        remove these contracts until they have been synced once.
+        """
+        if not self._schema_ready:
+            self.ensure_schema()
+
+        contracts = list(contracts)
+        node_tasks, edge_tasks = self._plan_batches(
+            (c.contract_id, contract_manifest(c)) for c in contracts
+        )
+
+        stats = IngestStats()
+        t0 = time.perf_counter()
+        try:
+            self._run_phases([node_tasks, edge_tasks], stats, max_workers)
+            stats.contracts = len(contracts)
+        finally:
+            stats.elapsed = time.perf_counter() - t0
+            self.stats.merge(stats)
+        self._bump_data_version()
+
+        for contract_data in contracts:
+            print(f"[Neo4j] Ingested contract: {contract_data.contract_id}")
+        return stats
+
+    def _run_phases(self, phases, stats: "IngestStats", max_workers: int = 1):
+        """
+        Runs lists of batch tasks phase by phase (each phase completes before the
+        next starts), on a bounded thread pool when max_workers > 1.
+        """
+        if max_workers > 1:
+            with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="neo4j-ingest") as pool:
+                for tasks in phases:
+                    # list() waits for the whole phase and re-raises any failure
+                    list(pool.map(lambda task: self._write_batch(None, task, stats), tasks))
+        else:
+            with self.driver.session() as session:
+                for tasks in phases:
+                    for task in tasks:
+                        self._write_batch(session, task, stats)
+
+    def _plan_batches(self, manifests: Iterable[Tuple[str, Dict]]):
+        """
+        Groups and deduplicates the rows of (contract id, manifest) pairs,
+        returning (node_tasks, edge_tasks) as lists of (query, rows) batches.
+        Each row carries the ids of the contracts it came from (provenance).
+        """
+        node_rows = defaultdict(dict)    # node type -> {id: contract ids} (ordered)
+        edge_rows = defaultdict(dict)    # rel type -> {(source, target): contract ids}
+        categories = {}                  # node id / (rel type, source, target) -> category
+        for contract_id, manifest in manifests:
+            for node_id, (category, types) in manifest["nodes"].items():
+                for node_type in types:
+                    node_rows[node_type].setdefault(node_id, {})[contract_id] = None
+                categories[node_id] = category
+            for rel_type, u, v, category in manifest["edges"]:
+                edge_rows[rel_type].setdefault((u, v), {})[contract_id] = None
+                categories[(rel_type, u, v)] = category
+
+        node_tasks = []
+        for node_type, ids in node_rows.items():
+            query = f"""
+            UNWIND $rows AS row
+            MERGE (n:Entity {{id: row.id}})
+            SET n:{_quote(node_type)}, n.category = row.category,
+                n.contracts = coalesce(n.contracts, []) + [c IN row.contracts WHERE NOT c IN coalesce(n.contracts, [])]
+            """
+            rows = [
+                {"id": node_id, "category": categories[node_id], "contracts": list(ids[node_id])}
+                for node_id in sorted(ids, key=str)
+            ]
+            node_tasks.extend((query, batch) for batch in _batches(rows, self.batch_size))
+
+        # Edges run after all nodes, so every endpoint exists
+        edge_tasks = []
+        for rel_type, pairs in edge_rows.items():
+            query = f"""
+            UNWIND $rows AS row
+            MATCH (a:Entity {{id: row.source}})
+            MATCH (b:Entity {{id: row.target}})
+            MERGE (a)-[r:{_quote(rel_type)}]->(b)
+            SET r.category = row.category,
+                r.contracts = coalesce(r.contracts, []) + [c IN row.contracts WHERE NOT c IN coalesce(r.contracts, [])]
+            """
+            rows = [
+                {"source": u, "target": v, "category": categories[(rel_type, u, v)], "contracts": list(pairs[(u, v)])}
+                for u, v in sorted(pairs, key=lambda pair: (str(pair[0]), str(pair[1])))
+            ]
+            edge_tasks.extend((query, batch) for batch in _batches(rows, self.batch_size))
+
+        return node_tasks, edge_tasks
+
+    def _plan_removals(self, removals: Iterable[Tuple[str, Dict]]):
+        """
+        (edge_tasks, node_tasks) taking each contract out of the provenance of
+        the nodes / edges in its removal manifest, deleting whatever no
+        contract references any more. The queries use CALL ... IN TRANSACTIONS,
+        so they run as auto-commit queries that commit every batch_size rows.
+        """
+        node_rows = []
+        edge_rows = defaultdict(list)
+        for contract_id, manifest in removals:
+            node_rows.extend({"id": node_id, "contract": contract_id} for node_id in manifest["nodes"])
+            for rel_type, u, v, _ in manifest["edges"]:
+                edge_rows[rel_type].append({"source": u, "target": v, "contract": contract_id})
+
+        chunk = int(self.batch_size)
+        edge_tasks = []
+        for rel_type, rows in edge_rows.items():
+            query = f"""
+            UNWIND $rows AS row
+            CALL {{
+                WITH row
+                MATCH (:Entity {{id: row.source}})-[r:{_quote(rel_type)}]->(:Entity {{id: row.target}})
+                SET r.contracts = [c IN coalesce(r.contracts, []) WHERE c <> row.contract]
+                WITH r WHERE size(r.contracts) = 0
+                DELETE r
+            }} IN TRANSACTIONS OF {chunk} ROWS
+            """
+            edge_tasks.extend((query, batch, True) for batch in _batches(rows, self.batch_size))
+
+        query = f"""
+        UNWIND $rows AS row
+        CALL {{
+            WITH row
+            MATCH (n:Entity {{id: row.id}})
+            SET n.contracts = [c IN coalesce(n.contracts, []) WHERE c <> row.contract]
+            WITH n WHERE size(n.contracts) = 0
+            DETACH DELETE n
+        }} IN TRANSACTIONS OF {chunk} ROWS
+        """
+        node_tasks = [(query, batch, True) for batch in _batches(node_rows, self.batch_size)]
+        return edge_tasks, node_tasks
+
+    def _stored_fingerprints(self) -> Dict[str, str]:
+        with self.driver.session() as session:
+            records = session.run(
+                f"MATCH (m:{DATA_VERSION_LABEL}) WHERE m.contract_id IS NOT NULL "
+                "RETURN m.contract_id AS contract_id, m.fingerprint AS fingerprint"
+            ).data()
+        return {r["contract_id"]: r["fingerprint"] for r in records}
+
+    def _stored_manifests(self, contract_ids: List[str]) -> Dict[str, Dict]:
+        if not contract_ids:
+            return {}
+        with self.driver.session() as session:
+            records = session.run(
+                f"UNWIND $keys AS key MATCH (m:{DATA_VERSION_LABEL} {{key: key}}) "
+                "RETURN m.contract_id AS contract_id, m.manifest AS manifest",
+                keys=[CONTRACT_KEY_PREFIX + cid for cid in contract_ids]
+            ).data()
+        return {r["contract_id"]: json.loads(r["manifest"]) for r in records}
+
+    def sync_contracts(self, contracts, prune: bool = False, max_workers: int = 1) -> SyncStats:
+        """
+        Brings the database in line with `contracts` by pushing only what changed.
+
+        Every synced contract leaves a manifest node (its nodes, edges and a
+        content fingerprint). Contracts whose fingerprint matches the stored
+        one are skipped; for the others the stored manifest is diffed against
+        the current one and only added / changed nodes and edges are MERGEd
+        and only dropped ones removed. Nodes and relationships record the
+        contracts that reference them (`contracts` property), so an entity
+        shared with another contract survives until nobody references it.
+        Removals run in bounded CALL ... IN TRANSACTIONS batches.
+        With prune=True, stored contracts missing from `contracts` are removed.
+
+        A one-contract update costs work proportional to that contract's
+        change. Databases filled by ingest_contracts (no manifests yet) are
+        fully re-sent once. As there, labels accumulate rather than being
+        removed when an entity's type changes. Returns this call's SyncStats.
+
+        Pruning needs a stored manifest: ingest_contracts and
+        ingest_contract_data do not write one (they only add), so a contract
+        that was ingested but never synced is invisible to prune=True and
+        stays until clear_database. Sync it once first to make it prunable.
+        """
+        if not self._schema_ready:
+            self.ensure_schema()
+
+        stats = SyncStats()
+        t0 = time.perf_counter()
+        try:
+            current = {}
+            for contract_data in contracts:
+                manifest = contract_manifest(contract_data)
+                current[contract_data.contract_id] = (manifest, manifest_fingerprint(manifest))
+
+            stored = self._stored_fingerprints()
+            changed = [cid for cid, (_, fingerprint) in current.items() if stored.get(cid) != fingerprint]
+            pruned = [cid for cid in stored if cid not in current] if prune else []
+            stats.unchanged = len(current) - len(changed)
+            if not changed and not pruned:
+                return stats
+
+            previous = self._stored_manifests([cid for cid in changed if cid in stored] + pruned)
+            empty = {"nodes": {}, "edges": []}
+            additions, removals = [], []
+            for cid in changed:
+                new = current[cid][0]
+                old = previous.get(cid, empty)
+                old_edges = {tuple(edge[:3]): edge[3] for edge in old["edges"]}
+                new_edges = {tuple(edge[:3]) for edge in new["edges"]}
+                added = {
+                    "nodes": {n: entry for n, entry in new["nodes"].items() if old["nodes"].get(n) != entry},
+                    "edges": [edge for edge in new["edges"] if old_edges.get(tuple(edge[:3])) != edge[3]],
+                }
+                removed = {
+                    "nodes": [n for n in old["nodes"] if n not in new["nodes"]],
+                    "edges": [edge for edge in old["edges"] if tuple(edge[:3]) not in new_edges],
+                }
+                additions.append((cid, added))
+                removals.append((cid, removed))
+            for cid in pruned:
+                removals.append((cid, previous.get(cid, empty)))
+
+            stats.nodes_added = sum(len(m["nodes"]) for _, m in additions)
+            stats.edges_added = sum(len(m["edges"]) for _, m in additions)
+            stats.nodes_removed = sum(len(m["nodes"]) for _, m in removals)
+            stats.edges_removed = sum(len(m["edges"]) for _, m in removals)
+
+            node_tasks, edge_tasks = self._plan_batches(additions)
+            edge_removals, node_removals = self._plan_removals(removals)
+            # Manifests are written last, so an interrupted sync is simply redone
+            manifest_tasks = [(f"""
+            UNWIND $rows AS row
+            MERGE (m:{DATA_VERSION_LABEL} {{key: row.key}})
+            SET m.contract_id = row.contract_id, m.fingerprint = row.fingerprint, m.manifest = row.manifest
+            """, batch) for batch in _batches([
+                {"key": CONTRACT_KEY_PREFIX + cid, "contract_id": cid,
+                 "fingerprint": current[cid][1], "manifest": json.dumps(current[cid][0], sort_keys=True)}
+                for cid in changed
+            ], self.batch_size)]
+            if pruned:
+                manifest_tasks.append((
+                    f"UNWIND $rows AS row MATCH (m:{DATA_VERSION_LABEL} {{key: row.key}}) DELETE m",
+                    [{"key": CONTRACT_KEY_PREFIX + cid} for cid in pruned]
+                ))
+
+            self._run_phases([node_tasks, edge_tasks, edge_removals, node_removals, manifest_tasks],
+                             stats, max_workers)
+            stats.contracts = len(changed)
+            stats.pruned = len(pruned)
+        finally:
+            stats.elapsed = time.perf_counter() - t0
+            self.stats.merge(stats)
+        self._bump_data_version()
+
+        for cid in changed:
+            print(f"[Neo4j] Synced contract: {cid}")
+        for cid in pruned:
+            print(f"[Neo4j] Removed contract: {cid}")
+        return stats
+
+    def _write_batch(self, session, task, stats: "IngestStats"):
+        """
+        Runs one (query, rows) batch in a write transaction, retrying transient
+        failures (deadlocks, lock timeouts) with exponential backoff and jitter.
+        A (query, rows, True) task runs as an auto-commit query instead, as
+        CALL ... IN TRANSACTIONS requires.
+        Pass session=None to borrow a fresh session from the shared pool.
+        """
+        query, rows = task[:2]
+        auto_commit = len(task) > 2 and task[2]
+        attempts = 0
+
+        def work(tx):
+            # execute_write may itself replay the function on transient errors
+            nonlocal attempts
+            attempts += 1
+            _run_write(tx, query, rows=rows)
+
+        def run(target):
+            nonlocal attempts
+            if auto_commit:
+                attempts += 1
+                target.run(query, rows=rows).consume()
+            else:
+                target.execute_write(work)
+
+        t0 = time.perf_counter()
+        for retry in range(self.max_retries + 1):
+            try:
+                if session is None:
+                    with self.driver.session() as own_session:
+                        run(own_session)
+                else:
+                    run(session)
+                break
+            except TransientError:
+                if retry == self.max_retries:
+                    stats.record_failure(attempts)
+                    raise
+                time.sleep(self.retry_backoff * (2 ** retry) * (0.5 + random.random()))
+
+        stats.record_batch(len(rows), time.perf_counter() - t0, attempts)
+
     def _insert_graph(self, session, nx_graph, graph_category):
         """
         Helper to iterate NetworkX nodes/edges and run Cypher MERGE.
@@ -53,7 +555,7 @@ class Neo4jManager:
         # Insert Edges
         for u, v, attrs in nx_graph.edges(data=True):
             rel_type = attrs.get("type", "RELATED_TO")
-            # Cypher requires relationship types to be static strings usually, 
+            # Cypher requires relationship types to be static strings usually,
             # but we can handle dynamic types with APOC or specific query formatting.
             # For safety here, we construct the query string (ensure rel_type is safe/sanitized).
             query = f"""
@@ -61,4 +563,4 @@ class Neo4jManager:
             MERGE (a)-[r:`{rel_type}`]->(b)
             SET r.category = $category
             """
-            session.run(query, source=u, target=v, category=graph_category)
\ No newline at end of file
+            session.run(query, source=u, target=v, category=graph_category)
@@ -0,0 +1,287 @@
+import heapq
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+INF = float("inf")
+
+
+@dataclass
+class TraversalStats:
+    """
+    Opt-in counters for one or more causal-chain searches.
+
+    expanded: partial paths whose neighbours were generated.
+    generated: partial-path records created (starts included).
+    peak_frontier: largest number of records waiting in the queue.
+    depth_pruned: paths dropped by the MAX_PATH_LENGTH cap.
+    paths: chains found.
+    timings: seconds per phase (compose, target_scan, search, sort).
+    """
+    searches: int = 0
+    expanded: int = 0
+    generated: int = 0
+    peak_frontier: int = 0
+    depth_pruned: int = 0
+    paths: int = 0
+    timings: Dict[str, float] = field(default_factory=dict)
+    _lap: Optional[float] = field(default=None, repr=False, compare=False)
+
+    def start(self):
+        self._lap = time.perf_counter()
+
+    def lap(self, phase: str):
+        """Adds the time since start() or the previous lap to `phase`."""
+        now = time.perf_counter()
+        self.timings[phase] = self.timings.get(phase, 0.0) + now - self._lap
+        self._lap = now
+
+    def merge(self, other: "TraversalStats"):
+        self.searches += other.searches
+        self.expanded += other.expanded
+        self.generated += other.generated
+        self.peak_frontier = max(self.peak_frontier, other.peak_frontier)
+        self.depth_pruned += other.depth_pruned
+        self.paths += other.paths
+        for phase, seconds in other.timings.items():
+            self.timings[phase] = self.timings.get(phase, 0.0) + seconds
+
+    def summary(self) -> str:
+        phases = ", ".join(f"{phase} {seconds * 1000:.2f}ms" for phase, seconds in self.timings.items())
+        return (
+            f"{self.paths} paths, {self.expanded} expanded, {self.generated} generated, "
+            f"peak frontier {self.peak_frontier}, {self.depth_pruned} depth-pruned"
+            + (f" | {phases}" if phases else "")
+        )
+
+
+def _on_path(nodes: List[int], parents: List[int], rec: int) -> set:
+    """Node indices of the path ending at record `rec` (walks its parent pointers)."""
+    on_path = set()
+    while rec != -1:
+        on_path.add(nodes[rec])
+        rec = parents[rec]
+    return on_path
+
+
+class PathEnumerator:
+    """
+    Breadth-first enumeration of simple paths over an integer-indexed graph.
+
+    Every partial path is stored as a single parent-pointer record
+    (node, parent record) in flat lists. The lists double as the FIFO
+    frontier: records are appended at the tail and consumed by advancing a
+    head index, so extending a path is O(1) in time and memory instead of
+    copying the whole prefix. For the cycle check, expanding a record walks
+    its parent pointers once (at most max_length + 1 nodes) into a small
+    set, so the cost per record is bounded by the path length, not by the
+    size of the graph.
+    """
+
+    def __init__(self, neighbors: Callable[[int], Sequence[int]], max_length: int = 10):
+        # neighbors(i) -> node indices reachable from i (duplicates allowed)
+        self.neighbors = neighbors
+        self.max_length = max_length
+        self.nodes: List[int] = []
+        self.parents: List[int] = []
+        # Records dequeued so far (kept up to date at every yield)
+        self.head = 0
+
+    def search(self, start: int, is_target: Sequence[int], stats: Optional[TraversalStats] = None) -> Iterator[int]:
+        """
+        Yields the record id of every simple path from `start` that ends on
+        its first target node, in breadth-first (nondecreasing length) order.
+        Paths are not expanded past a target or beyond `max_length` nodes.
+        """
+        for _, rec in self.search_many([start], is_target, stats):
+            yield rec
+
+    def search_many(self, starts: Sequence[int], is_target: Sequence[int],
+                    stats: Optional[TraversalStats] = None) -> Iterator[Tuple[int, int]]:
+        """
+        Multi-source variant of search() sharing a single frontier.
+        Yields (origin slot, record id) pairs, where the slot indexes `starts`.
+        All origins advance level by level together, so the records of any one
+        origin come out in exactly the order a single-source search would give.
+
+        With `stats`, the counters are derived from the records once the search
+        ends (or is abandoned), so the hot loop itself is not instrumented.
+        """
+        nodes = self.nodes = list(starts)
+        parents = self.parents = [-1] * len(starts)
+        origins = list(range(len(starts)))
+        lengths = [1] * len(starts)
+        neighbors = self.neighbors
+        max_length = self.max_length
+
+        head = self.head = 0
+        try:
+            while head < len(nodes):
+                rec = head
+                head += 1
+                node = nodes[rec]
+                origin = origins[rec]
+
+                if is_target[node] and node != starts[origin]:
+                    # The search can only be abandoned here, so this is where _collect looks
+                    self.head = head
+                    yield origin, rec
+                    continue
+
+                length = lengths[rec]
+                if length > max_length:
+                    continue
+
+                on_path = _on_path(nodes, parents, rec)
+                for nb in neighbors(node):
+                    if nb not in on_path:
+                        nodes.append(nb)
+                        parents.append(rec)
+                        origins.append(origin)
+                        lengths.append(length + 1)
+            self.head = head
+        finally:
+            if stats is not None:
+                self._collect(stats, starts, is_target, origins, lengths)
+
+    def _collect(self, stats: TraversalStats, starts, is_target, origins, lengths):
+        """
+        Replays the finished search from its records. Records are appended in
+        FIFO order, so when record r was dequeued the queue held every record
+        whose parent precedes r, minus the r records already dequeued.
+        """
+        nodes, parents = self.nodes, self.parents
+        n_starts = len(starts)
+        appended = n_starts
+        for rec in range(self.head):
+            while appended < len(nodes) and parents[appended] < rec:
+                appended += 1
+            stats.peak_frontier = max(stats.peak_frontier, appended - rec)
+            node = nodes[rec]
+            if is_target[node] and node != starts[origins[rec]]:
+                stats.paths += 1
+            elif lengths[rec] > self.max_length:
+                stats.depth_pruned += 1
+            else:
+                stats.expanded += 1
+        stats.generated += len(nodes)
+        stats.searches += n_starts
+
+    def path(self, rec: int) -> List[int]:
+        """
+        Rebuilds the node index sequence of a record by following parent pointers.
+        """
+        nodes, parents = self.nodes, self.parents
+        path = []
+        while rec != -1:
+            path.append(nodes[rec])
+            rec = parents[rec]
+        path.reverse()
+        return path
+
+
+def target_distances(neighbors: Callable[[int], Sequence[Tuple[int, float]]], n_nodes: int,
+                     target_cost: Sequence[Optional[float]]) -> List[float]:
+    """
+    Multi-source Dijkstra from a virtual super-sink joined to every target
+    node by an edge of weight target_cost[t] (None for non-targets). Returns,
+    per node, the cheapest cost of reaching and ending at some target without
+    passing through another target (inf if none is reachable).
+    `neighbors(i)` must be symmetric (i in neighbors(j) iff j in neighbors(i),
+    with the same weight), as for successors + predecessors.
+    """
+    dist = [INF] * n_nodes
+    heap = []
+    for node, cost in enumerate(target_cost):
+        if cost is not None:
+            dist[node] = cost
+            heap.append((cost, node))
+    heapq.heapify(heap)
+    while heap:
+        d, node = heapq.heappop(heap)
+        if d > dist[node]:
+            continue
+        for nb, weight in neighbors(node):
+            # A chain ends at its first target, so targets keep their own cost
+            if target_cost[nb] is None and d + weight < dist[nb]:
+                dist[nb] = d + weight
+                heapq.heappush(heap, (d + weight, nb))
+    return dist
+
+
+class BestFirstEnumerator:
+    """
+    Best-first (A*) enumeration of simple paths in increasing cost.
+
+    Same path model as PathEnumerator: simple paths from a start node that end
+    on their first target and hold at most `max_length` nodes. A path's cost is
+    the sum of its edge weights plus the target's cost. Partial paths are
+    ordered by cost so far plus target_distances() of their last node, a lower
+    bound on any completion (exact when the simple-path and length constraints
+    do not bind), so complete paths come out cheapest first and the search
+    stops after k of them, expanding little beyond the paths it returns.
+    Partial paths are parent-pointer records, as in PathEnumerator, with the
+    same bounded ancestor walk as cycle check.
+    """
+
+    def __init__(self, neighbors: Callable[[int], Sequence[Tuple[int, float]]], max_length: int = 10):
+        # neighbors(i) -> (node index, edge weight) pairs, weights >= 0
+        self.neighbors = neighbors
+        self.max_length = max_length
+        self.nodes: List[int] = []
+        self.parents: List[int] = []
+        self.expanded = 0
+
+    def search(self, start: int, target_cost: Sequence[Optional[float]], heuristic: Sequence[float],
+               k: int) -> Iterator[Tuple[float, int]]:
+        """
+        Yields (cost, record id) for the k cheapest paths from `start`, in
+        nondecreasing cost; ties keep discovery order.
+        """
+        nodes = self.nodes = [start]
+        parents = self.parents = [-1]
+        lengths = [1]
+        neighbors = self.neighbors
+        max_length = self.max_length
+        self.expanded = 0
+
+        if k <= 0 or heuristic[start] == INF:
+            return
+        # (estimated total, tie-breaker, cost so far, record)
+        heap = [(heuristic[start], 0, 0.0, 0)]
+        found = 0
+        while heap:
+            _, _, cost, rec = heapq.heappop(heap)
+            node = nodes[rec]
+            if target_cost[node] is not None and rec != 0:
+                yield cost + target_cost[node], rec
+                found += 1
+                if found == k:
+                    return
+                continue
+
+            length = lengths[rec]
+            if length > max_length:
+                continue
+            self.expanded += 1
+
+            on_path = _on_path(nodes, parents, rec)
+            for nb, weight in neighbors(node):
+                if nb in on_path or heuristic[nb] == INF:
+                    continue
+                nodes.append(nb)
+                parents.append(rec)
+                lengths.append(length + 1)
+                g = cost + weight
+                # Completed paths are keyed by their full cost, including the target's
+                estimate = g + heuristic[nb]
+                heapq.heappush(heap, (estimate, len(nodes) - 1, g, len(nodes) - 1))
+
+    def path(self, rec: int) -> List[int]:
+        nodes, parents = self.nodes, self.parents
+        path = []
+        while rec != -1:
+            path.append(nodes[rec])
+            rec = parents[rec]
+        path.reverse()
+        return path
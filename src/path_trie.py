@@ -0,0 +1,182 @@
+import json
+from array import array
+from typing import Dict, Iterable, List, Optional, Sequence
+
+# Direction of the relationship between a trie node and its parent
+FORWARD, BACKWARD, UNKNOWN = 1, -1, 0
+_DIRECTION_NAMES = {FORWARD: "forward", BACKWARD: "backward", UNKNOWN: None}
+
+
+def _relation(graph, u, v):
+    """(direction, type) of the hop u -> v, with get_formatted_chain's precedence."""
+    edge_data = graph.get_edge_data(u, v)
+    if edge_data is not None:
+        return FORWARD, edge_data.get('type', 'RELATED')
+    edge_data = graph.get_edge_data(v, u)
+    if edge_data is not None:
+        return BACKWARD, edge_data.get('type', 'RELATED')
+    return UNKNOWN, None
+
+
+class PathTrie:
+    """
+    Compact result set of causal chains from one start event.
+
+    Chains share their prefixes: every trie node stores its entity, a parent
+    pointer and the direction and type of the relationship to its parent,
+    looked up once per trie node instead of once per hop of every chain.
+    Parents always precede their children, and the chains (leaves) keep
+    the order they were found in, so results() matches the list returned by
+    discover_causal_chain.
+
+    Built by ReasoningEngine.discover_causal_trie (from_search), or from_paths() for any
+    list of paths starting at the same node.
+    """
+
+    def __init__(self, start, graph):
+        self.graph = graph
+        self.nodes: List = [start]
+        self.parents = array("i", [-1])
+        self.directions = array("b", [UNKNOWN])
+        self.rel_types: List[Optional[str]] = [None]
+        self.leaves: List[int] = []
+
+    @classmethod
+    def from_search(cls, start, graph, node_ids: Sequence, enumerator, recs: Iterable[int]) -> "PathTrie":
+        """
+        Builds the trie while a single-source PathEnumerator search runs: each
+        yielded record is added with its ancestors up to the first one already
+        in the trie, so chains are recorded as they are found and records off
+        every chain are never visited.
+        """
+        trie = cls(start, graph)
+        slot = {0: 0}
+        for rec in recs:
+            # Read per record: the search replaces these lists when it starts
+            nodes, parents = enumerator.nodes, enumerator.parents
+            pending = []
+            while rec not in slot:
+                pending.append(rec)
+                rec = parents[rec]
+            i = slot[rec]
+            for rec in reversed(pending):
+                i = slot[rec] = trie._add(node_ids[nodes[rec]], i)
+            trie.leaves.append(i)
+        return trie
+
+    @classmethod
+    def from_paths(cls, paths: Iterable[Sequence], graph, start=None) -> "PathTrie":
+        """Builds the trie of `paths`, which must all begin with `start`."""
+        trie = None
+        children: Dict[tuple, int] = {}
+        for path in paths:
+            if trie is None:
+                trie = cls(path[0] if start is None else start, graph)
+            if path[0] != trie.nodes[0]:
+                raise ValueError(f"path starts at {path[0]!r}, not {trie.nodes[0]!r}")
+            i = 0
+            for node in path[1:]:
+                child = children.get((i, node))
+                if child is None:
+                    child = children[(i, node)] = trie._add(node, i)
+                i = child
+            trie.leaves.append(i)
+        return trie if trie is not None else cls(start, graph)
+
+    def _add(self, node, parent: int) -> int:
+        direction, rel_type = _relation(self.graph, self.nodes[parent], node)
+        self.nodes.append(node)
+        self.parents.append(parent)
+        self.directions.append(direction)
+        self.rel_types.append(rel_type)
+        return len(self.nodes) - 1
+
+    def __len__(self) -> int:
+        """Number of chains."""
+        return len(self.leaves)
+
+    @property
+    def size(self) -> int:
+        """Number of trie nodes (the start event included)."""
+        return len(self.nodes)
+
+    def path(self, leaf: int) -> List:
+        path = []
+        while leaf != -1:
+            path.append(self.nodes[leaf])
+            leaf = self.parents[leaf]
+        path.reverse()
+        return path
+
+    def results(self) -> List[Dict]:
+        """The chains as discover_causal_chain result records."""
+        results = []
+        for leaf in self.leaves:
+            path = self.path(leaf)
+            results.append({"target": path[-1], "path": path, "length": len(path)})
+        return results
+
+    def _segment(self, i: int) -> str:
+        direction, rel_type = self.directions[i], self.rel_types[i]
+        if direction == FORWARD:
+            relation = f"--({rel_type})-->"
+        elif direction == BACKWARD:
+            # Arrow points back, meaning we traversed upstream
+            relation = f"<--({rel_type})--"
+        else:
+            relation = "--(?)-"
+        return f" {relation} {self.nodes[i]}"
+
+    def format_chains(self) -> List[str]:
+        """
+        Every chain formatted exactly like get_formatted_chain, in result order.
+        Each trie node's text is built once from its parent's, so shared
+        prefixes are never re-rendered and no edge is looked up again.
+        """
+        text = [str(self.nodes[0])]
+        parents = self.parents
+        for i in range(1, len(self.nodes)):
+            text.append(text[parents[i]] + self._segment(i))
+        return [text[leaf] for leaf in self.leaves]
+
+    def _children(self) -> List[List[int]]:
+        children = [[] for _ in self.nodes]
+        for i in range(1, len(self.nodes)):
+            children[self.parents[i]].append(i)
+        return children
+
+    def render_tree(self, indent: str = "  ") -> List[str]:
+        """
+        One line per trie node, indented by depth, with targets marked:
+        the whole result set in time and space linear in the trie size.
+        """
+        children = self._children()
+        leaves = set(self.leaves)
+        lines = []
+        stack = [(0, 0)]
+        while stack:
+            i, depth = stack.pop()
+            line = str(self.nodes[0]) if i == 0 else indent * depth + self._segment(i)[1:]
+            lines.append(line + (" [target]" if i in leaves else ""))
+            stack.extend((child, depth + 1) for child in reversed(children[i]))
+        return lines
+
+    def as_dict(self) -> Dict:
+        """Nested, JSON-serialisable form of the trie."""
+        children = self._children()
+        leaves = set(self.leaves)
+        entries = []
+        for i, node in enumerate(self.nodes):
+            entry = {"node": node}
+            if i:
+                entry["relation"] = {"type": self.rel_types[i], "direction": _DIRECTION_NAMES[self.directions[i]]}
+            if i in leaves:
+                entry["target"] = True
+            entries.append(entry)
+        for i in range(len(self.nodes)):
+            if children[i]:
+                entries[i]["children"] = [entries[c] for c in children[i]]
+        return {"start": self.nodes[0], "chains": len(self), "nodes": self.size, "tree": entries[0]}
+
+    def to_json(self, **kwargs) -> str:
+        return json.dumps(self.as_dict(), **kwargs)
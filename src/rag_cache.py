@@ -0,0 +1,134 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+
+_MISSING = object()
+
+
+class LRUCache:
+    """
+    Thread-safe LRU cache with an optional time-to-live, optionally backed
+    by an SQLite file shared across processes.
+
+    The in-memory level holds at most `maxsize` entries and evicts the least
+    recently used one. With `path` set, every write is also stored on disk
+    under `namespace`, and memory misses fall back to the disk (promoting the
+    hit). The namespace keeps at most `disk_maxsize` rows (default: maxsize);
+    writes evict the rows least recently written or read from disk.
+    Keys are tuples of JSON-serialisable values and values must be
+    JSON-serialisable. Expiry uses wall-clock time, so disk entries expire
+    consistently across runs.
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: Optional[float] = None, path: Optional[str] = None,
+                 namespace: str = "default", clock: Callable[[], float] = time.time,
+                 disk_maxsize: Optional[int] = None):
+        self.maxsize = maxsize
+        self.disk_maxsize = maxsize if disk_maxsize is None else disk_maxsize
+        self.ttl = ttl
+        self.namespace = namespace
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()   # key -> (expires, value)
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(str(path), check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS rag_cache ("
+                "namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, expires REAL, "
+                "last_used REAL NOT NULL DEFAULT 0, PRIMARY KEY (namespace, key))"
+            )
+            columns = {row[1] for row in self._db.execute("PRAGMA table_info(rag_cache)")}
+            if "last_used" not in columns:
+                # File written before disk eviction existed
+                self._db.execute("ALTER TABLE rag_cache ADD COLUMN last_used REAL NOT NULL DEFAULT 0")
+            self._db.execute("CREATE INDEX IF NOT EXISTS rag_cache_lru ON rag_cache (namespace, last_used)")
+            self._db.commit()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def _expired(self, expires: Optional[float]) -> bool:
+        return expires is not None and expires <= self.clock()
+
+    def get(self, key, default=None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if not self._expired(entry[0]):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, expires FROM rag_cache WHERE namespace = ? AND key = ?",
+                    (self.namespace, json.dumps(key))
+                ).fetchone()
+                if row is not None and not self._expired(row[1]):
+                    self._db.execute(
+                        "UPDATE rag_cache SET last_used = ? WHERE namespace = ? AND key = ?",
+                        (self.clock(), self.namespace, json.dumps(key))
+                    )
+                    self._db.commit()
+                    value = json.loads(row[0])
+                    self._remember(key, row[1], value)
+                    self.hits += 1
+                    return value
+
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        expires = None if self.ttl is None else self.clock() + self.ttl
+        with self._lock:
+            self._remember(key, expires, value)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO rag_cache (namespace, key, value, expires, last_used) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (self.namespace, json.dumps(key), json.dumps(value), expires, self.clock())
+                )
+                # Purge expired rows, then the least recently used beyond disk_maxsize,
+                # so the file does not grow forever
+                self._db.execute(
+                    "DELETE FROM rag_cache WHERE namespace = ? AND expires IS NOT NULL AND expires <= ?",
+                    (self.namespace, self.clock())
+                )
+                self._db.execute(
+                    "DELETE FROM rag_cache WHERE namespace = ? AND rowid NOT IN ("
+                    "SELECT rowid FROM rag_cache WHERE namespace = ? "
+                    "ORDER BY last_used DESC, rowid DESC LIMIT ?)",
+                    (self.namespace, self.namespace, self.disk_maxsize)
+                )
+                self._db.commit()
+
+    def _remember(self, key, expires, value):
+        self._entries[key] = (expires, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self, disk: bool = False):
+        """Empties the memory level (and the on-disk namespace with disk=True)."""
+        with self._lock:
+            self._entries.clear()
+            if disk and self._db is not None:
+                self._db.execute("DELETE FROM rag_cache WHERE namespace = ?", (self.namespace,))
+                self._db.commit()
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
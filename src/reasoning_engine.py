@@ -1,5 +1,30 @@
 import networkx as nx
-from typing import List, Dict, Optional, Set
+from typing import Dict, Iterator, List, Optional, Set
+
+from src.combined_graph import CombinedGraph
+from src.csr_graph import CSRGraph
+from src.path_engine import BestFirstEnumerator, PathEnumerator, TraversalStats, target_distances
+from src.path_trie import PathTrie
+
+# Node types that terminate a causal chain as a contract risk
+RISK_TARGET_TYPES = {
+    "Risk", "RiskCondition", "FinancialCondition", "Obligation",
+    "Penalty", "Condition", "Prohibition", "Product"
+}
+
+# Paths longer than this many nodes are not expanded any further
+MAX_PATH_LENGTH = 10
+
+# Top-k search: cost of traversing a relationship, by type (anything else costs
+# DEFAULT_EDGE_WEIGHT) ...
+DEFAULT_EDGE_WEIGHTS: Dict[str, float] = {}
+DEFAULT_EDGE_WEIGHT = 1.0
+# ... plus the cost of ending on a target, by type: lower means higher priority.
+# Kept below one hop so, with uniform weights, priorities only break length ties.
+DEFAULT_TARGET_COSTS: Dict[str, float] = {
+    "Penalty": 0.0, "Risk": 0.1, "RiskCondition": 0.2, "FinancialCondition": 0.3,
+    "Prohibition": 0.4, "Obligation": 0.5, "Condition": 0.6, "Product": 0.7
+}
 
 class ReasoningEngine:
     """
@@ -10,152 +35,387 @@ class ReasoningEngine:
     def __init__(self):
         pass
 
-    def find_bridge_nodes(self, G_base: nx.DiGraph, G_news: nx.DiGraph) -> Set[str]:
+    def _check_graphs(self, base_graph, news_graph, views=(CombinedGraph, CSRGraph)):
+        """
+        Rejects the argument mix-ups the (base_graph, news_graph, start_event)
+        signatures allow, e.g. a start event passed positionally after a
+        CombinedGraph, which would otherwise just find nothing.
+        """
+        if news_graph is not None and not isinstance(news_graph, nx.Graph):
+            raise TypeError(
+                f"news_graph must be a graph, not {type(news_graph).__name__}; "
+                "with a CombinedGraph or CSRGraph pass start_event by keyword"
+            )
+        if news_graph is None and not isinstance(base_graph, views):
+            raise TypeError("news_graph is required unless base_graph is a "
+                            + " or ".join(view.__name__ for view in views))
+
+    def find_bridge_nodes(self, G_base, G_news: Optional[nx.DiGraph] = None) -> Set[str]:
         """
         Identifies entities that exist in both the contract and the news.
         Logic: V_bridge = V_base ∩ V_news
+        Accepts either the two graphs or a single CombinedGraph.
         """
+        self._check_graphs(G_base, G_news, views=(CombinedGraph,))
+        if isinstance(G_base, CombinedGraph):
+            return G_base.bridge_nodes()
         nodes_base = set(G_base.nodes())
         nodes_news = set(G_news.nodes())
         bridge_nodes = nodes_base.intersection(nodes_news)
         return bridge_nodes
 
-    def discover_causal_chain(self, base_graph: nx.DiGraph, news_graph: nx.DiGraph, start_event: str):
+    def _result(self, path: List[str]) -> Dict:
+        """Result record for one discovered chain."""
+        return {
+            "target": path[-1],
+            "path": path,
+            "length": len(path)
+        }
+
+    def _target_flags(self, G_combined: nx.DiGraph, node_ids: List) -> bytearray:
+        """
+        Flags the risk targets among the interned nodes, falling back to
+        Company nodes (the contract owner) when the graph has no risk types.
+        """
+        is_target = bytearray(len(node_ids))
+        for i, node in enumerate(node_ids):
+            if G_combined.nodes[node].get("type") in RISK_TARGET_TYPES:
+                is_target[i] = 1
+
+        # Fallback: Contract Owner
+        if not any(is_target):
+            for i, node in enumerate(node_ids):
+                if G_combined.nodes[node].get("type") == "Company":
+                    is_target[i] = 1
+        return is_target
+
+    def _prepare_search(self, base_graph, news_graph, start_events: List[str],
+                        stats: Optional[TraversalStats] = None):
+        """
+        Shared setup of the networkx-backend searches: composes the graphs (or
+        reuses a CombinedGraph's union), interns the nodes and flags targets.
+        Returns (G_combined, interned) where interned is (node_ids, index,
+        neighbors, is_target), or None when none of start_events is in the
+        graph (the target scan is then skipped).
+        """
+        if stats is not None:
+            stats.start()
+
+        # 1. Combine graphs (Directed)
+        if isinstance(base_graph, CombinedGraph):
+            combined = base_graph
+        else:
+            combined = CombinedGraph(base_graph, news_graph)
+        G_combined = combined.graph
+        if stats is not None:
+            stats.lap("compose")
+
+        if not any(G_combined.has_node(event) for event in start_events):
+            return G_combined, None
+
+        # 2. Flag potential targets on the interned node ids
+        node_ids, index, neighbors = combined.indexed()
+        is_target = self._target_flags(G_combined, node_ids)
+        if stats is not None:
+            stats.lap("target_scan")
+        return G_combined, (node_ids, index, neighbors, is_target)
+
+    def discover_causal_chain(self, base_graph, news_graph: Optional[nx.DiGraph] = None, start_event: Optional[str] = None,
+                              stats: Optional[TraversalStats] = None):
         """
         Finds paths from the start_event (News) to any Risk/Penalty (Contract).
         Uses bidirectional traversal (successors + predecessors) on the Directed Graph
         to trace risk propagation upstream without altering graph structure.
-        """
-        # 1. Combine graphs (Directed)
-        G_combined = nx.compose(base_graph, news_graph)
-        
-        # 2. Define potential target types
-        target_types = {
-            "Risk", "RiskCondition", "FinancialCondition", "Obligation", 
-            "Penalty", "Condition", "Prohibition", "Product"
-        }
-        
-        targets = set()
-        for node, attr in G_combined.nodes(data=True):
-            if attr.get("type") in target_types:
-                targets.add(node)
-        
-        # Fallback: Contract Owner
-        if not targets:
-            for node, attr in G_combined.nodes(data=True):
-                if attr.get("type") == "Company":
-                    targets.add(node)
+        Every simple path is enumerated (diamond paths included), using
+        parent-pointer records so partial paths are never copied.
 
-        results = []
-        
-        if not G_combined.has_node(start_event):
-            return []
+        Pass a CombinedGraph as base_graph (and start_event by keyword) to reuse
+        its cached union instead of composing the two graphs on every call, or a
+        CSRGraph to run the vectorised integer-array traversal instead.
 
-        # # 3. Custom BFS for Risk Propagation (Upstream + Downstream)
-        # # We search for ALL targets and store the shortest path to them.
-        # queue = [[start_event]]
-        # visited = {start_event}
-        
-        # found_paths = []
-
-        # while queue:
-        #     path = queue.pop(0)
-        #     node = path[-1]
-
-        #     # If we hit a target node (that is not the start node itself)
-        #     if node in targets and node != start_event:
-        #         found_paths.append(path)
-        #         # Optimization: To find multiple potential risks, we don't break immediately,
-        #         # but for simplicity in this snippet, we can collect valid paths.
-        #         continue
-            
-        #     # Stop if path gets too long (heuristic to prevent infinite loops in complex cycles)
-        #     if len(path) > 10:
-        #         continue
-
-        #     # CRITICAL FIX: Look at both outgoing (successors) and incoming (predecessors)
-        #     # This allows tracing "Factory -> LOCATED_IN -> Country" backwards from Country to Factory.
-        #     neighbors = list(G_combined.successors(node)) + list(G_combined.predecessors(node))
-            
-        #     for neighbor in neighbors:
-        #         if neighbor not in visited:
-        #             visited.add(neighbor)
-        #             new_path = list(path)
-        #             new_path.append(neighbor)
-        #             queue.append(new_path)
-
-        # 3. Custom BFS for Risk Propagation (Upstream + Downstream)
-        # We search for ALL targets and store the shortest path to them.
-        queue = [[start_event]]
-        # visited removed to allow diamond paths (multiple paths reaching same node)
-        
-        found_paths = []
-
-        while queue:
-            path = queue.pop(0)
-            node = path[-1]
-
-            # If we hit a target node (that is not the start node itself)
-            if node in targets and node != start_event:
-                found_paths.append(path)
-                continue
-            
-            # Stop if path gets too long
-            if len(path) > 10:
-                continue
-
-            neighbors = list(G_combined.successors(node)) + list(G_combined.predecessors(node))
-            
-            for neighbor in neighbors:
-                # FIX: Only check if neighbor is not in CURRENT path to prevent cycles
-                # This allows the same node to be reached via different valid routes.
-                if neighbor not in path:
-                    new_path = list(path)
-                    new_path.append(neighbor)
-                    queue.append(new_path)
-
-
-        # Format results
-        for p in found_paths:
-            target_node = p[-1]
-            results.append({
-                "target": target_node,
-                "path": p,
-                "length": len(p)
-            })
+        Pass a TraversalStats as `stats` to collect search counters and phase
+        timings (compose, target_scan, search, sort); without it nothing is measured.
+        Raises TypeError if news_graph is missing or not a graph.
+        """
+        results = list(self.iter_causal_chain(base_graph, news_graph, start_event, stats))
+        if isinstance(base_graph, CSRGraph):
+            return results
 
         # Sort by shortest path first
         results.sort(key=lambda x: x['length'])
+        if stats is not None:
+            stats.lap("sort")
+        return results
+
+    def iter_causal_chain(self, base_graph, news_graph: Optional[nx.DiGraph] = None, start_event: Optional[str] = None,
+                          stats: Optional[TraversalStats] = None) -> Iterator[Dict]:
+        """
+        Lazy counterpart of discover_causal_chain: yields the same results, in
+        the same (nondecreasing length) order, as the search discovers them.
+        Stop iterating (or close the generator) once enough chains are found
+        and the rest of the search is never done. Accepts the same inputs.
+        """
+        # Checked here, not on the first next(), so mix-ups fail at the call
+        self._check_graphs(base_graph, news_graph)
+        return self._iter_causal_chain(base_graph, news_graph, start_event, stats)
+
+    def _iter_causal_chain(self, base_graph, news_graph, start_event, stats) -> Iterator[Dict]:
+        if isinstance(base_graph, CSRGraph):
+            yield from self._iter_causal_chain_csr(base_graph, start_event, stats)
+            return
+
+        _, interned = self._prepare_search(base_graph, news_graph, [start_event], stats)
+        if interned is None:
+            return
+        node_ids, index, neighbors, is_target = interned
+
+        # 3. BFS for Risk Propagation (Upstream + Downstream), level by level
+        enumerator = PathEnumerator(neighbors, max_length=MAX_PATH_LENGTH)
+        records = enumerator.search(index[start_event], is_target, stats)
+        try:
+            for rec in records:
+                yield self._result([node_ids[i] for i in enumerator.path(rec)])
+        finally:
+            # Closing the search now (not at garbage collection) settles the stats
+            records.close()
+            if stats is not None:
+                stats.lap("search")
+
+    def discover_causal_trie(self, base_graph, news_graph: Optional[nx.DiGraph] = None,
+                             start_event: Optional[str] = None,
+                             stats: Optional[TraversalStats] = None) -> PathTrie:
+        """
+        Same search as discover_causal_chain, returned as a PathTrie: chains
+        share their common prefixes and carry each relationship's direction
+        and type, so large overlapping result sets take a fraction of the
+        memory and format in one pass (format_chains, render_tree, to_json).
+        Accepts the same graph inputs.
+        """
+        self._check_graphs(base_graph, news_graph)
+        if isinstance(base_graph, CSRGraph):
+            paths = (r["path"] for r in self._iter_causal_chain_csr(base_graph, start_event, stats))
+            return PathTrie.from_paths(paths, base_graph, start_event)
+
+        G_combined, interned = self._prepare_search(base_graph, news_graph, [start_event], stats)
+        if interned is None:
+            return PathTrie(start_event, G_combined)
+        node_ids, index, neighbors, is_target = interned
+
+        enumerator = PathEnumerator(neighbors, max_length=MAX_PATH_LENGTH)
+        records = enumerator.search(index[start_event], is_target, stats)
+        # Records come out level by level, so the chains are already shortest first
+        trie = PathTrie.from_search(start_event, G_combined, node_ids, enumerator, records)
+        if stats is not None:
+            stats.lap("search")
+        return trie
+
+    def discover_causal_chains_batch(self, base_graph, news_graph: Optional[nx.DiGraph] = None,
+                                     start_events: Optional[List[str]] = None,
+                                     stats: Optional[TraversalStats] = None) -> Dict[str, List[Dict]]:
+        """
+        Runs discover_causal_chain for several start events in one shared traversal.
+        The graph union, target scan and frontier are built once and every record
+        is labelled with its origin event, so each event's result list is identical
+        to a separate discover_causal_chain call. Accepts the same graph inputs.
+        Returns {start_event: results}; events absent from the graph map to [].
+        """
+        self._check_graphs(base_graph, news_graph)
+        start_events = list(dict.fromkeys(start_events or []))
+
+        if isinstance(base_graph, CSRGraph):
+            return self._discover_causal_chains_batch_csr(base_graph, start_events, stats)
+
+        batch = {event: [] for event in start_events}
+        _, interned = self._prepare_search(base_graph, news_graph, start_events, stats)
+        if interned is None:
+            return batch
+        node_ids, index, neighbors, is_target = interned
+        present = [event for event in start_events if event in index]
+
+        enumerator = PathEnumerator(neighbors, max_length=MAX_PATH_LENGTH)
+        for origin, rec in enumerator.search_many([index[event] for event in present], is_target, stats):
+            p = [node_ids[i] for i in enumerator.path(rec)]
+            batch[present[origin]].append(self._result(p))
+        if stats is not None:
+            stats.lap("search")
+        # Records come out level by level, so every list is already sorted by length
+        return batch
+
+    def _csr_targets(self, csr: CSRGraph):
+        is_target = csr.type_mask(RISK_TARGET_TYPES)
+        # Fallback: Contract Owner
+        if not is_target.any():
+            is_target = csr.type_mask({"Company"})
+        return is_target
+
+    def _discover_causal_chains_batch_csr(self, csr: CSRGraph, start_events: List[str],
+                                          stats: Optional[TraversalStats] = None) -> Dict[str, List[Dict]]:
+        """CSR-backend counterpart of discover_causal_chains_batch."""
+        batch = {event: [] for event in start_events}
+        present = [event for event in start_events if csr.has_node(event)]
+        if not present:
+            return batch
+
+        if stats is not None:
+            stats.start()
+        is_target = self._csr_targets(csr)
+        if stats is not None:
+            stats.lap("target_scan")
+
+        node_ids = csr.node_ids
+        starts = [csr.index[event] for event in present]
+        for level in csr.simple_paths(starts, is_target, MAX_PATH_LENGTH, stats):
+            for row in level.tolist():
+                p = [node_ids[i] for i in row]
+                batch[node_ids[row[0]]].append(self._result(p))
+        if stats is not None:
+            stats.lap("search")
+        return batch
+
+    def _iter_causal_chain_csr(self, csr: CSRGraph, start_event: Optional[str],
+                               stats: Optional[TraversalStats] = None) -> Iterator[Dict]:
+        """
+        CSR-backend counterpart of iter_causal_chain. Paths stay integer
+        arrays during the search and are mapped back to string ids per level.
+        Levels come out in increasing length, so no sort is needed.
+        """
+        if not csr.has_node(start_event):
+            return
+
+        if stats is not None:
+            stats.start()
+        is_target = self._csr_targets(csr)
+        if stats is not None:
+            stats.lap("target_scan")
+
+        node_ids = csr.node_ids
+        levels = csr.simple_paths(csr.index[start_event], is_target, MAX_PATH_LENGTH, stats)
+        try:
+            for level in levels:
+                for row in level.tolist():
+                    yield self._result([node_ids[i] for i in row])
+        finally:
+            levels.close()
+            if stats is not None:
+                stats.lap("search")
+
+    def discover_top_k_chains(self, base_graph, news_graph: Optional[nx.DiGraph] = None,
+                              start_event: Optional[str] = None, k: int = 5,
+                              edge_weights: Optional[Dict[str, float]] = None,
+                              target_costs: Optional[Dict[str, float]] = None) -> List[Dict]:
+        """
+        The k most relevant chains from start_event, cheapest first, found by
+        best-first search instead of enumerating every path.
+
+        Chains follow the same rules as discover_causal_chain. A chain's cost is
+        the sum of its relationship weights (edge_weights by relationship type,
+        e.g. {"LOCATED_IN": 0.5, "RELATED_TO": 2.0}; DEFAULT_EDGE_WEIGHT for
+        others) plus the cost of its target type (target_costs, lower = higher
+        priority; DEFAULT_TARGET_COSTS by default). A Dijkstra pass from all
+        targets gives every node its cheapest remaining cost, so the search
+        heads straight for the best chains and stops once k are certain.
+        Accepts the same graph inputs; results carry an extra "cost" field.
+        """
+        self._check_graphs(base_graph, news_graph)
+        edge_weights = DEFAULT_EDGE_WEIGHTS if edge_weights is None else edge_weights
+        target_costs = DEFAULT_TARGET_COSTS if target_costs is None else target_costs
+        if any(w < 0 for w in edge_weights.values()) or any(c < 0 for c in target_costs.values()):
+            raise ValueError("edge weights and target costs must be non-negative")
+
+        if isinstance(base_graph, CombinedGraph):
+            # Reused across calls (and trigger events) until either graph changes
+            key = ("top_k", tuple(sorted(edge_weights.items())), tuple(sorted(target_costs.items())))
+            prepared = base_graph.derived(key, lambda: self._best_first_inputs(base_graph, None, edge_weights, target_costs))
+        else:
+            prepared = self._best_first_inputs(base_graph, news_graph, edge_weights, target_costs)
+        node_ids, index, adjacency, target_cost, heuristic = prepared
+        if start_event not in index:
+            return []
+
+        neighbors = adjacency.__getitem__
+        search = BestFirstEnumerator(neighbors, max_length=MAX_PATH_LENGTH)
+        results = []
+        for cost, rec in search.search(index[start_event], target_cost, heuristic, k):
+            result = self._result([node_ids[i] for i in search.path(rec)])
+            result["cost"] = cost
+            results.append(result)
         return results
 
+    def _best_first_inputs(self, base_graph, news_graph, edge_weights, target_costs):
+        """
+        (node ids, id -> index, weighted adjacency, per-node target cost,
+        target_distances heuristic) for discover_top_k_chains.
+        """
+        node_ids, index, node_types, adjacency = self._weighted_adjacency(base_graph, news_graph, edge_weights)
+        target_cost = [target_costs.get(t, 0.0) if t in RISK_TARGET_TYPES else None for t in node_types]
+        # Fallback: Contract Owner
+        if all(cost is None for cost in target_cost):
+            target_cost = [0.0 if t == "Company" else None for t in node_types]
+        heuristic = target_distances(adjacency.__getitem__, len(node_ids), target_cost)
+        return node_ids, index, adjacency, target_cost, heuristic
+
+    def _weighted_adjacency(self, base_graph, news_graph, edge_weights):
+        """
+        (node ids, id -> index, node types, per-node [(neighbor, weight)]) with
+        successors then predecessors, for a DiGraph pair, CombinedGraph or CSRGraph.
+        """
+        weight = lambda rel_type: edge_weights.get(rel_type, DEFAULT_EDGE_WEIGHT)
+        if isinstance(base_graph, CSRGraph):
+            csr = base_graph
+            names = [weight(name) for name in csr.edge_type_names]
+            fwd = list(zip(csr.fwd_indices.tolist(), (names[c] for c in csr.fwd_edge_type.tolist())))
+            rev = list(zip(csr.rev_indices.tolist(), (names[c] for c in csr.rev_edge_type.tolist())))
+            fwd_ptr, rev_ptr = csr.fwd_indptr.tolist(), csr.rev_indptr.tolist()
+            adjacency = [
+                fwd[fwd_ptr[i]:fwd_ptr[i + 1]] + rev[rev_ptr[i]:rev_ptr[i + 1]]
+                for i in range(len(csr.node_ids))
+            ]
+            node_types = [csr.node_type_names[c] for c in csr.node_type.tolist()]
+            return csr.node_ids, csr.index, node_types, adjacency
+
+        combined = base_graph if isinstance(base_graph, CombinedGraph) else CombinedGraph(base_graph, news_graph)
+        G_combined = combined.graph
+        node_ids, index, _ = combined.indexed()
+        adjacency = [
+            [(index[v], weight(attr.get("type"))) for v, attr in G_combined.succ[u].items()]
+            + [(index[v], weight(attr.get("type"))) for v, attr in G_combined.pred[u].items()]
+            for u in node_ids
+        ]
+        node_types = [G_combined.nodes[u].get("type") for u in node_ids]
+        return node_ids, index, node_types, adjacency
+
     def get_formatted_chain(self, path, combined_graph):
         """
         Formats the path list into a readable string.
         Since we traversed bidirectionally, we check edge direction to show correct flow.
+        combined_graph may be a composed DiGraph, a CombinedGraph or a CSRGraph.
+        To format many overlapping chains, discover_causal_trie(...).format_chains()
+        renders each shared prefix only once.
         """
-        chain_str = f"{path[0]}"
+        if isinstance(combined_graph, CombinedGraph):
+            combined_graph = combined_graph.graph
+        parts = [f"{path[0]}"]
         for i in range(len(path) - 1):
             u, v = path[i], path[i+1]
-            
-            # Check if forward edge exists (u -> v)
-            if combined_graph.has_edge(u, v):
-                edge_data = combined_graph.get_edge_data(u, v)
+
+            # Check if forward edge exists (u -> v); one lookup per direction
+            edge_data = combined_graph.get_edge_data(u, v)
+            if edge_data is not None:
                 rel_type = edge_data.get('type', 'RELATED')
                 relation = f"--({rel_type})-->"
-            
-            # Check if backward edge exists (v -> u)
-            elif combined_graph.has_edge(v, u):
-                edge_data = combined_graph.get_edge_data(v, u)
-                rel_type = edge_data.get('type', 'RELATED')
-                # Arrow points back, meaning we traversed upstream
-                relation = f"<--({rel_type})--"
-            
             else:
-                relation = "--(?)-"
-            
-            chain_str += f" {relation} {v}"
-        
-        return chain_str
+                # Check if backward edge exists (v -> u)
+                edge_data = combined_graph.get_edge_data(v, u)
+                if edge_data is not None:
+                    rel_type = edge_data.get('type', 'RELATED')
+                    # Arrow points back, meaning we traversed upstream
+                    relation = f"<--({rel_type})--"
+                else:
+                    relation = "--(?)-"
+
+            parts.append(f" {relation} {v}")
+
+        return "".join(parts)
 
 # --- Example of how this will be used in the main app ---
 if __name__ == "__main__":
@@ -0,0 +1,165 @@
+from array import array
+from collections import deque
+from typing import Dict, Iterable, List, Optional
+
+import networkx as nx
+
+from src.combined_graph import graph_signature
+from src.reasoning_engine import MAX_PATH_LENGTH, RISK_TARGET_TYPES
+
+_UNREACHED = -1
+
+
+class RiskDistanceIndex:
+    """
+    Reverse index from every node of a contract's base graph to its nearest
+    risk target of each type.
+
+    For each target type, a multi-source BFS from all targets of that type
+    over the undirected base graph stores each node's hop distance and the
+    next hop towards the target. Like the causal chains, the BFS never passes
+    through a target (a chain ends at its first one). The index is built
+    once per base graph and rebuilt only when the graph changes, so a news
+    event is answered by walking the (small) news graph to its bridges and
+    then following next-hop pointers, without scanning or searching the
+    base graph.
+    """
+
+    def __init__(self, base_graph: nx.DiGraph, target_types: Iterable[str] = RISK_TARGET_TYPES):
+        self.base_graph = base_graph
+        self.target_types = frozenset(target_types)
+        self._signature = None
+        self.node_ids: List = []
+        self.index: Dict = {}
+        self.distance: Dict[str, array] = {}   # type -> hops per node (-1 = unreachable)
+        self.next_hop: Dict[str, array] = {}   # type -> next node index towards it (-1 at targets)
+        self.rebuild()
+
+    def is_current(self) -> bool:
+        return self._signature == graph_signature(self.base_graph)
+
+    def ensure_current(self) -> "RiskDistanceIndex":
+        """Rebuilds the index if the base graph changed since it was built."""
+        if not self.is_current():
+            self.rebuild()
+        return self
+
+    def rebuild(self):
+        G = self.base_graph
+        self._signature = graph_signature(G)
+        node_ids = self.node_ids = list(G.nodes())
+        index = self.index = {node: i for i, node in enumerate(node_ids)}
+        adjacency = [
+            [index[v] for v in G.succ[u]] + [index[v] for v in G.pred[u]]
+            for u in node_ids
+        ]
+        types = [G.nodes[u].get("type") for u in node_ids]
+        is_target = [t in self.target_types for t in types]
+
+        self.distance, self.next_hop = {}, {}
+        for target_type in sorted({t for t in types if t in self.target_types}):
+            distance = array("i", [_UNREACHED]) * len(node_ids)
+            next_hop = array("i", [_UNREACHED]) * len(node_ids)
+            queue = deque()
+            for i, t in enumerate(types):
+                if t == target_type:
+                    distance[i] = 0
+                    queue.append(i)
+            while queue:
+                node = queue.popleft()
+                for nb in adjacency[node]:
+                    if distance[nb] == _UNREACHED and not is_target[nb]:
+                        distance[nb] = distance[node] + 1
+                        next_hop[nb] = node
+                        queue.append(nb)
+            self.distance[target_type] = distance
+            self.next_hop[target_type] = next_hop
+
+    def _base_chain(self, node: int, target_type: str) -> List:
+        next_hop = self.next_hop[target_type]
+        chain = [self.node_ids[node]]
+        while next_hop[node] != _UNREACHED:
+            node = next_hop[node]
+            chain.append(self.node_ids[node])
+        return chain
+
+    def shortest_chains(self, news_graph: nx.DiGraph, start_event, target_types: Optional[Iterable[str]] = None) -> Dict[str, Dict]:
+        """
+        {target type: shortest chain} from start_event to the nearest target of
+        each type (all indexed types by default), following news relations
+        (either direction) until the chain enters the contract at a bridge
+        node and base relations from there. Chains respect the causal-chain
+        rules: they end at their first target and hold at most
+        MAX_PATH_LENGTH + 1 nodes. Results have the usual target/path/length
+        fields plus "target_type"; unreachable types are omitted.
+        """
+        self.ensure_current()
+        wanted = self.target_types if target_types is None else set(target_types)
+        wanted = [t for t in sorted(wanted) if t in self.distance]
+        if not news_graph.has_node(start_event) and start_event not in self.index:
+            return {}
+
+        best: Dict[str, tuple] = {}
+
+        def offer(target_type, hops, prefix, base_node):
+            if target_type not in best or hops < best[target_type][0]:
+                best[target_type] = (hops, prefix, base_node)
+
+        # BFS over the news graph only; each reached node is a possible entry point
+        parents = {start_event: None}
+        depth = {start_event: 0}
+        queue = deque([start_event])
+        while queue:
+            node = queue.popleft()
+            d = depth[node]
+            base_node = self.index.get(node)
+            node_type = self._type_of(node, news_graph)
+            if node != start_event and node_type in self.target_types:
+                # The chain ends here, whatever lies beyond
+                if node_type in wanted:
+                    offer(node_type, d, node, None)
+                continue
+            if base_node is not None:
+                for target_type in wanted:
+                    hops = self.distance[target_type][base_node]
+                    if hops > 0:
+                        offer(target_type, d + hops, node, base_node)
+            # Chains longer than MAX_PATH_LENGTH nodes are not extended
+            if not news_graph.has_node(node) or d + 1 > MAX_PATH_LENGTH:
+                continue
+            for nb in list(news_graph.successors(node)) + list(news_graph.predecessors(node)):
+                if nb not in depth:
+                    depth[nb] = d + 1
+                    parents[nb] = node
+                    queue.append(nb)
+
+        results = {}
+        for target_type, (hops, entry, base_node) in best.items():
+            if hops + 1 > MAX_PATH_LENGTH + 1:
+                continue
+            prefix = []
+            node = entry
+            while node is not None:
+                prefix.append(node)
+                node = parents[node]
+            prefix.reverse()
+            path = prefix if base_node is None else prefix[:-1] + self._base_chain(base_node, target_type)
+            results[target_type] = {
+                "target": path[-1],
+                "path": path,
+                "length": len(path),
+                "target_type": target_type,
+            }
+        return results
+
+    def reaches(self, news_graph: nx.DiGraph, start_event, target_type: str) -> Optional[Dict]:
+        """The shortest chain from start_event to a `target_type` node, or None."""
+        return self.shortest_chains(news_graph, start_event, [target_type]).get(target_type)
+
+    def _type_of(self, node, news_graph: nx.DiGraph):
+        # Same precedence as nx.compose(base, news): news attributes win
+        if news_graph.has_node(node) and "type" in news_graph.nodes[node]:
+            return news_graph.nodes[node]["type"]
+        if node in self.index:
+            return self.base_graph.nodes[node].get("type")
+        return None
@@ -0,0 +1,349 @@
+"""
+Long-running risk screening service.
+
+Contracts are loaded once through DataLoader and stay resident together
+with their combined graphs, risk-distance indexes and the portfolio-wide
+ContractIndex, so a request only pays for the traversal itself. The data
+file is watched and reloaded in the background when it changes; requests
+keep using the previous snapshot until the new one is ready.
+
+Usage: python src/server.py [--data data/raw/contracts_and_news.json] [--port 8765]
+
+Endpoints (JSON in, JSON out):
+  POST /analyze  {"contract_id": "C01", "event": "Typhoon_Krathon"}
+                 {"news": {"entities": [...], "relations": [...]}, "event": "..."}
+                 optional "limit" (first N chains) or "top_k" (N best chains)
+  POST /nearest  same inputs; the shortest chain to each risk type
+  GET  /health   loaded contracts and data version
+  GET  /stats    request counts and latency percentiles per endpoint
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import islice
+from typing import Dict, List, Optional
+
+# Allow running as a script from the project root (python src/server.py)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.combined_graph import CombinedGraph
+from src.contract_index import ContractIndex
+from src.data_loader import ContractData, DataLoader
+from src.reasoning_engine import ReasoningEngine
+
+
+class RequestError(Exception):
+    """A request the service cannot answer, with its HTTP status."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+@dataclass
+class Snapshot:
+    """One immutable generation of loaded data; swapped whole on reload."""
+    contracts: List[ContractData]
+    by_id: Dict[str, ContractData]
+    index: ContractIndex
+    stamp: tuple
+    version: int
+    loaded_at: float
+
+
+class ContractStore:
+    """
+    Keeps the contracts of a data file in memory and reloads them when the
+    file changes. Readers take `snapshot` once per request; a reload builds
+    a complete new snapshot and replaces the reference, so no lock is needed
+    on the read path.
+    """
+
+    def __init__(self, data_path: str, use_cache: bool = False, poll_interval: float = 2.0):
+        self.data_path = data_path
+        self.use_cache = use_cache
+        self.poll_interval = poll_interval
+        self.reload_error: Optional[str] = None
+        self._reload_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+        self.loader = DataLoader(data_path, use_cache=use_cache)
+        self.snapshot = self._load(version=1)
+
+    def _stamp(self) -> tuple:
+        stat = os.stat(self.data_path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def _load(self, version: int) -> Snapshot:
+        stamp = self._stamp()
+        contracts = list(self.loader.load(verbose=False))
+        # Build the per-contract structures now rather than on the first request
+        for contract in contracts:
+            contract.combined_graph.indexed()
+            contract.risk_index
+        return Snapshot(
+            contracts=contracts,
+            by_id={c.contract_id: c for c in contracts},
+            index=self.loader.build_contract_index(contracts),
+            stamp=stamp,
+            version=version,
+            loaded_at=time.time(),
+        )
+
+    def maybe_reload(self) -> bool:
+        """Reloads if the data file changed since the last load. Returns True on reload."""
+        with self._reload_lock:
+            try:
+                if self._stamp() == self.snapshot.stamp:
+                    return False
+                self.snapshot = self._load(self.snapshot.version + 1)
+                self.reload_error = None
+                return True
+            except Exception as e:
+                # Keep serving the previous snapshot (the file is mid-write,
+                # or holds something other than a list of contracts)
+                self.reload_error = f"{type(e).__name__}: {e}"
+                return False
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_interval):
+            # The watcher must outlive any bad reload: record it and keep polling
+            try:
+                if self.maybe_reload():
+                    print(f"[*] Reloaded {len(self.snapshot.contracts)} contracts "
+                          f"(version {self.snapshot.version}) from {self.data_path}")
+            except Exception as e:
+                self.reload_error = f"{type(e).__name__}: {e}"
+
+    def start_watching(self):
+        if self._watcher is None:
+            self._watcher = threading.Thread(target=self._watch, name="data-watcher", daemon=True)
+            self._watcher.start()
+
+    def stop_watching(self):
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+
+
+class LatencyStats:
+    """Thread-safe request latencies per endpoint over a sliding window."""
+
+    def __init__(self, window: int = 10000):
+        self.window = window
+        self._samples: Dict[str, deque] = {}
+        self._counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def record(self, endpoint: str, seconds: float):
+        with self._lock:
+            samples = self._samples.get(endpoint)
+            if samples is None:
+                samples = self._samples[endpoint] = deque(maxlen=self.window)
+            samples.append(seconds)
+            self._counts[endpoint] = self._counts.get(endpoint, 0) + 1
+
+    def summary(self, percentiles=(50, 90, 99)) -> Dict[str, Dict]:
+        """{endpoint: {"count": n, "p50_ms": ..., ...}} using nearest-rank percentiles."""
+        with self._lock:
+            snapshot = {endpoint: sorted(samples) for endpoint, samples in self._samples.items()}
+            counts = dict(self._counts)
+        report = {}
+        for endpoint, samples in sorted(snapshot.items()):
+            row = {"count": counts[endpoint]}
+            for p in percentiles:
+                rank = max(1, -(-p * len(samples) // 100))
+                row[f"p{p}_ms"] = round(samples[rank - 1] * 1000, 3)
+            report[endpoint] = row
+        return report
+
+
+class RiskService:
+    """Answers analysis requests against the resident contracts of a ContractStore."""
+
+    def __init__(self, store: ContractStore, engine: Optional[ReasoningEngine] = None):
+        self.store = store
+        self.engine = engine or ReasoningEngine()
+        self.latency = LatencyStats()
+
+    def _targets(self, body: Dict, snapshot: Snapshot):
+        """
+        Yields (contract, combined graph, news graph, start event) for a request:
+        one stored contract by contract_id, or every contract an ad-hoc news
+        graph bridges into.
+        """
+        if "news" in body:
+            try:
+                news_graph = self.store.loader.json_to_graph(body["news"])
+            except (KeyError, TypeError, AttributeError) as e:
+                raise RequestError(400, f"malformed news graph: {e!r}")
+            event = body.get("event")
+            if event is None:
+                roots = [n for n in news_graph.nodes() if news_graph.in_degree(n) == 0]
+                event = roots[0] if roots else next(iter(news_graph.nodes()), None)
+            for contract_id in snapshot.index.find_bridges(news_graph):
+                contract = snapshot.by_id[contract_id]
+                yield contract, CombinedGraph(contract.base_graph, news_graph), news_graph, event
+        elif "contract_id" in body:
+            contract = snapshot.by_id.get(body["contract_id"])
+            if contract is None:
+                raise RequestError(404, f"unknown contract {body['contract_id']!r}")
+            event = body.get("event")
+            if event is None:
+                raise RequestError(400, "'event' is required with 'contract_id'")
+            yield contract, contract.combined_graph, contract.news_graph, event
+        else:
+            raise RequestError(400, "expected 'contract_id' and 'event', or 'news'")
+
+    @staticmethod
+    def _count(body: Dict, key: str) -> Optional[int]:
+        """The optional non-negative integer `key` of a request body."""
+        value = body.get(key)
+        if value is None:
+            return None
+        if isinstance(value, bool) or not isinstance(value, int) or value < 0:
+            raise RequestError(400, f"'{key}' must be a non-negative integer, got {value!r}")
+        return value
+
+    def analyze(self, body: Dict) -> Dict:
+        limit, top_k = self._count(body, "limit"), self._count(body, "top_k")
+        snapshot = self.store.snapshot
+        report = {}
+        for contract, combined, news_graph, event in self._targets(body, snapshot):
+            if top_k is not None:
+                results = self.engine.discover_top_k_chains(combined, start_event=event, k=top_k)
+            elif limit is not None:
+                results = list(islice(self.engine.iter_causal_chain(combined, start_event=event), limit))
+            else:
+                results = self.engine.discover_causal_chain(combined, start_event=event)
+            for result in results:
+                result["chain"] = self.engine.get_formatted_chain(result["path"], combined)
+            report[contract.contract_id] = {
+                "event": event,
+                "bridges": sorted(self.engine.find_bridge_nodes(combined)),
+                "paths": results,
+            }
+        return {"version": snapshot.version, "contracts": report}
+
+    def nearest(self, body: Dict) -> Dict:
+        snapshot = self.store.snapshot
+        report = {}
+        for contract, combined, news_graph, event in self._targets(body, snapshot):
+            chains = contract.risk_index.shortest_chains(news_graph, event)
+            for result in chains.values():
+                result["chain"] = self.engine.get_formatted_chain(result["path"], combined)
+            report[contract.contract_id] = {"event": event, "nearest": chains}
+        return {"version": snapshot.version, "contracts": report}
+
+    def health(self) -> Dict:
+        snapshot = self.store.snapshot
+        return {
+            "status": "ok",
+            "contracts": len(snapshot.contracts),
+            "version": snapshot.version,
+            "loaded_at": snapshot.loaded_at,
+            "reload_error": self.store.reload_error,
+        }
+
+    def stats(self) -> Dict:
+        return {"latency": self.latency.summary()}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    routes = {
+        ("POST", "/analyze"): "analyze",
+        ("POST", "/nearest"): "nearest",
+        ("GET", "/health"): "health",
+        ("GET", "/stats"): "stats",
+    }
+
+    def _handle(self, method: str):
+        t0 = time.perf_counter()
+        endpoint = self.routes.get((method, self.path.split("?")[0]))
+        try:
+            if endpoint is None:
+                raise RequestError(404, f"no route for {method} {self.path}")
+            handler = getattr(self.server.service, endpoint)
+            if method == "POST":
+                length = int(self.headers.get("Content-Length") or 0)
+                try:
+                    body = json.loads(self.rfile.read(length) or b"{}")
+                except ValueError as e:
+                    raise RequestError(400, f"invalid JSON body: {e}")
+                if not isinstance(body, dict):
+                    raise RequestError(400, "the request body must be a JSON object")
+                status, payload = 200, handler(body)
+            else:
+                status, payload = 200, handler()
+        except RequestError as e:
+            status, payload = e.status, {"error": str(e)}
+        except Exception as e:   # Report, but keep the server alive
+            status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+        if endpoint is not None:
+            self.server.service.latency.record(endpoint, time.perf_counter() - t0)
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class RiskServer(ThreadingHTTPServer):
+    """Threaded HTTP front end of a RiskService; one thread per connection."""
+    daemon_threads = True
+
+    def __init__(self, service: RiskService, host: str = "127.0.0.1", port: int = 8765, verbose: bool = False):
+        super().__init__((host, port), _Handler)
+        self.service = service
+        self.verbose = verbose
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="SGSA risk screening server with resident graphs.")
+    parser.add_argument("--data", default=os.path.join("data/raw", "contracts_and_news.json"))
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--cache", action="store_true",
+                        help="Load through the compiled graph cache next to the data file.")
+    parser.add_argument("--poll-interval", type=float, default=2.0,
+                        help="Seconds between checks of the data file for changes (default: 2).")
+    parser.add_argument("--verbose", action="store_true", help="Log every request.")
+    args = parser.parse_args(argv)
+
+    store = ContractStore(args.data, use_cache=args.cache, poll_interval=args.poll_interval)
+    service = RiskService(store)
+    server = RiskServer(service, args.host, args.port, verbose=args.verbose)
+    store.start_watching()
+    host, port = server.server_address[:2]
+    print(f"[*] Serving {len(store.snapshot.contracts)} contracts on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        store.stop_watching()
+        for endpoint, row in service.stats()["latency"].items():
+            print(f"[latency] {endpoint}: " + ", ".join(f"{k} {v}" for k, v in row.items()))
+
+if __name__ == "__main__":
+    main()
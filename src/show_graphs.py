@@ -1,59 +1,154 @@
+import argparse
+import hashlib
 import json
+import multiprocessing
 import os
+import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
 import networkx as nx
 from pyvis.network import Network
 
-def generate_visualizations():
-    # 1. Setup Paths
-    # current_dir = os.path.dirname(os.path.abspath(__file__))
-    # project_root = os.path.dirname(current_dir)
-    json_path = r"data/raw/contracts_and_news.json"
+# Allow running as a script from the project root (python src/show_graphs.py)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-    # 2. Direct JSON Loading (No DataLoader)
-    # if not os.path.exists(json_path):
-    #     print(f"[!] Error: File not found at {json_path}")
-    #     return
+from src.data_loader import DataLoader, LazyContracts
+from src.graph_layout import LayoutCache, cached_layout, layout_key
+from src.reasoning_engine import ReasoningEngine
 
-    with open(json_path, 'r', encoding='utf-8') as f:
-        contracts = json.load(f)
+# Bump whenever render_contract changes its output, so every file is redrawn once
+RENDER_VERSION = 2
+# {contract id: {"file", "hash", "layout"}} of every rendered file, next to the files themselves
+MANIFEST_NAME = "manifest.json"
+# Precomputed layouts, by graph hash; only those of the current files are kept
+LAYOUT_DIR = "layouts"
+# Chains kept by the causal level of detail (shortest first)
+DEFAULT_MAX_PATHS = 200
 
-    print(f"[*] Successfully loaded {len(contracts)} contracts from JSON.")
+def _news_root(news_graph):
+    """The root cause of the news, picked like main.find_news_root_cause."""
+    for node in news_graph.nodes():
+        if news_graph.in_degree(node) == 0:
+            return node
+    return next(iter(news_graph.nodes()), None)
 
-    # 3. Iterate & Build
-    for i, contract in enumerate(contracts):
-        # Create a NetworkX graph to handle merging easily
-        G = nx.DiGraph()
-        
-        # Track news nodes for coloring
-        news_node_ids = set()
-
-        # --- Process Base Graph ---
-        base = contract.get("base_graph", {})
-        for node in base.get("entities", []):
-            G.add_node(node["id"], type=node["type"])
-        
-        for edge in base.get("relations", []):
-            G.add_edge(edge["source"], edge["target"], label=edge["type"])
-
-        # --- Process News Graph ---
-        news = contract.get("news_sequence", {})
-        for node in news.get("entities", []):
-            nid = node["id"]
-            G.add_node(nid, type=node["type"]) # Update/Add node
-            news_node_ids.add(nid) # Mark as news
-        
-        for edge in news.get("relations", []):
-            G.add_edge(edge["source"], edge["target"], label=edge["type"])
-
-        # 4. Pyvis Visualization (EXACT User Settings)
-        net = Network(
-            height="800px",
-            width="100%",
-            directed=True,
-            bgcolor="#ffffff",
-            font_color="black"
-        )
+def causal_nodes(engine, graph, start, fallback, max_paths=DEFAULT_MAX_PATHS):
+    """
+    Nodes on the first `max_paths` causal chains from `start` in `graph`, or
+    `fallback` (the news nodes, bridge nodes included) when no chain reaches
+    a risk.
+    """
+    keep = {}
+    for result in islice(engine.iter_causal_chain(graph, nx.DiGraph(), start), max_paths):
+        keep.update(dict.fromkeys(result["path"]))
+    return keep or dict.fromkeys(fallback)
+
+def job_hash(source_digest: bytes, detail="full", layout="physics", max_paths=DEFAULT_MAX_PATHS) -> str:
+    """
+    Content hash of a job from the digest of the contract's graphs (see
+    graph_cache.graph_digest) and the render options, without building it.
+    """
+    options = [RENDER_VERSION, source_digest.hex(), detail, layout, max_paths if detail == "causal" else None]
+    return hashlib.sha256(json.dumps(options).encode("utf-8")).hexdigest()
+
+def contract_job(contract, output_path, detail="full", layout="physics", max_paths=DEFAULT_MAX_PATHS,
+                 source_digest=None):
+    """
+    Everything render_contract needs for one contract, as plain lists (cheap
+    to send to a worker process), plus its content hash: job_hash of
+    source_digest when given, otherwise a hash of the job itself.
+
+    detail="causal" has the worker keep only the nodes on the contract's
+    causal chains and collapse every other node into one cluster node per
+    entity type (see collapse_job). The chain search runs in the worker, so
+    the parent only pays for listing the graph. layout="precomputed"
+    has the worker lay the graph out in Python and turns browser physics off.
+    """
+    # Merged contract + news graph, as used by the reasoning engine
+    G = contract.combined_graph.graph
+    # Track news nodes for coloring
+    news_node_ids = set(contract.news_graph.nodes())
+
+    nodes = [(node, attr.get("type", "Unknown"), node in news_node_ids) for node, attr in G.nodes(data=True)]
+    edges = [(u, v, attr.get("type", "")) for u, v, attr in G.edges(data=True)]
+    job = {"nodes": nodes, "edges": edges}
+    if detail == "causal":
+        job["causal"] = {"start": _news_root(contract.news_graph), "max_paths": max_paths}
+    if layout == "precomputed":
+        job["layout"] = layout
+    if source_digest is not None:
+        digest = job_hash(source_digest, detail, layout, max_paths)
+    else:
+        digest = hashlib.sha256(json.dumps([RENDER_VERSION, job], default=str).encode("utf-8")).hexdigest()
+    job.update(contract_id=contract.contract_id, path=output_path, hash=digest)
+    return job
+
+def collapse_job(job, engine=None):
+    """
+    The causal level of detail of a detail="causal" job: nodes on its causal
+    chains are kept, every other node is counted in one cluster node per
+    entity type, with the edges between them merged (and counted).
+    """
+    G = nx.DiGraph()
+    for node, node_type, _ in job["nodes"]:
+        G.add_node(node, type=node_type)
+    for u, v, rel_type in job["edges"]:
+        G.add_edge(u, v, type=rel_type)
+    news = [node for node, _, is_news in job["nodes"] if is_news]
+    keep = causal_nodes(engine or ReasoningEngine(), G, job["causal"]["start"], news, job["causal"]["max_paths"])
 
+    node_type = lambda n: G.nodes[n]["type"]
+    rep = {n: n if n in keep else f"cluster:{node_type(n)}" for n in G.nodes()}
+    sizes = Counter(node_type(n) for n in G.nodes() if n not in keep)
+    edges, merged = [], Counter()
+    for u, v, rel_type in job["edges"]:
+        if u in keep and v in keep:
+            edges.append((u, v, rel_type))
+        elif rep[u] != rep[v]:
+            merged[(rep[u], rep[v])] += 1
+    collapsed = dict(job, nodes=[entry for entry in job["nodes"] if entry[0] in keep], edges=edges)
+    del collapsed["causal"]
+    if sizes:
+        collapsed["clusters"] = [(f"cluster:{t}", t, count) for t, count in sizes.items()]
+        collapsed["cluster_edges"] = [(u, v, count) for (u, v), count in merged.items()]
+    return collapsed
+
+def _positions(job):
+    """
+    (pixel positions of every node and cluster, layout cache key) of a
+    precomputed-layout job.
+    """
+    node_ids = [node for node, _, _ in job["nodes"]] + [cid for cid, _, _ in job.get("clusters", [])]
+    index = {node: i for i, node in enumerate(node_ids)}
+    pairs = [(index[u], index[v]) for u, v, _ in job["edges"]]
+    pairs += [(index[u], index[v]) for u, v, _ in job.get("cluster_edges", [])]
+    cache = LayoutCache(os.path.join(os.path.dirname(job["path"]), LAYOUT_DIR))
+    return cached_layout(node_ids, pairs, cache), layout_key(node_ids, pairs)
+
+def render_contract(job):
+    """
+    Draws one contract graph with pyvis and saves it to job["path"].
+    Returns (path, key of the cached layout used, or None).
+    """
+    if "causal" in job:
+        job = collapse_job(job)
+    # Pyvis Visualization (EXACT User Settings)
+    net = Network(
+        height="800px",
+        width="100%",
+        directed=True,
+        bgcolor="#ffffff",
+        font_color="black"
+    )
+
+    positions = key = None
+    if job.get("layout") == "precomputed":
+        # Positions are fixed up front, so the browser runs no simulation
+        positions, key = _positions(job)
+        net.toggle_physics(False)
+    else:
         net.barnes_hut(
             gravity=-25000,
             central_gravity=0.25,
@@ -61,40 +156,199 @@ def generate_visualizations():
             spring_strength=0.02,
             damping=0.09
         )
+    placed = lambda node: {} if positions is None else {"x": positions[node][0], "y": positions[node][1]}
+
+    # Add Nodes to Pyvis
+    for node, node_type, is_news in job["nodes"]:
+        # Color Logic: Red for News, Blue for Base
+        if is_news:
+            color = "#ff4500" # Red
+        else:
+            color = "#00bfff" # Blue
+
+        net.add_node(
+            node,
+            label=node,
+            title=node_type,
+            color=color,
+            shape="ellipse",
+            font={"size": 16},
+            **placed(node)
+        )
+
+    # Collapsed clusters (causal level of detail)
+    for cluster_id, node_type, count in job.get("clusters", []):
+        net.add_node(
+            cluster_id,
+            label=f"{node_type} x{count}",
+            title=f"{count} {node_type} nodes off the causal chains",
+            color="#c0c0c0",
+            shape="box",
+            value=count,
+            font={"size": 16},
+            **placed(cluster_id)
+        )
+
+    # Add Edges to Pyvis
+    for u, v, rel_type in job["edges"]:
+        net.add_edge(
+            u,
+            v,
+            label=rel_type,
+            arrows="to",
+            font={"size": 14}
+        )
+    for u, v, count in job.get("cluster_edges", []):
+        net.add_edge(u, v, label=f"x{count}", arrows="to", color="#c0c0c0", font={"size": 14})
+
+    net.save_graph(job["path"])
+    return job["path"], key
+
+def _load_manifest(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    for key, entry in list(manifest.items()):
+        # Manifests written before entries were keyed by contract id: {file: {"contract_id", "hash"}}
+        if "contract_id" in entry:
+            del manifest[key]
+            manifest[entry["contract_id"]] = {"file": key, "hash": entry["hash"]}
+    return manifest
+
+def _file_names(contract_ids, previous):
+    """
+    {contract id: file name}. Contracts keep the file of the previous run, so
+    inserting or reordering contracts redraws nothing else; new contracts take
+    the lowest free c{i}.html.
+    """
+    names = {cid: previous[cid]["file"] for cid in contract_ids if cid in previous}
+    taken = set(names.values())
+    i = 0
+    for cid in contract_ids:
+        if cid not in names:
+            while f"c{i}.html" in taken:
+                i += 1
+            names[cid] = f"c{i}.html"
+            taken.add(names[cid])
+    return names
+
+def _save_manifest(path, manifest):
+    # Write-then-rename, so an interrupted run never leaves a truncated manifest
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+def generate_visualizations(json_path=r"data/raw/contracts_and_news.json", output_dir="outputs/graphs",
+                            workers=None, force=False, detail="full", layout="physics",
+                            max_paths=DEFAULT_MAX_PATHS):
+    """
+    Renders outputs/graphs/c{i}.html for every contract (c0, c1, ... in data
+    order on the first run; afterwards each contract keeps its file). Contracts
+    whose content hash matches the manifest of the previous run (and whose
+    file still exists) are skipped; with the graph cache the hash comes from
+    the digest stored there, so unchanged contracts are not even built. The
+    rest are rendered in a process pool
+    of `workers` processes (CPU count by default). force=True redraws all.
+    Files of contracts no longer in the data are removed either way.
+    For large graphs, use detail="causal" and / or layout="precomputed"
+    (see contract_job). Returns the list of files written.
+    """
+    if max_paths < 0:
+        raise ValueError("max_paths must be non-negative")
+    # Load through DataLoader (memory-mapped graph cache after the first run)
+    loader = DataLoader(json_path, use_cache=True)
+    contracts = loader.load()
+
+    print(f"[*] Successfully loaded {len(contracts)} contracts from JSON.")
+
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    previous = _load_manifest(manifest_path)
+    # LazyContracts (graph cache) answers ids and digests without building contracts
+    cached = isinstance(contracts, LazyContracts)
+    if cached:
+        contract_ids = [contracts.contract_id(i) for i in range(len(contracts))]
+    else:
+        contract_ids = [c.contract_id for c in contracts]
+    names = _file_names(contract_ids, previous)
+
+    def unchanged(cid, digest):
+        return (not force and previous.get(cid, {}).get("hash") == digest
+                and os.path.exists(os.path.join(output_dir, names[cid])))
+
+    manifest, todo = {}, []
+    for i, cid in enumerate(contract_ids):
+        # Graph cache: decide from the stored digest before building anything
+        source_digest = contracts.digest(i) if cached else None
+        if source_digest is not None and unchanged(cid, job_hash(source_digest, detail, layout, max_paths)):
+            manifest[cid] = previous[cid]
+            continue
+        contract = contracts[i]
+        job = contract_job(contract, os.path.join(output_dir, names[cid]), detail, layout, max_paths,
+                           source_digest)
+        # The job holds plain lists; the contract's graphs go back to compact form
+        contract.release()
+        if unchanged(cid, job["hash"]):
+            manifest[cid] = previous[cid]
+        else:
+            todo.append((cid, {"file": names[cid], "hash": job["hash"]}, job))
+
+    written = []
+    if todo:
+        workers = workers or os.cpu_count() or 1
+        if workers > 1 and len(todo) > 1:
+            methods = multiprocessing.get_all_start_methods()
+            ctx = multiprocessing.get_context("fork" if "fork" in methods else None)
+            with ProcessPoolExecutor(min(workers, len(todo)), mp_context=ctx) as pool:
+                # Workers share the (already copied) pyvis lib folder of the working directory
+                rendered = [render_contract(todo[0][2])]
+                rendered += pool.map(render_contract, (job for _, _, job in todo[1:]))
+        else:
+            rendered = [render_contract(job) for _, _, job in todo]
+        for (cid, entry, _), (path, key) in zip(todo, rendered):
+            if key is not None:
+                entry["layout"] = key
+            manifest[cid] = entry
+            written.append(path)
+            print(f"    [+] Generated: {path}")
+
+    # Files of contracts no longer in the data (unless a new contract took the name)
+    current_files = {entry["file"] for entry in manifest.values()}
+    for name in {entry["file"] for entry in previous.values()} - current_files:
+        stale = os.path.join(output_dir, name)
+        if os.path.exists(stale):
+            os.remove(stale)
+            print(f"    [-] Removed: {stale}")
+
+    # Layouts no current file was drawn with
+    LayoutCache(os.path.join(output_dir, LAYOUT_DIR)).prune(
+        entry["layout"] for entry in manifest.values() if "layout" in entry)
+
+    _save_manifest(manifest_path, manifest)
+    print(f"[*] {len(written)} rendered, {len(contracts) - len(todo)} unchanged.")
+    return written
 
-        # 5. Add Nodes to Pyvis
-        for node, attr in G.nodes(data=True):
-            node_type = attr.get("type", "Unknown")
-            
-            # Color Logic: Red for News, Blue for Base
-            if node in news_node_ids:
-                color = "#ff4500" # Red
-            else:
-                color = "#00bfff" # Blue
-
-            net.add_node(
-                node,
-                label=node,
-                title=node_type,
-                color=color,
-                shape="ellipse",
-                font={"size": 16}
-            )
-
-        # 6. Add Edges to Pyvis
-        for u, v, attr in G.edges(data=True):
-            net.add_edge(
-                u,
-                v,
-                label=attr.get("label", ""),
-                arrows="to",
-                font={"size": 14}
-            )
-
-        # 7. Save
-        output_path = os.path.join("outputs/graphs", f"c{i}.html")
-        net.save_graph(output_path)
-        print(f"    [+] Generated: {output_path}")
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render contract + news graphs as interactive HTML.")
+    parser.add_argument("--data", default=r"data/raw/contracts_and_news.json")
+    parser.add_argument("--output-dir", default="outputs/graphs")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Render in a pool of N processes (default: CPU count).")
+    parser.add_argument("--force", action="store_true", help="Redraw every file, ignoring the manifest.")
+    parser.add_argument("--detail", choices=["full", "causal"], default="full",
+                        help="causal: only nodes on causal chains, the rest collapsed by entity type.")
+    parser.add_argument("--layout", choices=["physics", "precomputed"], default="physics",
+                        help="precomputed: lay out in Python (cached) and turn browser physics off.")
+    parser.add_argument("--max-paths", type=int, default=DEFAULT_MAX_PATHS,
+                        help=f"Chains kept by --detail causal, shortest first (default: {DEFAULT_MAX_PATHS}).")
+    args = parser.parse_args(argv)
+    if args.max_paths < 0:
+        parser.error("--max-paths must be non-negative")
+    generate_visualizations(args.data, args.output_dir, args.workers, args.force,
+                            args.detail, args.layout, args.max_paths)
 
 if __name__ == "__main__":
-    generate_visualizations()
+    main()
@@ -0,0 +1,157 @@
+import json
+import random
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+from src.reasoning_engine import RISK_TARGET_TYPES
+
+# Non-target entity types, roughly the mix of the hand-written dataset
+INTERMEDIATE_TYPES = [
+    "Company", "Supplier", "Country", "Location", "Infrastructure", "Port",
+    "LogisticsProvider", "Material", "Facility", "Manufacturer", "Route", "Utility"
+]
+# Entities that several contracts (and the news) tend to share
+SHARED_TYPES = ["Country", "Port", "Route", "Utility", "LogisticsProvider"]
+EVENT_TYPES = ["WeatherEvent", "RiskEvent", "ConflictEvent", "SocialEvent"]
+RELATION_TYPES = [
+    "SUPPLIES", "PRODUCES", "LOCATED_IN", "SHIPPED_VIA", "DEPENDS_ON",
+    "TRANSPORTED_BY", "SOURCES_FROM", "REQUIRES", "OPERATES", "CONNECTED_TO"
+]
+NEWS_RELATION_TYPES = ["HITS", "DISRUPTS", "BLOCKS", "CLOSES", "FLOODS", "TRIGGERS"]
+
+
+@dataclass
+class SyntheticConfig:
+    """
+    Shape of a generated graph forest.
+
+    nodes_per_contract: base-graph entities per contract.
+    branching: children per entity when growing each base graph from its owner.
+    cycle_density: extra edges per node pointing back to earlier entities,
+        creating cycles (and more simple paths).
+    shared_ratio: fraction of base entities drawn from a pool shared by all
+        contracts, which become bridges when the news touches them.
+    target_ratio: fraction of entities whose type is a risk target.
+    target_mix: relative weight of each risk target type.
+    news_nodes: entities per news sequence (the event plus its chain).
+    news_bridges: base entities the news chain ends on, shared ones first.
+    """
+    n_contracts: int = 10
+    nodes_per_contract: int = 30
+    branching: int = 3
+    cycle_density: float = 0.2
+    shared_ratio: float = 0.1
+    target_ratio: float = 0.15
+    target_mix: Dict[str, float] = field(default_factory=lambda: {t: 1.0 for t in sorted(RISK_TARGET_TYPES)})
+    news_nodes: int = 4
+    news_bridges: int = 1
+    shared_pool: int = 50
+    seed: int = 0
+
+
+class SyntheticForest:
+    """
+    Deterministic generator of contracts in the contracts_and_news.json schema.
+    The same config (including seed) always yields the same records.
+    """
+
+    def __init__(self, config: SyntheticConfig = None):
+        self.config = config or SyntheticConfig()
+        rng = random.Random(self.config.seed)
+        self.shared = []
+        for i in range(self.config.shared_pool):
+            entity_type = rng.choice(SHARED_TYPES)
+            self.shared.append({"id": f"Shared_{entity_type}_{i}", "type": entity_type})
+
+    def _entity_type(self, rng: random.Random) -> str:
+        config = self.config
+        if rng.random() < config.target_ratio:
+            types, weights = zip(*config.target_mix.items())
+            return rng.choices(types, weights)[0]
+        return rng.choice(INTERMEDIATE_TYPES)
+
+    def contract(self, index: int) -> Dict:
+        """The raw record of contract `index`, independent of the others."""
+        config = self.config
+        rng = random.Random(f"{config.seed}:{index}")
+        cid = f"S{index:05d}"
+
+        owner = {"id": f"{cid}_Owner", "type": "Company"}
+        entities = [owner]
+        seen = {owner["id"]}
+        relations = []
+        frontier = [owner["id"]]
+        order = [owner["id"]]
+        while len(entities) < config.nodes_per_contract and frontier:
+            parent = frontier.pop(0)
+            for _ in range(config.branching):
+                if len(entities) >= config.nodes_per_contract:
+                    break
+                if rng.random() < config.shared_ratio:
+                    entity = rng.choice(self.shared)
+                else:
+                    entity = {"id": f"{cid}_E{len(entities)}", "type": self._entity_type(rng)}
+                if entity["id"] not in seen:
+                    seen.add(entity["id"])
+                    entities.append(entity)
+                    frontier.append(entity["id"])
+                    order.append(entity["id"])
+                relations.append({"source": parent, "target": entity["id"], "type": rng.choice(RELATION_TYPES)})
+
+        # Back edges to earlier entities close cycles
+        for _ in range(int(config.cycle_density * len(order))):
+            i = rng.randrange(1, len(order))
+            j = rng.randrange(0, i)
+            relations.append({"source": order[i], "target": order[j], "type": rng.choice(RELATION_TYPES)})
+
+        # News: an event chain ending on shared or contract entities (the bridges)
+        event = {"id": f"{cid}_Event", "type": rng.choice(EVENT_TYPES)}
+        news_entities = [event]
+        news_relations = []
+        previous = event["id"]
+        for k in range(max(config.news_nodes - 2, 0)):
+            node = {"id": f"{cid}_News{k}", "type": "Location"}
+            news_entities.append(node)
+            news_relations.append({"source": previous, "target": node["id"], "type": rng.choice(NEWS_RELATION_TYPES)})
+            previous = node["id"]
+        shared_in_base = [e for e in entities if e["id"].startswith("Shared_")]
+        own = [e for e in entities[1:] if not e["id"].startswith("Shared_")] or entities
+        rng.shuffle(shared_in_base)
+        rng.shuffle(own)
+        for bridge in (shared_in_base + own)[:max(config.news_bridges, 1)]:
+            news_entities.append(dict(bridge))
+            news_relations.append({"source": previous, "target": bridge["id"], "type": rng.choice(NEWS_RELATION_TYPES)})
+
+        return {
+            "contract_id": cid,
+            "title": f"Synthetic contract {index}",
+            "contract_text": f"{owner['id']} sources {config.nodes_per_contract - 1} entities.",
+            "base_graph": {"entities": entities, "relations": relations},
+            "news_sequence": {"entities": news_entities, "relations": news_relations},
+        }
+
+    def __iter__(self) -> Iterator[Dict]:
+        for i in range(self.config.n_contracts):
+            yield self.contract(i)
+
+    def generate(self) -> List[Dict]:
+        return list(self)
+
+    def write(self, path) -> Path:
+        """
+        Writes the forest as a JSON array, or one record per line when the
+        suffix is .jsonl/.ndjson (both readable by DataLoader).
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            if path.suffix in (".jsonl", ".ndjson"):
+                for entry in self:
+                    f.write(json.dumps(entry) + "\n")
+            else:
+                f.write("[\n")
+                for i, entry in enumerate(self):
+                    f.write((",\n" if i else "") + json.dumps(entry))
+                f.write("\n]\n")
+        return path
@@ -0,0 +1,148 @@
+"""
+Local stand-ins for the Neo4j graph and LLM, used by the tests (the driver
+stand-in lives in src.fake_driver, shared with the benchmarks). They record
+every round trip instead of talking to a server, and can inject a fixed
+per-round-trip latency to mimic network cost.
+"""
+import re
+import threading
+import time
+import types
+
+from langchain_core.language_models.fake_chat_models import SimpleChatModel
+
+class FakeNeo4jGraph:
+    """
+    In-memory stand-in for langchain's Neo4jGraph over a NetworkX DiGraph.
+    Answers apoc.path.expandConfig traversals from their parameters the way
+    APOC does with uniqueness NODE_PATH, bfs and a terminator-only label
+    filter: undirected simple paths of 1..$max_hops hops that end at the
+    first node whose type is in $label_filter, shortest first, cut at $limit.
+    With apoc=False the procedure is missing (calling it raises) and the
+    plain-Cypher fallback, with its [*1..N] pattern and $target_types, is
+    answered the same way instead. Records every query.
+    """
+
+    def __init__(self, G, latency: float = 0.0, responder=None, apoc: bool = True):
+        self.G = G
+        self.apoc = apoc
+        self.latency = latency
+        # responder(query, params) answers any other (e.g. LLM-generated) query
+        self.responder = responder
+        self.data_version = "v1"
+        self.queries = []
+        self._lock = threading.Lock()
+        self.refresh_schema()
+
+    def refresh_schema(self):
+        node_type = lambda n: self.G.nodes[n].get("type", "Entity")
+        relationships = {
+            (node_type(u), attrs.get("type", "RELATED_TO"), node_type(v))
+            for u, v, attrs in self.G.edges(data=True)
+        }
+        self.structured_schema = {
+            "node_props": {t: [{"property": "id", "type": "STRING"}] for t in {node_type(n) for n in self.G}},
+            "rel_props": {},
+            "relationships": [{"start": s, "type": t, "end": e} for s, t, e in sorted(relationships)],
+            "metadata": {"constraint": [], "index": []},
+        }
+        self.schema = "\n".join(f"(:{r['start']})-[:{r['type']}]->(:{r['end']})"
+                                 for r in self.structured_schema["relationships"])
+
+    @property
+    def get_schema(self):
+        return self.schema
+
+    @property
+    def get_structured_schema(self):
+        return self.structured_schema
+
+    def add_graph_documents(self, graph_documents, include_source=False):
+        """Adds the documents' nodes and relationships, as Neo4jGraph would store them."""
+        for document in graph_documents:
+            for node in document.nodes:
+                self.G.add_node(node.id, type=node.type)
+            for rel in document.relationships:
+                self.G.add_edge(rel.source.id, rel.target.id, type=rel.type)
+        self.refresh_schema()
+
+    def query(self, query, params=None):
+        params = params or {}
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.queries.append((query, params))
+        if "SGSAMeta" in query:
+            return [{"version": self.data_version}]
+        if "SHOW PROCEDURES" in query:
+            return [{"found": int(self.apoc)}]
+        if "apoc.path.expandConfig" in query:
+            if not self.apoc:
+                raise ValueError("There is no procedure with the name `apoc.path.expandConfig` registered")
+            terminators = {label[1:] for label in params["label_filter"].split("|") if label.startswith("/")}
+            return self._traverse(params["event_id"], terminators, params["max_hops"])[:params["limit"]]
+        if "$target_types" in query:
+            max_hops = int(re.search(r"\[\*1\.\.(\d+)\]", query).group(1))
+            return self._traverse(params["event_id"], set(params["target_types"]), max_hops)[:params["limit"]]
+        return self.responder(query, params) if self.responder else []
+
+    def _traverse(self, start, target_types, max_hops):
+        if start not in self.G:
+            return []
+        rows = []
+        frontier = [([start], [])]
+        for _ in range(max_hops):
+            next_frontier = []
+            for path, rels in frontier:
+                node = path[-1]
+                steps = [(v, {"source": node, "target": v}, a) for _, v, a in self.G.out_edges(node, data=True)]
+                steps += [(u, {"source": u, "target": node}, a) for u, _, a in self.G.in_edges(node, data=True)]
+                for nb, rel, attrs in steps:
+                    if nb in path:
+                        continue
+                    rel["type"] = attrs.get("type", "RELATED_TO")
+                    extended = (path + [nb], rels + [rel])
+                    if self.G.nodes[nb].get("type") in target_types:
+                        rows.append({"path": extended[0], "relations": extended[1]})
+                    else:
+                        next_frontier.append(extended)
+            frontier = next_frontier
+        return rows
+
+class FakeLLM:
+    """Chat-model stand-in: records prompts and answers with a fixed message."""
+
+    def __init__(self, answer: str = "summary", latency: float = 0.0):
+        self.answer = answer
+        self.latency = latency
+        self.prompts = []
+
+    def invoke(self, prompt, *args, **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+        self.prompts.append(prompt)
+        return types.SimpleNamespace(content=self.answer)
+
+class FakeChatModel(SimpleChatModel):
+    """
+    Runnable chat-model stand-in for GraphCypherQAChain. Answers Cypher
+    generation prompts with a query for the event in the prompt and QA
+    prompts with "answer for <event>", after an optional latency. Thread-safe,
+    so it can serve concurrent analyses.
+    """
+    latency: float = 0.0
+    prompts: list = []
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def _call(self, messages, stop=None, run_manager=None, **kwargs) -> str:
+        prompt = messages[-1].content
+        if self.latency:
+            time.sleep(self.latency)
+        self.prompts.append(prompt)
+        if "Cypher Query:" in prompt:
+            event = re.search(r"id = '([^']*)'", prompt).group(1)
+            return f"MATCH p = (e {{id: '{event}'}})-[*1..3]-(m) RETURN p"
+        return "answer for " + re.search(r"event '([^']*)'", prompt).group(1)
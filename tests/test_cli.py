@@ -0,0 +1,66 @@
+import unittest
+import io
+import json
+import os
+import subprocess
+import sys
+from contextlib import redirect_stdout
+from unittest import mock
+
+# Add project root to path to import the CLI modules
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
+
+import main
+from src import cli
+
+DATA_PATH = os.path.join(ROOT, 'data', 'raw', 'contracts_and_news.json')
+
+# Import budget of `analyze` (about 0.3 s here; src.graph_rag_engine alone takes about 1.9 s)
+ANALYZE_IMPORT_BUDGET_S = 1.0
+HEAVY_MODULES = ("neo4j", "langchain_core", "langchain_neo4j", "langchain_google_genai", "pyvis", "dotenv")
+
+def import_profile(command):
+    """(seconds of import time, imported module names) of a subcommand, via -X importtime."""
+    code = ("import json, sys, src.cli; __import__(src.cli.COMMANDS[%r][0]); "
+            "print(json.dumps(sorted(sys.modules)))" % command)
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT,
+                          capture_output=True, text=True, check=True)
+    total_us = 0
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Top-level imports only (nested ones are part of their parent's cumulative time)
+        if cumulative.strip().isdigit() and not name[1:].startswith(" "):
+            total_us += int(cumulative)
+    return total_us / 1e6, set(json.loads(proc.stdout))
+
+class TestCli(unittest.TestCase):
+
+    def test_analyze_matches_main(self):
+        argv = ["--data", DATA_PATH, "--no-cache", "--limit", "2"]
+        direct, via_cli = io.StringIO(), io.StringIO()
+        with redirect_stdout(direct):
+            main.main(argv)
+        with redirect_stdout(via_cli):
+            cli.main(["analyze", *argv])
+        self.assertEqual(via_cli.getvalue(), direct.getvalue())
+
+    def test_unknown_command(self):
+        with self.assertRaises(SystemExit), redirect_stdout(io.StringIO()), \
+                mock.patch("sys.stderr", io.StringIO()):
+            cli.main(["nope"])
+
+    def test_analyze_imports_no_backends(self):
+        seconds, modules = import_profile("analyze")
+        self.assertEqual([m for m in HEAVY_MODULES if m in modules], [])
+        self.assertLess(seconds, ANALYZE_IMPORT_BUDGET_S)
+
+        # Ingestion needs the driver, but not the LLM stack
+        _, modules = import_profile("ingest")
+        self.assertIn("neo4j", modules)
+        self.assertNotIn("langchain_core", modules)
+
+if __name__ == '__main__':
+    unittest.main()
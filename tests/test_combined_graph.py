@@ -0,0 +1,110 @@
+import unittest
+import networkx as nx
+import sys
+import os
+
+# Adjust path to import from src
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.combined_graph import CombinedGraph, VersionedDiGraph
+from src.reasoning_engine import ReasoningEngine
+
+class TestCombinedGraph(unittest.TestCase):
+
+    def setUp(self):
+        """Base: Supplier -> Product, News: Storm -> Supplier."""
+        self.G_base = VersionedDiGraph()
+        self.G_base.add_node("Supplier_A", type="Company")
+        self.G_base.add_node("Product_P", type="Product")
+        self.G_base.add_edge("Supplier_A", "Product_P", type="PRODUCES")
+
+        self.G_news = VersionedDiGraph()
+        self.G_news.add_node("Storm_Z", type="Event")
+        self.G_news.add_edge("Storm_Z", "Supplier_A", type="HITS")
+
+        self.combined = CombinedGraph(self.G_base, self.G_news)
+
+    def test_union_is_built_once(self):
+        """Repeated access returns the same cached union."""
+        first = self.combined.graph
+        self.assertIs(self.combined.graph, first)
+        self.assertTrue(nx.is_isomorphic(first, nx.compose(self.G_base, self.G_news)))
+
+    def test_union_is_read_only(self):
+        """The cached union cannot be mutated by callers."""
+        with self.assertRaises(nx.NetworkXError):
+            self.combined.graph.add_node("Intruder")
+
+    def test_invalidates_on_base_change(self):
+        """Mutating the base graph rebuilds the union on next access."""
+        first = self.combined.graph
+        self.G_base.add_edge("Product_P", "Port_Q", type="SHIPPED_FROM")
+        second = self.combined.graph
+        self.assertIsNot(second, first)
+        self.assertTrue(second.has_edge("Product_P", "Port_Q"))
+
+    def test_invalidates_on_news_change(self):
+        """Mutating the news graph rebuilds the union and its adjacency."""
+        self.combined.indexed()
+        self.G_news.remove_edge("Storm_Z", "Supplier_A")
+        node_ids, index, neighbors = self.combined.indexed()
+        self.assertEqual(neighbors(index["Storm_Z"]), [])
+
+    def test_plain_digraph_fallback(self):
+        """Plain DiGraphs are tracked through a fingerprint of their content."""
+        base = nx.DiGraph([("A", "B")])
+        combined = CombinedGraph(base, nx.DiGraph())
+        self.assertEqual(combined.graph.number_of_nodes(), 2)
+        base.add_edge("B", "C")
+        self.assertEqual(combined.graph.number_of_nodes(), 3)
+
+    def test_plain_digraph_edge_swap(self):
+        """Swapping an edge (same node and edge counts) or retyping one rebuilds the union."""
+        engine = ReasoningEngine()
+        base = nx.DiGraph()
+        base.add_node("S", type="Company")
+        base.add_node("X", type="Company")
+        base.add_node("R", type="Risk")
+        base.add_edge("S", "X", type="SUPPLIES")
+        news = nx.DiGraph()
+        news.add_edge("E", "S", type="HITS")
+        combined = CombinedGraph(base, news)
+        self.assertEqual(engine.discover_causal_chain(combined, start_event="E"), [])
+
+        base.remove_edge("S", "X")
+        base.add_edge("S", "R", type="EXPOSES")
+        self.assertEqual([r["path"] for r in engine.discover_causal_chain(combined, start_event="E")],
+                         [["E", "S", "R"]])
+
+        base.edges["S", "R"]["type"] = "MITIGATES"
+        self.assertEqual(combined.graph.edges["S", "R"]["type"], "MITIGATES")
+
+    def test_engine_accepts_combined_graph(self):
+        """Bridge detection, discovery and formatting all take the combined view."""
+        engine = ReasoningEngine()
+        self.assertEqual(engine.find_bridge_nodes(self.combined), {"Supplier_A"})
+
+        results = engine.discover_causal_chain(self.combined, start_event="Storm_Z")
+        self.assertEqual(results[0]['path'], ["Storm_Z", "Supplier_A", "Product_P"])
+        self.assertEqual(
+            engine.get_formatted_chain(results[0]['path'], self.combined),
+            "Storm_Z --(HITS)--> Supplier_A --(PRODUCES)--> Product_P"
+        )
+
+    def test_engine_rejects_mixed_up_arguments(self):
+        """A positional start event after a view, or a lone plain graph, raises instead of finding nothing."""
+        engine = ReasoningEngine()
+        with self.assertRaises(TypeError):
+            engine.discover_causal_chain(self.combined, "Storm_Z")
+        with self.assertRaises(TypeError):
+            engine.iter_causal_chain(self.combined, "Storm_Z")
+        with self.assertRaises(TypeError):
+            engine.discover_causal_chains_batch(self.combined, ["Storm_Z"])
+        with self.assertRaises(TypeError):
+            engine.find_bridge_nodes(self.G_base)
+        with self.assertRaises(TypeError):
+            engine.discover_causal_trie(self.G_base, start_event="Storm_Z")
+        self.assertTrue(engine.discover_causal_chain(self.G_base, self.G_news, "Storm_Z"))
+
+if __name__ == '__main__':
+    unittest.main()
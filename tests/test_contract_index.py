@@ -0,0 +1,75 @@
+import unittest
+import networkx as nx
+import sys
+import os
+
+# Adjust path to import from src
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.contract_index import ContractIndex
+from src.data_loader import DataLoader
+from src.reasoning_engine import ReasoningEngine
+
+DATA_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data', 'raw', 'contracts_and_news.json'))
+
+class TestContractIndex(unittest.TestCase):
+
+    def setUp(self):
+        """Three contracts sharing Taiwan; one news graph hitting Taiwan and a port."""
+        self.index = ContractIndex()
+        self.index.add("C1", ["Supplier_A", "Taiwan", "Port_K"])
+        self.index.add("C2", ["Supplier_B", "Taiwan"])
+        self.index.add("C3", ["Supplier_C", "Germany"])
+
+        self.news = nx.DiGraph()
+        self.news.add_edge("Typhoon", "Taiwan", type="APPROACHES")
+        self.news.add_edge("Typhoon", "Port_K", type="CLOSES")
+
+    def test_find_bridges(self):
+        """Only touched contracts are returned, with their bridge nodes."""
+        self.assertEqual(
+            self.index.find_bridges(self.news),
+            {"C1": {"Taiwan", "Port_K"}, "C2": {"Taiwan"}}
+        )
+        self.assertEqual(self.index.contracts_for("Taiwan"), ["C1", "C2"])
+
+    def test_incremental_updates(self):
+        """Removing and re-adding contracts updates the posting lists."""
+        self.index.remove("C1")
+        self.assertEqual(self.index.find_bridges(self.news), {"C2": {"Taiwan"}})
+        self.assertNotIn("C1", self.index)
+
+        self.index.add("C3", ["Supplier_C", "Port_K"])
+        self.assertEqual(self.index.find_bridges(self.news), {"C2": {"Taiwan"}, "C3": {"Port_K"}})
+        self.assertEqual(len(self.index), 2)
+        self.assertEqual(self.index.contracts_for("Germany"), [])
+
+    def test_churn_leaves_no_residue(self):
+        """Repeatedly replacing contracts keeps only live entries, in add order."""
+        for round_ in range(50):
+            self.index.add("C1", ["Taiwan", f"Supplier_{round_}"])
+        self.assertEqual(self.index.contracts_for("Taiwan"), ["C2", "C1"])
+        self.assertEqual(len(self.index._contract_ids), 3)
+        # Supplier_B, Supplier_C, Germany, Taiwan and the last Supplier_{round}
+        self.assertEqual(len(self.index._postings), 5)
+        posting = self.index._postings["Taiwan"]
+        self.assertEqual(posting.typecode, "i")
+        self.assertEqual(list(posting), sorted(posting))
+
+    def test_matches_pairwise_bridges_on_dataset(self):
+        """For every news graph, the index agrees with pairwise find_bridge_nodes over all contracts."""
+        loader = DataLoader(DATA_PATH)
+        contracts = loader.load()
+        index = loader.build_contract_index(contracts)
+        engine = ReasoningEngine()
+
+        for news_source in contracts:
+            expected = {}
+            for contract in contracts:
+                bridges = engine.find_bridge_nodes(contract.base_graph, news_source.news_graph)
+                if bridges:
+                    expected[contract.contract_id] = bridges
+            self.assertEqual(index.find_bridges(news_source.news_graph), expected)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+import os
+import sys
+import tempfile
+from unittest import mock
+
+import numpy as np
+
+# Adjust path to import from src
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src import graph_layout
+from src.graph_layout import LayoutCache, cached_layout, force_layout
+
+class TestGraphLayout(unittest.TestCase):
+
+    def setUp(self):
+        # A ring of 40 nodes with a few chords
+        self.edges = [(i, (i + 1) % 40) for i in range(40)] + [(0, 20), (10, 30)]
+
+    def test_force_layout_is_deterministic_and_bounded(self):
+        pos = force_layout(40, self.edges, seed=3)
+        self.assertEqual(pos.shape, (40, 2))
+        self.assertTrue(np.isfinite(pos).all())
+        self.assertLessEqual(np.abs(pos).max(), 1.0 + 1e-9)
+        np.testing.assert_array_equal(pos, force_layout(40, self.edges, seed=3))
+        # Chunking only changes how repulsion is summed
+        np.testing.assert_allclose(pos, force_layout(40, self.edges, seed=3, chunk=7), atol=1e-9)
+
+        # Connected nodes end up closer than the average pair
+        dist = lambda a, b: np.hypot(*(pos[a] - pos[b]))
+        edge_mean = np.mean([dist(u, v) for u, v in self.edges])
+        pair_mean = np.mean([dist(u, v) for u in range(40) for v in range(u + 1, 40)])
+        self.assertLess(edge_mean, pair_mean)
+
+    def test_degenerate_graphs(self):
+        self.assertEqual(force_layout(0, []).shape, (0, 2))
+        np.testing.assert_array_equal(force_layout(1, []), [[0.0, 0.0]])
+        self.assertTrue(np.isfinite(force_layout(5, [])).all())
+
+    def test_cache_hits_skip_the_layout(self):
+        nodes = [f"n{i}" for i in range(40)]
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = LayoutCache(tmp)
+            first = cached_layout(nodes, self.edges, cache)
+            self.assertEqual(len(os.listdir(tmp)), 1)
+            with mock.patch.object(graph_layout, "force_layout", side_effect=AssertionError("recomputed")):
+                self.assertEqual(cached_layout(nodes, self.edges, cache), first)
+            # A different graph is a different entry
+            cached_layout(nodes, self.edges[:-1], cache)
+            self.assertEqual(len(os.listdir(tmp)), 2)
+
+if __name__ == '__main__':
+    unittest.main()
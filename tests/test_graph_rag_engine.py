@@ -0,0 +1,320 @@
+import unittest
+import sys
+import os
+import asyncio
+import threading
+import time
+import networkx as nx
+
+# Adjust path to import from src
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+from src.data_loader import DataLoader
+from src.fake_driver import FakeDriver
+from src.graph_rag_engine import (
+    APOC_PROBE_QUERY, GraphRAGEngine, RISK_TRAVERSAL_FALLBACK_QUERY, RISK_TRAVERSAL_QUERY
+)
+from src.neo4j_manager import Neo4jManager
+from src.reasoning_engine import ReasoningEngine, MAX_PATH_LENGTH, RISK_TARGET_TYPES
+from main import find_news_root_cause
+from tests.fakes import FakeChatModel, FakeLLM, FakeNeo4jGraph
+
+DATA_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data', 'raw', 'contracts_and_news.json'))
+
+class TestDeterministicTraversal(unittest.TestCase):
+
+    def setUp(self):
+        self.contract = DataLoader(DATA_PATH).load(verbose=False)[0]
+        self.G = self.contract.combined_graph.graph
+        self.graph = FakeNeo4jGraph(self.G)
+        self.engine = GraphRAGEngine(graph=self.graph, use_llm=False)
+        self.event = find_news_root_cause(self.contract.news_graph)
+
+    def test_prepared_query_mirrors_reasoning_engine(self):
+        """The traversal is fixed text with parameters; depth and target types match ReasoningEngine."""
+        self.engine.find_risk_paths(self.event)
+        query, params = self.graph.queries[-1]
+        self.assertIs(query, RISK_TRAVERSAL_QUERY)
+        self.assertEqual(params["max_hops"], MAX_PATH_LENGTH)
+        self.assertEqual(params["label_filter"].split("|"), ["/" + t for t in sorted(RISK_TARGET_TYPES)])
+        self.assertEqual(params["event_id"], self.event)
+
+    def test_query_prunes_during_expansion(self):
+        """Simplicity and first-target stops are expansion settings, not filters over expanded paths."""
+        query = " ".join(RISK_TRAVERSAL_QUERY.split())
+        self.assertIn("CALL apoc.path.expandConfig(s, {", query)
+        for setting in ("maxLevel: $max_hops", "uniqueness: 'NODE_PATH'", "labelFilter: $label_filter",
+                        "bfs: true", "limit: $limit"):
+            self.assertIn(setting, query)
+        # No variable-length pattern, post-hoc path predicate or sort over all paths
+        for expansion in ("[*", "WHERE", "ORDER BY"):
+            self.assertNotIn(expansion, query)
+
+    def test_paths_match_reasoning_engine(self):
+        """Against the stand-in, the server-side traversal finds the same chains as the local search."""
+        found = self.engine.find_risk_paths(self.event, limit=10 ** 6)
+        expected = ReasoningEngine().discover_causal_chain(self.contract.base_graph, self.contract.news_graph, self.event)
+        self.assertTrue(found)
+        self.assertEqual(sorted(r["path"] for r in found), sorted(r["path"] for r in expected))
+        for r in found:
+            self.assertEqual(r["length"], len(r["path"]))
+            self.assertEqual(r["target"], r["path"][-1])
+
+    def test_fallback_without_apoc(self):
+        """Without APOC the plain variable-length query runs and finds the same chains."""
+        graph = FakeNeo4jGraph(self.G, apoc=False)
+        engine = GraphRAGEngine(graph=graph, use_llm=False)
+        found = engine.find_risk_paths(self.event, limit=10 ** 6)
+        self.assertFalse(engine.use_apoc)
+        self.assertIs(graph.queries[-1][0], RISK_TRAVERSAL_FALLBACK_QUERY)
+        self.assertEqual(graph.queries[-1][1]["target_types"], sorted(RISK_TARGET_TYPES))
+        expected = self.engine.find_risk_paths(self.event, limit=10 ** 6)
+        self.assertEqual([r["path"] for r in found], [r["path"] for r in expected])
+        # The probe runs once per engine
+        engine.find_risk_paths(self.event)
+        self.assertEqual(sum("SHOW PROCEDURES" in q for q, _ in graph.queries), 1)
+
+    def test_company_target_fallback(self):
+        """With no risk target reachable, chains end at Company nodes, as in ReasoningEngine."""
+        base = nx.DiGraph()
+        base.add_node("Supplier_S", type="Company")
+        base.add_node("Buyer_B", type="Company")
+        base.add_node("Port_P", type="Location")
+        base.add_edge("Supplier_S", "Port_P", type="SHIPS_FROM")
+        base.add_edge("Buyer_B", "Supplier_S", type="BUYS_FROM")
+        news = nx.DiGraph()
+        news.add_node("Strike_E", type="Event")
+        news.add_edge("Strike_E", "Port_P", type="CLOSES")
+        expected = ReasoningEngine().discover_causal_chain(base, news, "Strike_E")
+        self.assertTrue(expected)
+
+        for apoc in (True, False):
+            engine = GraphRAGEngine(graph=FakeNeo4jGraph(nx.compose(base, news), apoc=apoc), use_llm=False)
+            found = engine.find_risk_paths("Strike_E")
+            self.assertEqual([r["path"] for r in found], [r["path"] for r in expected])
+
+    def test_format_path_matches_local_formatting(self):
+        reasoning = ReasoningEngine()
+        for r in self.engine.find_risk_paths(self.event, limit=20):
+            self.assertEqual(self.engine.format_path(r), reasoning.get_formatted_chain(r["path"], self.G))
+
+    def test_screen_risk_without_llm(self):
+        result = self.engine.screen_risk(self.event, limit=5)
+        self.assertEqual(result["event"], self.event)
+        self.assertLessEqual(len(result["paths"]), 5)
+        self.assertIsNone(result["summary"])
+        with self.assertRaises(ValueError):
+            self.engine.screen_risk(self.event, summarize=True)
+
+    def test_screen_risk_summarizes_once(self):
+        llm = FakeLLM(answer="risk summary")
+        engine = GraphRAGEngine(graph=self.graph, llm=llm)
+        result = engine.screen_risk(self.event, summarize=True, limit=3)
+        self.assertEqual(result["summary"], "risk summary")
+        self.assertEqual(len(llm.prompts), 1)
+        self.assertIn(engine.format_path(result["paths"][0]), llm.prompts[0])
+
+    def test_unknown_event_skips_llm(self):
+        llm = FakeLLM()
+        engine = GraphRAGEngine(graph=self.graph, llm=llm)
+        result = engine.screen_risk("No_Such_Event", summarize=True)
+        self.assertEqual(result["paths"], [])
+        self.assertEqual(llm.prompts, [])
+
+GENERATED_CYPHER = "MATCH p = (e {id: 'Typhoon_Krathon'})-[*1..3]-(m) RETURN p"
+
+class TestAnalysisCache(unittest.TestCase):
+
+    def setUp(self):
+        contract = DataLoader(DATA_PATH).load(verbose=False)[0]
+        self.graph = FakeNeo4jGraph(contract.combined_graph.graph, responder=lambda q, p: [{"p": "path"}])
+        self.llm = FakeListChatModel(responses=[GENERATED_CYPHER, "answer"])
+        self.engine = GraphRAGEngine(graph=self.graph, llm=self.llm)
+
+    def llm_calls(self):
+        return self.llm.i
+
+    def test_chain_built_once(self):
+        chain = self.engine.chain
+        self.engine.analyze_risk("Typhoon_Krathon")
+        self.engine.analyze_risk("Trade_Union_GDL")
+        self.assertIs(self.engine.chain, chain)
+
+    def test_repeated_event_hits_answer_cache(self):
+        self.assertEqual(self.engine.analyze_risk("Typhoon_Krathon"), "answer")
+        calls, queries = self.llm_calls(), len(self.graph.queries)
+        self.assertEqual(self.engine.analyze_risk("Typhoon_Krathon"), "answer")
+        self.assertEqual(self.llm_calls(), calls)
+        self.assertEqual(len(self.graph.queries), queries)
+
+    def test_new_data_reuses_cypher(self):
+        """After an ingestion only the query and the QA call run again, not Cypher generation."""
+        manager = Neo4jManager(driver=FakeDriver())
+        manager.add_listener(self.engine.on_data_changed)
+        self.engine.analyze_risk("Typhoon_Krathon")
+        manager.clear_database()
+
+        self.llm.responses = ["fresh answer", "unused"]
+        self.llm.i = 0
+        self.assertEqual(self.engine.analyze_risk("Typhoon_Krathon"), "fresh answer")
+        self.assertEqual(self.llm_calls(), 1)
+        self.assertEqual(self.graph.queries[-1][0], GENERATED_CYPHER)
+        self.assertEqual(self.engine.data_version(), manager.data_version)
+
+    def test_disk_cache_shared_across_engines(self):
+        import tempfile
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "rag.sqlite")
+            first = GraphRAGEngine(graph=self.graph, llm=self.llm, cache_path=path)
+            self.assertEqual(first.analyze_risk("Typhoon_Krathon"), "answer")
+
+            llm = FakeListChatModel(responses=["unused", "unused"])
+            second = GraphRAGEngine(graph=self.graph, llm=llm, cache_path=path)
+            self.assertEqual(second.analyze_risk("Typhoon_Krathon"), "answer")
+            self.assertEqual(llm.i, 0)
+            first.cypher_cache.close(), first.answer_cache.close()
+            second.cypher_cache.close(), second.answer_cache.close()
+
+    def test_disk_cache_follows_foreign_ingestion(self):
+        """An engine notices a re-ingest by another process instead of serving its old answers."""
+        import tempfile
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "rag.sqlite")
+            engine = GraphRAGEngine(graph=self.graph, llm=self.llm, cache_path=path, version_ttl=0)
+            self.assertEqual(engine.analyze_risk("Typhoon_Krathon"), "answer")
+            self.graph.data_version = "v2"
+
+            self.llm.responses = ["fresh answer"]
+            self.llm.i = 0
+            self.assertEqual(engine.analyze_risk("Typhoon_Krathon"), "fresh answer")
+            self.assertEqual(engine.data_version(), "v2")
+            engine.cypher_cache.close(), engine.answer_cache.close()
+
+def collect(engine, events, **kwargs):
+    async def run():
+        return [item async for item in engine.analyze_risks(events, **kwargs)]
+    return asyncio.run(run())
+
+class TestConcurrentAnalysis(unittest.TestCase):
+
+    def setUp(self):
+        contract = DataLoader(DATA_PATH).load(verbose=False)[0]
+        self.G = contract.combined_graph.graph
+
+    def engine(self, llm_latency=0.0, responder=None, graph_latency=0.0):
+        self.llm = FakeChatModel(latency=llm_latency)
+        self.graph = FakeNeo4jGraph(self.G, latency=graph_latency, responder=responder)
+        return GraphRAGEngine(graph=self.graph, llm=self.llm)
+
+    def test_overlaps_latency(self):
+        """Six analyses of ~3 round trips each finish in far less than six sequential ones."""
+        engine = self.engine(llm_latency=0.05, graph_latency=0.05)
+        events = [f"Event_{i}" for i in range(6)]
+        t0 = time.perf_counter()
+        results = dict(collect(engine, events, max_concurrency=6))
+        elapsed = time.perf_counter() - t0
+        self.assertEqual(results, {e: f"answer for {e}" for e in events})
+        self.assertLess(elapsed, 6 * 0.15 / 2)
+
+    def test_duplicates_are_coalesced(self):
+        engine = self.engine(llm_latency=0.01)
+        results = collect(engine, ["A", "B", "A", "A"])
+        self.assertEqual(sorted(results), [("A", "answer for A"), ("B", "answer for B")])
+        # One Cypher generation and one QA call per distinct event
+        self.assertEqual(len(self.llm.prompts), 4)
+        self.assertEqual(engine._inflight, {})
+
+    def test_results_stream_as_completed(self):
+        slow = lambda query, params: time.sleep(0.3 if "Slow" in query else 0) or []
+        engine = self.engine(responder=slow)
+        results = collect(engine, ["Slow_Event", "Fast_Event"])
+        self.assertEqual([event for event, _ in results], ["Fast_Event", "Slow_Event"])
+
+    def test_timeout(self):
+        engine = self.engine(llm_latency=0.3)
+        (event, answer), = collect(engine, ["A"], timeout=0.05)
+        self.assertEqual(event, "A")
+        self.assertIn("timed out", answer)
+
+    def test_timed_out_worker_keeps_its_slot(self):
+        """A timed-out analysis holds its slot until its thread finishes, so threads never pile up."""
+        engine = self.engine(llm_latency=0.1)
+        lock, running, peak = threading.Lock(), [0], [0]
+        analyze = engine.analyze_risk
+
+        def tracked(event):
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            try:
+                return analyze(event)
+            finally:
+                with lock:
+                    running[0] -= 1
+
+        engine.analyze_risk = tracked
+        results = dict(collect(engine, ["A", "B", "C"], max_concurrency=1, timeout=0.02))
+        self.assertTrue(all("timed out" in answer for answer in results.values()))
+        self.assertEqual(peak[0], 1)
+
+    def test_rate_limit(self):
+        engine = self.engine()
+        t0 = time.perf_counter()
+        collect(engine, ["A", "B", "C", "D"], rate=20, burst=1)
+        # First request uses the burst, the other three wait 50ms each
+        self.assertGreaterEqual(time.perf_counter() - t0, 0.14)
+
+@unittest.skipUnless(os.getenv("NEO4J_TEST_URI"), "set NEO4J_TEST_URI to run against a local Neo4j")
+class TestDeterministicTraversalNeo4j(unittest.TestCase):
+    """Runs the prepared query against a real (disposable) database."""
+
+    def test_matches_reasoning_engine(self):
+        from langchain_neo4j import Neo4jGraph
+        from neo4j import GraphDatabase
+        from src.neo4j_manager import Neo4jManager
+
+        contract = DataLoader(DATA_PATH).load(verbose=False)[0]
+        auth = (os.getenv("NEO4J_TEST_USERNAME", "neo4j"), os.getenv("NEO4J_TEST_PASSWORD", "password"))
+        manager = Neo4jManager(driver=GraphDatabase.driver(os.environ["NEO4J_TEST_URI"], auth=auth))
+        try:
+            manager.clear_database()
+            manager.ingest_contracts([contract])
+        finally:
+            manager.close()
+
+        graph = Neo4jGraph(url=os.environ["NEO4J_TEST_URI"], username=auth[0], password=auth[1])
+        event = find_news_root_cause(contract.news_graph)
+        expected = ReasoningEngine().discover_causal_chain(contract.base_graph, contract.news_graph, event)
+        # Probed (APOC if installed), then the plain-Cypher fallback
+        for use_apoc in (None, False):
+            engine = GraphRAGEngine(graph=graph, use_llm=False, use_apoc=use_apoc)
+            found = engine.find_risk_paths(event, limit=10 ** 6)
+            self.assertEqual(sorted(r["path"] for r in found), sorted(r["path"] for r in expected))
+            lengths = [r["length"] for r in found]
+            self.assertEqual(lengths, sorted(lengths))
+
+    def test_plan_has_no_variable_length_expand(self):
+        """EXPLAIN: the expansion runs inside the procedure, not as a VarLengthExpand + Filter."""
+        from neo4j import GraphDatabase
+
+        auth = (os.getenv("NEO4J_TEST_USERNAME", "neo4j"), os.getenv("NEO4J_TEST_PASSWORD", "password"))
+        with GraphDatabase.driver(os.environ["NEO4J_TEST_URI"], auth=auth) as driver, driver.session() as session:
+            if not session.run(APOC_PROBE_QUERY).single()["found"]:
+                self.skipTest("APOC is not installed")
+            plan = session.run("EXPLAIN " + RISK_TRAVERSAL_QUERY, {
+                "event_id": "x", "max_hops": MAX_PATH_LENGTH, "label_filter": "/Risk", "limit": 1
+            }).consume().plan
+
+        def operators(node):
+            yield node["operatorType"]
+            for child in node.get("children", []):
+                yield from operators(child)
+
+        names = list(operators(plan))
+        self.assertTrue(any(name.startswith("ProcedureCall") for name in names), names)
+        self.assertFalse([name for name in names if "VarLengthExpand" in name], names)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,14 +1,20 @@
 import unittest
+import gc
 import os
 import json
 import tempfile
 import sys
+import tracemalloc
+import weakref
+from unittest import mock
 import networkx as nx
 
 # Add src to path to import modules
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from src.data_loader import DataLoader
+from src import graph_cache
+from src.data_loader import ContractData, DataLoader
+from src.synthetic_data import SyntheticConfig, SyntheticForest
 
 class TestDataLoader(unittest.TestCase):
     
@@ -36,8 +42,11 @@ class TestDataLoader(unittest.TestCase):
         self.temp_file.close()
 
     def tearDown(self):
-        """Remove the temp file after test."""
+        """Remove the temp file (and any compiled cache) after test."""
         os.remove(self.temp_file.name)
+        cache_path = self.temp_file.name + ".sgsa-cache"
+        if os.path.exists(cache_path):
+            os.remove(cache_path)
 
     def test_load_contract_count(self):
         """Ensure it loads the correct number of contracts."""
@@ -61,5 +70,213 @@ class TestDataLoader(unittest.TestCase):
         self.assertIsInstance(contract.news_graph, nx.DiGraph)
         self.assertTrue(contract.news_graph.has_node("X"))
 
+    def test_iter_contracts_streams_array(self):
+        """Streaming with a tiny read size yields the same contracts as load()."""
+        self.test_data.append(dict(self.test_data[0], contract_id="C_TEST_02", title="Second [contract], with {braces}"))
+        with open(self.temp_file.name, 'w') as f:
+            json.dump(self.test_data, f, indent=4)
+
+        loader = DataLoader(self.temp_file.name)
+        streamed = list(loader.iter_contracts(chunk_size=7))
+        self.assertEqual([c.contract_id for c in streamed], ["C_TEST_01", "C_TEST_02"])
+        self.assertEqual(streamed[1].title, "Second [contract], with {braces}")
+        self.assertTrue(streamed[1].base_graph.has_edge("A", "B"))
+
+    def test_iter_contracts_is_lazy(self):
+        """Contracts are produced one at a time from the generator."""
+        contracts = DataLoader(self.temp_file.name).iter_contracts()
+        self.assertEqual(next(contracts).contract_id, "C_TEST_01")
+        with self.assertRaises(StopIteration):
+            next(contracts)
+
+    def test_iter_contracts_jsonl(self):
+        """Newline-delimited JSON is read one contract per line."""
+        jsonl = tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.jsonl')
+        for cid in ("L1", "L2"):
+            jsonl.write(json.dumps(dict(self.test_data[0], contract_id=cid)) + "\n\n")
+        jsonl.close()
+        try:
+            contracts = DataLoader(jsonl.name).load()
+            self.assertEqual([c.contract_id for c in contracts], ["L1", "L2"])
+            self.assertTrue(contracts[1].news_graph.has_node("X"))
+        finally:
+            os.remove(jsonl.name)
+
+    def test_iter_contracts_rejects_truncated_array(self):
+        """A truncated array is reported instead of silently dropping data."""
+        with open(self.temp_file.name, 'w') as f:
+            f.write(json.dumps(self.test_data)[:-5])
+        with self.assertRaises(ValueError):
+            list(DataLoader(self.temp_file.name).iter_contracts(chunk_size=16))
+
+    def test_cache_round_trip(self):
+        """A cached load rebuilds the same contracts lazily from the memory-mapped file."""
+        plain = DataLoader(self.temp_file.name).load()
+        cached = DataLoader(self.temp_file.name, use_cache=True).load()
+        self.assertTrue(os.path.exists(self.temp_file.name + ".sgsa-cache"))
+
+        reopened = DataLoader(self.temp_file.name, use_cache=True).load()
+        self.assertEqual(len(reopened), 1)
+        for contracts in (cached, reopened):
+            contract = contracts[0]
+            self.assertIs(contracts[0], contract, "contracts are built once per access")
+            self.assertEqual(contract.contract_text, plain[0].contract_text)
+            self.assertEqual(list(contract.base_graph.edges(data=True)), list(plain[0].base_graph.edges(data=True)))
+            self.assertEqual(list(contract.news_graph.nodes(data=True)), list(plain[0].news_graph.nodes(data=True)))
+
+    def test_truncated_cache_is_rebuilt(self):
+        """A cache cut short behind an intact header is recompiled from the source."""
+        DataLoader(self.temp_file.name, use_cache=True).load()
+        cache_path = self.temp_file.name + ".sgsa-cache"
+        with open(cache_path, "r+b") as f:
+            f.truncate(os.path.getsize(cache_path) // 2)
+
+        contracts = DataLoader(self.temp_file.name, use_cache=True).load()
+        self.assertEqual(contracts[0].contract_id, "C_TEST_01")
+        self.assertTrue(contracts[0].base_graph.has_edge("A", "B"))
+
+    def test_touched_source_is_hashed_once(self):
+        """After a touch with unchanged content, only the first load rehashes the source."""
+        DataLoader(self.temp_file.name, use_cache=True).load()
+        st = os.stat(self.temp_file.name)
+        os.utime(self.temp_file.name, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+
+        with mock.patch.object(graph_cache, "file_sha256", wraps=graph_cache.file_sha256) as sha:
+            DataLoader(self.temp_file.name, use_cache=True).load()
+            self.assertEqual(sha.call_count, 1, "rehashed, cache kept")
+            contracts = DataLoader(self.temp_file.name, use_cache=True).load()
+            self.assertEqual(sha.call_count, 1, "second run takes the mtime fast path")
+        self.assertEqual(contracts[0].contract_id, "C_TEST_01")
+
+    def test_cache_invalidated_by_source_change(self):
+        """Editing the source file regenerates the cache on the next load."""
+        DataLoader(self.temp_file.name, use_cache=True).load()
+
+        self.test_data[0]["contract_id"] = "C_TEST_CHANGED"
+        with open(self.temp_file.name, 'w') as f:
+            json.dump(self.test_data, f, indent=2)
+
+        contracts = DataLoader(self.temp_file.name, use_cache=True).load()
+        self.assertEqual(contracts[0].contract_id, "C_TEST_CHANGED")
+
+    def test_compact_contracts(self):
+        """Graphs are packed over shared pools and unpack into the same DiGraphs; text stays in the source."""
+        self.test_data.append(dict(self.test_data[0], contract_id="C_TEST_02", contract_text="Other text."))
+        with open(self.temp_file.name, 'w') as f:
+            json.dump(self.test_data, f)
+        loader = DataLoader(self.temp_file.name)
+        first, second = loader.load()
+
+        self.assertFalse(hasattr(first, "__dict__"))
+        self.assertIsNone(first._text)
+        self.assertEqual([c.contract_text for c in (first, second)], ["Sample text.", "Other text."])
+
+        expected = loader.json_to_graph(self.test_data[0]["base_graph"])
+        self.assertEqual(list(first.base_graph.nodes(data=True)), list(expected.nodes(data=True)))
+        self.assertEqual(list(first.base_graph.edges(data=True)), list(expected.edges(data=True)))
+        self.assertIs(first.base_graph, first.base_graph, "graphs are unpacked once")
+        # One string object per entity, whichever contract mentions it
+        a1 = next(n for n in first.base_graph if n == "A")
+        a2 = next(n for n in second.base_graph if n == "A")
+        self.assertIs(a1, a2)
+
+    def test_pools_are_scoped_to_a_load(self):
+        """Each load packs over its own entity pools, which are freed with its contracts."""
+        for use_cache in (True, False):
+            loader = DataLoader(self.temp_file.name, use_cache=use_cache)
+            contracts = loader.load(verbose=False)
+            pools = weakref.ref(contracts[0]._base_graph.pools)
+            self.assertIs(contracts[0]._news_graph.pools, pools())
+            self.assertIsNot(loader.load(verbose=False)[0]._base_graph.pools, pools())
+            del contracts
+            gc.collect()
+            self.assertIsNone(pools())
+
+    def test_compact_memory(self):
+        """After analysis and release(), contracts hold at least 5x less than DiGraph pairs plus text."""
+        entries = [dict(e, contract_text="x" * 500)
+                   for e in SyntheticForest(SyntheticConfig(n_contracts=200, nodes_per_contract=30, seed=7))]
+        with open(self.temp_file.name, 'w') as f:
+            json.dump(entries, f)
+        loader = DataLoader(self.temp_file.name)
+
+        def traced(fn):
+            tracemalloc.start()
+            result = fn()
+            # DiGraphs hold reference cycles (cached edge views); count only live objects
+            gc.collect()
+            size, _ = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            return result, size
+
+        def analysed(contracts):
+            # The state analysis builds: unpacked graphs, combined view, risk index
+            for contract in contracts:
+                contract.combined_graph.indexed()
+                contract.risk_index
+                contract.release()
+            return contracts
+
+        _, compact = traced(lambda: analysed(loader.load(verbose=False)))
+        _, full = traced(lambda: analysed([
+            ContractData(e["contract_id"], e["title"], e["contract_text"],
+                         loader.json_to_graph(e["base_graph"]), loader.json_to_graph(e["news_sequence"]))
+            for e in loader._iter_entries()
+        ]))
+        self.assertGreaterEqual(full / compact, 5)
+
+    def test_release_keeps_modified_graphs(self):
+        """release() repacks unchanged graphs only; edits made after unpacking survive it."""
+        contract = DataLoader(self.temp_file.name).load()[0]
+        edges = list(contract.base_graph.edges(data=True))
+        contract.combined_graph
+        contract.release()
+        self.assertIsNone(contract._combined)
+        self.assertNotIsInstance(contract._base_graph, nx.DiGraph)
+        self.assertEqual(list(contract.base_graph.edges(data=True)), edges)
+
+        contract.base_graph.add_edge("B", "C", type="R2")
+        contract.release()
+        self.assertTrue(contract.base_graph.has_edge("B", "C"))
+
+    def test_text_follows_its_source_snapshot(self):
+        """Texts are never read from another record: a rewritten source gives None, a cache snapshot stays valid."""
+        self.test_data.append(dict(self.test_data[0], contract_id="C_TEST_02", contract_text="Other text."))
+        with open(self.temp_file.name, 'w') as f:
+            json.dump(self.test_data, f)
+        loader = DataLoader(self.temp_file.name)
+        plain = loader.load()
+        cached = DataLoader(self.temp_file.name, use_cache=True).load()
+        self.assertEqual(plain[1].contract_text, "Other text.")
+
+        # Same records, reordered, with a different size: no text rather than the wrong one
+        with open(self.temp_file.name, 'w') as f:
+            json.dump(self.test_data[::-1], f, indent=1)
+        self.assertIsNone(plain[1].contract_text)
+
+        reloaded = DataLoader(self.temp_file.name, use_cache=True).load()
+        self.assertEqual(reloaded[0].contract_id, "C_TEST_02")
+        self.assertEqual([c.contract_text for c in cached], ["Sample text.", "Other text."])
+        self.assertEqual([c.contract_text for c in reloaded], ["Other text.", "Sample text."])
+
+    def test_text_offsets_multibyte(self):
+        """Byte offsets stay exact across non-ASCII text, tiny reads and JSONL."""
+        self.test_data = [dict(self.test_data[0], contract_id=f"C{i}", contract_text=f"قرارداد {i} – ✓")
+                          for i in range(3)]
+        with open(self.temp_file.name, 'w', encoding='utf-8') as f:
+            json.dump(self.test_data, f, ensure_ascii=False, indent=2)
+        streamed = list(DataLoader(self.temp_file.name).iter_contracts(chunk_size=5))
+        self.assertEqual([c.contract_text for c in streamed], [e["contract_text"] for e in self.test_data])
+
+        jsonl = tempfile.NamedTemporaryFile(mode='w', encoding='utf-8', delete=False, suffix='.jsonl')
+        for entry in self.test_data:
+            jsonl.write(json.dumps(entry, ensure_ascii=False) + "\r\n")
+        jsonl.close()
+        try:
+            contracts = DataLoader(jsonl.name).load()
+            self.assertEqual([c.contract_text for c in contracts], [e["contract_text"] for e in self.test_data])
+        finally:
+            os.remove(jsonl.name)
+
 if __name__ == '__main__':
     unittest.main()
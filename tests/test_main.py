@@ -0,0 +1,61 @@
+import unittest
+import io
+import os
+import sys
+from contextlib import redirect_stdout
+
+# Add project root to path to import the CLI module
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import main
+
+DATA_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data', 'raw', 'contracts_and_news.json'))
+
+def run_main(*argv):
+    buf = io.StringIO()
+    with redirect_stdout(buf):
+        main.main(["--data", DATA_PATH, "--no-cache", *argv])
+    return buf.getvalue()
+
+class TestMain(unittest.TestCase):
+
+    def test_parallel_output_matches_sequential(self):
+        """The process-pool mode prints the same report, byte for byte, in contract order."""
+        sequential = run_main()
+        self.assertIn("--- Contract: C10", sequential)
+        self.assertEqual(run_main("--workers", "3"), sequential)
+        self.assertEqual(run_main("--workers", "2", "--all-roots", "--backend", "csr"),
+                         run_main("--all-roots", "--backend", "csr"))
+
+    def test_spawned_workers_match_sequential(self):
+        """Spawned workers (own hash seed, reloaded contracts) print the same blocks."""
+        args = main.parse_args(["--data", DATA_PATH, "--no-cache", "--workers", "2"])
+        contracts = main.DataLoader(DATA_PATH).load(verbose=False)
+        engine = main.ReasoningEngine()
+        sequential = [main.analyze_one(engine, contract, args)[0] for contract in contracts]
+        spawned = [block for block, _ in main.analyze_parallel(contracts, 2, args, start_method="spawn")]
+        self.assertEqual(spawned, sequential)
+
+    def test_profile_adds_lines_only(self):
+        """--profile adds one line per contract plus a total, and changes nothing else."""
+        plain = run_main()
+        for argv in ((), ("--workers", "2")):
+            profiled = run_main("--profile", *argv).splitlines()
+            profile_lines = [line for line in profiled if "[profile]" in line]
+            self.assertEqual(len(profile_lines), plain.count("--- Contract:") + 1)
+            self.assertTrue(profile_lines[-1].startswith("[profile] total:"))
+            self.assertEqual([line for line in profiled if "[profile]" not in line], plain.splitlines())
+
+    def test_limit_keeps_shortest_paths(self):
+        """--limit N keeps each trigger's first N paths of the full report."""
+        plain = run_main().splitlines()
+        limited = run_main("--limit", "1").splitlines()
+        self.assertEqual(
+            [line for line in limited if "Path 1:" in line],
+            [line for line in plain if "Path 1:" in line]
+        )
+        self.assertFalse([line for line in limited if "Path 2:" in line])
+        self.assertEqual(run_main("--limit", "1000"), run_main())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,276 @@
+import unittest
+import sys
+import os
+
+# Adjust path to import from src
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.data_loader import DataLoader
+from neo4j.exceptions import TransientError
+
+from src.neo4j_manager import Neo4jManager
+from src.fake_driver import FakeDriver
+
+class ManifestStore:
+    """FakeDriver responder that remembers the sync manifests written to it."""
+
+    def __init__(self):
+        self.manifests = {}
+
+    def __call__(self, query, params):
+        if "SET m.contract_id" in query:
+            for row in params["rows"]:
+                self.manifests[row["key"]] = row
+        elif "DELETE m" in query:
+            for row in params["rows"]:
+                self.manifests.pop(row["key"], None)
+        elif "RETURN m.contract_id AS contract_id, m.fingerprint" in query:
+            return [{"contract_id": m["contract_id"], "fingerprint": m["fingerprint"]} for m in self.manifests.values()]
+        elif "RETURN m.contract_id AS contract_id, m.manifest" in query:
+            return [{"contract_id": self.manifests[k]["contract_id"], "manifest": self.manifests[k]["manifest"]}
+                    for k in params["keys"] if k in self.manifests]
+        return None
+
+DATA_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data', 'raw', 'contracts_and_news.json'))
+
+class TestNeo4jManager(unittest.TestCase):
+
+    def setUp(self):
+        self.contract = DataLoader(DATA_PATH).load(verbose=False)[0]
+        self.driver = FakeDriver()
+
+    def test_bulk_ingestion_batches_rows(self):
+        """Bulk mode sends one UNWIND query per type group and batch, inside write transactions."""
+        manager = Neo4jManager(driver=self.driver, batch_size=2)
+        manager.ingest_contract_data(self.contract)
+
+        schema, *writes, version = self.driver.queries
+        self.assertIn("CREATE CONSTRAINT entity_id IF NOT EXISTS", schema[0])
+        self.assertIn("SGSAMeta", version[0])
+        self.assertTrue(all(in_tx and "UNWIND $rows AS row" in q for q, _, in_tx in writes))
+        self.assertTrue(all(len(p["rows"]) <= 2 for _, p, _ in writes))
+
+        # Every node and edge is sent (bridges shared by both graphs only once)
+        node_rows = [r["id"] for q, p, _ in writes if "MERGE (n:Entity" in q for r in p["rows"]]
+        edge_rows = [(r["source"], r["target"]) for q, p, _ in writes if "MERGE (a)-[r:" in q for r in p["rows"]]
+        expected_nodes = list(self.contract.base_graph.nodes()) + list(self.contract.news_graph.nodes())
+        expected_edges = list(self.contract.base_graph.edges()) + list(self.contract.news_graph.edges())
+        self.assertEqual(len(node_rows), len(set(node_rows)))
+        self.assertEqual(set(node_rows), set(expected_nodes))
+        self.assertEqual(len(edge_rows), len(set(edge_rows)))
+        self.assertEqual(set(edge_rows), set(expected_edges))
+
+    def test_bulk_uses_fewer_round_trips(self):
+        """UNWIND batching needs far fewer round trips than per-row queries."""
+        Neo4jManager(driver=self.driver).ingest_contract_data(self.contract)
+        bulk_trips = len(self.driver.queries)
+
+        legacy = FakeDriver()
+        Neo4jManager(driver=legacy).ingest_contract_data(self.contract, bulk=False)
+        self.assertLess(bulk_trips, len(legacy.queries))
+
+    def test_bulk_matches_sequential_last_write(self):
+        """Grouped rows carry the category a one-by-one ingestion would leave behind."""
+        contracts = DataLoader(DATA_PATH).load(verbose=False)
+        Neo4jManager(driver=self.driver).ingest_contracts(contracts)
+
+        expected = {}
+        for contract in contracts:
+            for node_id in contract.base_graph.nodes():
+                expected[node_id] = "Base"
+            for node_id in contract.news_graph.nodes():
+                expected[node_id] = "News"
+        actual = {r["id"]: r["category"] for q, p, _ in self.driver.queries if "MERGE (n:Entity" in q for r in p["rows"]}
+        self.assertEqual(actual, expected)
+        self.assertEqual(actual["Taiwan"], "News")
+
+    def test_schema_created_once(self):
+        """The constraint is only created before the first bulk ingestion."""
+        manager = Neo4jManager(driver=self.driver)
+        manager.ingest_contract_data(self.contract)
+        manager.ingest_contract_data(self.contract)
+        constraints = [q for q, _, _ in self.driver.queries if "CREATE CONSTRAINT" in q]
+        self.assertEqual(len(constraints), 1)
+
+    def test_concurrent_ingestion_sends_same_rows(self):
+        """The thread-pool mode writes the same batches, all nodes before any edge."""
+        contracts = DataLoader(DATA_PATH).load(verbose=False)
+        sequential = FakeDriver()
+        Neo4jManager(driver=sequential, batch_size=3).ingest_contracts(contracts)
+
+        concurrent = FakeDriver(latency=0.001)
+        stats = Neo4jManager(driver=concurrent, batch_size=3).ingest_contracts(contracts, max_workers=4)
+
+        def batches(driver):
+            return sorted((q, repr(p)) for q, p, _ in driver.queries if "SGSAMeta" not in q)
+        self.assertEqual(batches(concurrent), batches(sequential))
+
+        kinds = ["edge" if "MERGE (a)-[r:" in q else "node" for q, _, _ in concurrent.queries[1:-1]]
+        self.assertEqual(kinds, sorted(kinds, key=lambda k: k == "edge"))
+        self.assertEqual(stats.batches, len(concurrent.queries) - 2)
+        self.assertEqual(stats.contracts, len(contracts))
+        self.assertGreater(stats.rows_per_second, 0)
+
+    def test_deadlocks_are_retried(self):
+        """Transient errors (e.g. deadlocks on shared entities) are retried and counted."""
+        deadlock = TransientError("Neo.TransientError.Transaction.DeadlockDetected")
+        self.driver.inject_failure("MERGE (a)-[r:", deadlock, times=2)
+        manager = Neo4jManager(driver=self.driver, retry_backoff=0)
+        stats = manager.ingest_contracts([self.contract], max_workers=2)
+
+        self.assertEqual(stats.retries, 2)
+        self.assertEqual(stats.failures, 0)
+        self.assertEqual(manager.stats.retries, 2)
+
+    def test_retries_are_bounded(self):
+        """A batch that keeps failing is reported instead of retried forever."""
+        self.driver.inject_failure("MERGE (n:Entity", TransientError("lock timeout"), times=10)
+        manager = Neo4jManager(driver=self.driver, max_retries=2, retry_backoff=0)
+        with self.assertRaises(TransientError):
+            manager.ingest_contracts([self.contract])
+        self.assertEqual(manager.stats.failures, 1)
+        self.assertEqual(manager.stats.retries, 2)
+
+    def test_data_version_changes_on_every_write(self):
+        """Ingesting or clearing stores a new data version and notifies listeners."""
+        manager = Neo4jManager(driver=self.driver)
+        seen = []
+        manager.add_listener(seen.append)
+        manager.ingest_contract_data(self.contract)
+        manager.clear_database()
+        manager.ingest_contract_data(self.contract)
+
+        self.assertEqual(len(seen), 3)
+        self.assertEqual(len(set(seen)), 3)
+        self.assertEqual(manager.data_version, seen[-1])
+        written = [p["version"] for q, p, _ in self.driver.queries if "SGSAMeta" in q]
+        self.assertEqual(written, seen)
+
+class TestDeltaSync(unittest.TestCase):
+
+    def setUp(self):
+        self.contracts = DataLoader(DATA_PATH).load(verbose=False)
+        self.store = ManifestStore()
+        self.driver = FakeDriver(responder=self.store)
+        self.manager = Neo4jManager(driver=self.driver, batch_size=4)
+
+    def writes(self):
+        """(kind, row) for every row sent since the last call."""
+        rows = []
+        for query, params, in_tx in self.driver.queries:
+            if "DETACH DELETE n" in query:
+                kind = "node-"
+            elif "DELETE r" in query:
+                kind = "edge-"
+            elif "MERGE (n:Entity" in query:
+                kind = "node+"
+            elif "MERGE (a)-[r:" in query:
+                kind = "edge+"
+            else:
+                continue
+            rows.extend((kind, row) for row in params["rows"])
+        self.driver.queries.clear()
+        return rows
+
+    def test_unchanged_contracts_are_skipped(self):
+        stats = self.manager.sync_contracts(self.contracts)
+        self.assertEqual((stats.contracts, stats.unchanged), (len(self.contracts), 0))
+        full = self.writes()
+        self.assertEqual({kind for kind, _ in full}, {"node+", "edge+"})
+        version = self.manager.data_version
+
+        stats = self.manager.sync_contracts(self.contracts)
+        self.assertEqual((stats.contracts, stats.unchanged), (0, len(self.contracts)))
+        self.assertEqual(self.writes(), [])
+        self.assertEqual(self.manager.data_version, version)
+
+    def test_single_contract_change_sends_only_the_delta(self):
+        self.manager.sync_contracts(self.contracts)
+        self.writes()
+
+        contract = self.contracts[0]
+        contract.base_graph.add_node("New_Warehouse", type="Facility")
+        contract.base_graph.add_edge("TechCore_Inc", "New_Warehouse", type="STORES_AT")
+        removed = "GPU_Chips"
+        dropped_edges = [(u, v) for u, v in contract.base_graph.edges() if removed in (u, v)]
+        contract.base_graph.remove_node(removed)
+        stats = self.manager.sync_contracts(self.contracts)
+
+        self.assertEqual((stats.contracts, stats.unchanged), (1, len(self.contracts) - 1))
+        rows = self.writes()
+        self.assertEqual([row["id"] for kind, row in rows if kind == "node+"], ["New_Warehouse"])
+        self.assertEqual([(row["source"], row["target"]) for kind, row in rows if kind == "edge+"],
+                         [("TechCore_Inc", "New_Warehouse")])
+        self.assertEqual([row["id"] for kind, row in rows if kind == "node-"], [removed])
+        self.assertEqual(sorted((row["source"], row["target"]) for kind, row in rows if kind == "edge-"),
+                         sorted(dropped_edges))
+        self.assertTrue(all(row["contract"] == contract.contract_id for kind, row in rows if kind.endswith("-")))
+
+    def test_removals_are_bounded_auto_commit_batches(self):
+        self.manager.sync_contracts(self.contracts)
+        self.driver.queries.clear()
+        stats = self.manager.sync_contracts(self.contracts[1:], prune=True)
+        self.assertEqual(stats.pruned, 1)
+
+        deletes = [(q, p, in_tx) for q, p, in_tx in self.driver.queries if "IN TRANSACTIONS OF 4 ROWS" in q]
+        self.assertTrue(deletes)
+        self.assertTrue(all(not in_tx and len(p["rows"]) <= 4 for _, p, in_tx in deletes))
+        self.assertNotIn("contract:" + self.contracts[0].contract_id, self.store.manifests)
+
+        # The pruned contract comes back in full
+        stats = self.manager.sync_contracts(self.contracts)
+        self.assertEqual((stats.contracts, stats.nodes_removed), (1, 0))
+
+    def test_clear_database_is_batched(self):
+        self.manager.clear_database()
+        query, _, in_tx = self.driver.queries[0]
+        self.assertIn("DETACH DELETE n } IN TRANSACTIONS OF 4 ROWS", query)
+        self.assertFalse(in_tx)
+
+@unittest.skipUnless(os.getenv("NEO4J_TEST_URI"), "set NEO4J_TEST_URI to run against a local Neo4j")
+class TestDeltaSyncNeo4j(unittest.TestCase):
+    """Runs the provenance-removal Cypher against a real (disposable) database."""
+
+    def setUp(self):
+        from neo4j import GraphDatabase
+        auth = (os.getenv("NEO4J_TEST_USERNAME", "neo4j"), os.getenv("NEO4J_TEST_PASSWORD", "password"))
+        self.driver = GraphDatabase.driver(os.environ["NEO4J_TEST_URI"], auth=auth)
+        self.manager = Neo4jManager(driver=self.driver, batch_size=2)
+        self.manager.clear_database()
+        self.contracts = DataLoader(DATA_PATH).load(verbose=False)
+
+    def tearDown(self):
+        self.manager.close()
+
+    def provenance(self, node_id):
+        """Sorted `contracts` of an entity, or None once it is deleted."""
+        with self.driver.session() as session:
+            record = session.run("MATCH (n:Entity {id: $id}) RETURN n.contracts AS contracts", id=node_id).single()
+        return None if record is None else sorted(record["contracts"])
+
+    def test_prune_keeps_shared_entities(self):
+        self.manager.sync_contracts(self.contracts)
+        pruned, kept = self.contracts[0], self.contracts[1:]
+        own = set(pruned.base_graph) | set(pruned.news_graph)
+        others = set().union(*(set(c.base_graph) | set(c.news_graph) for c in kept))
+        exclusive, shared = sorted(own - others)[0], sorted(own & others)[0]
+        self.assertIn(pruned.contract_id, self.provenance(shared))
+
+        stats = self.manager.sync_contracts(kept, prune=True)
+        self.assertEqual(stats.pruned, 1)
+        self.assertIsNone(self.provenance(exclusive))
+        self.assertNotIn(pruned.contract_id, self.provenance(shared))
+        with self.driver.session() as session:
+            left = session.run("MATCH ()-[r]->() WHERE $cid IN r.contracts RETURN count(r) AS n",
+                               cid=pruned.contract_id).single()["n"]
+        self.assertEqual(left, 0)
+
+    def test_removed_node_and_edges_are_deleted(self):
+        self.manager.sync_contracts(self.contracts)
+        contract = self.contracts[0]
+        contract.base_graph.remove_node("GPU_Chips")
+        self.manager.sync_contracts(self.contracts)
+        self.assertIsNone(self.provenance("GPU_Chips"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+import json
+import sys
+import os
+import tempfile
+
+# Adjust path to import from src
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.csr_graph import CSRGraph
+from src.data_loader import DataLoader
+from src.path_trie import PathTrie
+from src.reasoning_engine import ReasoningEngine
+from src.synthetic_data import SyntheticConfig, SyntheticForest
+
+DATA_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data', 'raw', 'contracts_and_news.json'))
+
+class TestPathTrie(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = ReasoningEngine()
+        forest = SyntheticForest(SyntheticConfig(n_contracts=4, nodes_per_contract=40, cycle_density=0.6,
+                                                 target_ratio=0.05, seed=1))
+        with tempfile.TemporaryDirectory() as tmp:
+            self.synthetic = DataLoader(forest.write(os.path.join(tmp, "forest.json"))).load(verbose=False)
+
+    def test_matches_flat_results_and_formatting(self):
+        """Both backends give the flat result list and get_formatted_chain strings back, in order."""
+        contracts = DataLoader(DATA_PATH).load(verbose=False)
+        cases = [(c, event) for c in contracts for event in c.news_graph.nodes()]
+        cases += [(c, c.contract_id + "_Event") for c in self.synthetic]
+        for contract, event in cases:
+            combined = contract.combined_graph
+            results = self.engine.discover_causal_chain(combined, start_event=event)
+            expected = [self.engine.get_formatted_chain(r["path"], combined) for r in results]
+            for graph in (combined, CSRGraph.from_networkx(combined.graph)):
+                trie = self.engine.discover_causal_trie(graph, start_event=event)
+                self.assertEqual(trie.results(), results, f"{contract.contract_id}/{event}")
+                self.assertEqual(trie.format_chains(), expected)
+
+    def test_prefixes_are_shared(self):
+        for contract in self.synthetic:
+            start = contract.contract_id + "_Event"
+            trie = self.engine.discover_causal_trie(contract.combined_graph, start_event=start)
+            total = sum(len(path) for path in map(trie.path, trie.leaves))
+            self.assertGreater(len(trie), 10)
+            self.assertLess(trie.size * 2, total)
+
+    def test_tree_and_json(self):
+        contract = self.synthetic[0]
+        trie = self.engine.discover_causal_trie(contract.combined_graph, start_event=contract.contract_id + "_Event")
+        lines = trie.render_tree()
+        self.assertEqual(len(lines), trie.size)
+        self.assertEqual(sum(line.endswith("[target]") for line in lines), len(trie))
+
+        data = json.loads(trie.to_json())
+        self.assertEqual((data["chains"], data["nodes"]), (len(trie), trie.size))
+        chains = []
+        stack = [(data["tree"], [])]
+        while stack:
+            entry, prefix = stack.pop()
+            path = prefix + [entry["node"]]
+            if entry.get("target"):
+                chains.append(path)
+            stack.extend((child, path) for child in entry.get("children", []))
+        self.assertEqual(sorted(chains), sorted(r["path"] for r in trie.results()))
+
+    def test_from_paths(self):
+        graph = self.synthetic[0].combined_graph.graph
+        trie = PathTrie.from_paths([], graph, "Nowhere")
+        self.assertEqual((len(trie), trie.size), (0, 1))
+        with self.assertRaises(ValueError):
+            PathTrie.from_paths([["A", "B"], ["C", "B"]], graph)
+
+if __name__ == '__main__':
+    unittest.main()
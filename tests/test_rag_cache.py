@@ -0,0 +1,84 @@
+import unittest
+import sys
+import os
+import tempfile
+
+# Adjust path to import from src
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.rag_cache import LRUCache
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+class TestLRUCache(unittest.TestCase):
+
+    def test_lru_eviction(self):
+        cache = LRUCache(maxsize=2)
+        cache.set(("a",), 1)
+        cache.set(("b",), 2)
+        cache.get(("a",))
+        cache.set(("c",), 3)
+        self.assertIn(("a",), cache)
+        self.assertNotIn(("b",), cache)
+        self.assertEqual(len(cache), 2)
+
+    def test_ttl_expiry(self):
+        clock = FakeClock()
+        cache = LRUCache(ttl=10, clock=clock)
+        cache.set(("a",), "x")
+        clock.now += 9
+        self.assertEqual(cache.get(("a",)), "x")
+        clock.now += 2
+        self.assertIsNone(cache.get(("a",)))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_sqlite_backing(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cache.sqlite")
+            clock = FakeClock()
+            writer = LRUCache(ttl=10, path=path, namespace="answer", clock=clock)
+            writer.set(("MATCH (n) RETURN n", "v1"), "answer")
+            writer.close()
+
+            reader = LRUCache(ttl=10, path=path, namespace="answer", clock=clock)
+            other = LRUCache(path=path, namespace="cypher", clock=clock)
+            self.assertEqual(reader.get(("MATCH (n) RETURN n", "v1")), "answer")
+            self.assertIsNone(other.get(("MATCH (n) RETURN n", "v1")))
+
+            reader.clear()
+            clock.now += 11
+            self.assertIsNone(reader.get(("MATCH (n) RETURN n", "v1")))
+            reader.close()
+            other.close()
+
+    def test_sqlite_eviction(self):
+        """The disk level keeps disk_maxsize rows per namespace, evicting the least recently used."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cache.sqlite")
+            clock = FakeClock()
+            cache = LRUCache(maxsize=1, path=path, namespace="answer", clock=clock, disk_maxsize=2)
+            other = LRUCache(maxsize=1, path=path, namespace="cypher", clock=clock)
+            other.set(("q",), "kept")
+            for key in ("a", "b"):
+                clock.now += 1
+                cache.set((key,), key.upper())
+            clock.now += 1
+            self.assertEqual(cache.get(("a",)), "A")   # read back from disk: now more recent than b
+            clock.now += 1
+            cache.set(("c",), "C")
+
+            reader = LRUCache(maxsize=10, path=path, namespace="answer", clock=clock)
+            self.assertEqual([reader.get((key,)) for key in ("a", "b", "c")], ["A", None, "C"])
+            self.assertEqual(other.get(("q",)), "kept")
+            rows = cache._db.execute("SELECT count(*) FROM rag_cache").fetchone()[0]
+            self.assertEqual(rows, 3)
+            for c in (cache, other, reader):
+                c.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import unittest
+import sys
+import os
+import asyncio
+import time
+
+# Adjust path to import from src
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.rate_limiter import TokenBucket
+
+class TestTokenBucket(unittest.TestCase):
+
+    def test_burst_then_rate(self):
+        async def run():
+            bucket = TokenBucket(rate=50, capacity=5)
+            stamps = []
+            for _ in range(10):
+                await bucket.acquire()
+                stamps.append(time.perf_counter())
+            return stamps
+
+        stamps = asyncio.run(run())
+        # Five tokens are available at once, the other five refill at 20ms each
+        self.assertLess(stamps[4] - stamps[0], 0.02)
+        self.assertGreaterEqual(stamps[9] - stamps[0], 0.09)
+
+    def test_concurrent_waiters_share_the_rate(self):
+        async def run():
+            bucket = TokenBucket(rate=100, capacity=1)
+            t0 = time.perf_counter()
+            await asyncio.gather(*(bucket.acquire() for _ in range(6)))
+            return time.perf_counter() - t0
+
+        self.assertGreaterEqual(asyncio.run(run()), 0.045)
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            TokenBucket(rate=0)
+        with self.assertRaises(ValueError):
+            asyncio.run(TokenBucket(rate=1, capacity=1).acquire(2))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,11 +2,74 @@ import unittest
 import networkx as nx
 import sys
 import os
+import tempfile
 
 # Adjust path to import from src
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from src.reasoning_engine import ReasoningEngine
+from src.reasoning_engine import ReasoningEngine, RISK_TARGET_TYPES
+from src.data_loader import DataLoader
+from src.csr_graph import CSRGraph
+from src.path_engine import TraversalStats
+from src.synthetic_data import SyntheticConfig, SyntheticForest
+
+DATA_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data', 'raw', 'contracts_and_news.json'))
+
+def reference_causal_chain(base_graph, news_graph, start_event):
+    """Path-copying BFS the engine originally shipped with, kept as the oracle."""
+    G_combined = nx.compose(base_graph, news_graph)
+    target_types = {
+        "Risk", "RiskCondition", "FinancialCondition", "Obligation",
+        "Penalty", "Condition", "Prohibition", "Product"
+    }
+    targets = {n for n, attr in G_combined.nodes(data=True) if attr.get("type") in target_types}
+    if not targets:
+        targets = {n for n, attr in G_combined.nodes(data=True) if attr.get("type") == "Company"}
+    if not G_combined.has_node(start_event):
+        return []
+
+    queue = [[start_event]]
+    found_paths = []
+    while queue:
+        path = queue.pop(0)
+        node = path[-1]
+        if node in targets and node != start_event:
+            found_paths.append(path)
+            continue
+        if len(path) > 10:
+            continue
+        neighbors = list(G_combined.successors(node)) + list(G_combined.predecessors(node))
+        for neighbor in neighbors:
+            if neighbor not in path:
+                new_path = list(path)
+                new_path.append(neighbor)
+                queue.append(new_path)
+
+    results = [{"target": p[-1], "path": p, "length": len(p)} for p in found_paths]
+    results.sort(key=lambda x: x['length'])
+    return results
+
+def reference_stats(G_combined, start_event, targets):
+    """Counters of the oracle BFS: (expanded, generated, peak queue, depth-pruned, paths)."""
+    queue = [[start_event]]
+    expanded = pruned = paths = 0
+    generated = peak = 1
+    while queue:
+        peak = max(peak, len(queue))
+        path = queue.pop(0)
+        node = path[-1]
+        if node in targets and node != start_event:
+            paths += 1
+            continue
+        if len(path) > 10:
+            pruned += 1
+            continue
+        expanded += 1
+        for neighbor in list(G_combined.successors(node)) + list(G_combined.predecessors(node)):
+            if neighbor not in path:
+                queue.append(path + [neighbor])
+                generated += 1
+    return expanded, generated, peak, pruned, paths
 
 class TestReasoningEngine(unittest.TestCase):
     
@@ -52,5 +115,260 @@ class TestReasoningEngine(unittest.TestCase):
         self.assertEqual(path[-1], "Product_Risk")
         self.assertIn("Supplier_A", path, "Path must cross the bridge node")
 
+    def test_causal_chain_diamond_paths(self):
+        """Both branches of a diamond must be reported, shortest first."""
+        self.G_base.add_node("Warehouse_W", type="Location")
+        self.G_base.add_edge("Supplier_A", "Warehouse_W", type="stores_at")
+        self.G_base.add_edge("Warehouse_W", "Material_X", type="ships")
+        results = self.engine.discover_causal_chain(self.G_base, self.G_news, start_event="Storm_Z")
+
+        paths = [r['path'] for r in results]
+        self.assertIn(["Storm_Z", "Region_Y", "Supplier_A", "Material_X", "Product_Risk"], paths)
+        self.assertIn(["Storm_Z", "Region_Y", "Supplier_A", "Warehouse_W", "Material_X", "Product_Risk"], paths)
+        self.assertEqual([r['length'] for r in results], sorted(r['length'] for r in results))
+
+    def test_causal_chain_unknown_start(self):
+        """An event that is in neither graph yields no paths."""
+        self.assertEqual(self.engine.discover_causal_chain(self.G_base, self.G_news, "Unknown"), [])
+
+    def test_matches_reference_on_dataset(self):
+        """Every news entity of the bundled dataset yields exactly the reference paths, in order."""
+        contracts = DataLoader(DATA_PATH).load()
+        for contract in contracts:
+            for event in contract.news_graph.nodes():
+                expected = reference_causal_chain(contract.base_graph, contract.news_graph, event)
+                actual = self.engine.discover_causal_chain(contract.base_graph, contract.news_graph, event)
+                self.assertEqual(actual, expected, f"{contract.contract_id}/{event}")
+
+    def test_csr_backend_matches_reference(self):
+        """The CSR traversal returns the same paths, in the same order, as the reference BFS."""
+        contracts = DataLoader(DATA_PATH).load(build_csr=True)
+        for contract in contracts:
+            self.assertIsInstance(contract.csr, CSRGraph)
+            for event in contract.news_graph.nodes():
+                expected = reference_causal_chain(contract.base_graph, contract.news_graph, event)
+                actual = self.engine.discover_causal_chain(contract.csr, start_event=event)
+                self.assertEqual(actual, expected, f"{contract.contract_id}/{event}")
+
+    def test_csr_follows_graph_updates(self):
+        """A contract's CSR snapshot is rebuilt after its news graph changes."""
+        contract = DataLoader(DATA_PATH).load(build_csr=True, verbose=False)[0]
+        snapshot = contract.csr
+        self.assertIs(contract.csr, snapshot)
+        contract.news_graph.add_edge("Flash_Strike", "Taiwan", type="HITS")
+        self.assertIsNot(contract.csr, snapshot)
+        self.assertEqual(
+            self.engine.discover_causal_chain(contract.csr, start_event="Flash_Strike"),
+            self.engine.discover_causal_chain(contract.combined_graph, start_event="Flash_Strike"),
+        )
+        self.assertTrue(contract.csr.has_node("Flash_Strike"))
+
+    def test_csr_formatting(self):
+        """Chains format identically from the CSR arrays and from the composed graph."""
+        combined = nx.compose(self.G_base, self.G_news)
+        csr = CSRGraph.from_networkx(combined)
+        path = ["Storm_Z", "Region_Y", "Supplier_A", "Material_X", "Product_Risk"]
+        self.assertEqual(
+            self.engine.get_formatted_chain(path, csr),
+            self.engine.get_formatted_chain(path, combined)
+        )
+
+    def test_batch_matches_single_runs(self):
+        """Batched discovery over all news entities equals one call per entity, on both backends."""
+        contracts = DataLoader(DATA_PATH).load(build_csr=True)
+        for contract in contracts:
+            events = list(contract.news_graph.nodes()) + ["Unknown_Event"]
+            batch = self.engine.discover_causal_chains_batch(contract.combined_graph, start_events=events)
+            csr_batch = self.engine.discover_causal_chains_batch(contract.csr, start_events=events)
+            self.assertEqual(list(batch), events)
+            for event in events:
+                expected = self.engine.discover_causal_chain(contract.base_graph, contract.news_graph, event)
+                self.assertEqual(batch[event], expected, f"{contract.contract_id}/{event}")
+                self.assertEqual(csr_batch[event], expected, f"{contract.contract_id}/{event} (csr)")
+
+class TestTraversalStats(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = ReasoningEngine()
+        forest = SyntheticForest(SyntheticConfig(n_contracts=6, nodes_per_contract=25, cycle_density=0.5,
+                                                 target_ratio=0.05, seed=3))
+        with tempfile.TemporaryDirectory() as tmp:
+            self.contracts = DataLoader(forest.write(os.path.join(tmp, "forest.json"))).load(verbose=False)
+
+    def counters(self, stats):
+        return stats.expanded, stats.generated, stats.peak_frontier, stats.depth_pruned, stats.paths
+
+    def test_counters_match_reference(self):
+        pruned = 0
+        for contract in self.contracts:
+            G = contract.combined_graph.graph
+            start = contract.contract_id + "_Event"
+            stats = TraversalStats()
+            results = self.engine.discover_causal_chain(contract.combined_graph, start_event=start, stats=stats)
+            targets = {n for n, t in G.nodes(data="type") if t in RISK_TARGET_TYPES}
+            targets = targets or {n for n, t in G.nodes(data="type") if t == "Company"}
+            self.assertEqual(self.counters(stats), reference_stats(G, start, targets))
+            self.assertEqual(stats.paths, len(results))
+            self.assertEqual(set(stats.timings), {"compose", "target_scan", "search", "sort"})
+            pruned += stats.depth_pruned
+        self.assertGreater(pruned, 0)
+
+    def test_csr_counters_agree(self):
+        """Both backends see the same paths; only the frontier is measured per level on CSR."""
+        for contract in self.contracts:
+            start = contract.contract_id + "_Event"
+            nx_stats, csr_stats = TraversalStats(), TraversalStats()
+            self.engine.discover_causal_chain(contract.combined_graph, start_event=start, stats=nx_stats)
+            csr = CSRGraph.from_networkx(contract.combined_graph.graph)
+            self.engine.discover_causal_chain(csr, start_event=start, stats=csr_stats)
+            self.assertEqual((nx_stats.expanded, nx_stats.generated, nx_stats.depth_pruned, nx_stats.paths),
+                             (csr_stats.expanded, csr_stats.generated, csr_stats.depth_pruned, csr_stats.paths))
+
+    def test_batch_stats_and_merge(self):
+        contract = self.contracts[0]
+        starts = [contract.contract_id + "_Event", contract.contract_id + "_News0"]
+        batch_stats = TraversalStats()
+        self.engine.discover_causal_chains_batch(contract.combined_graph, start_events=starts, stats=batch_stats)
+
+        total = TraversalStats()
+        for start in starts:
+            single = TraversalStats()
+            self.engine.discover_causal_chain(contract.combined_graph, start_event=start, stats=single)
+            total.merge(single)
+        self.assertEqual((batch_stats.searches, batch_stats.expanded, batch_stats.generated, batch_stats.paths),
+                         (total.searches, total.expanded, total.generated, total.paths))
+
+    def test_iter_matches_and_stops_early(self):
+        for contract in self.contracts:
+            start = contract.contract_id + "_Event"
+            csr = CSRGraph.from_networkx(contract.combined_graph.graph)
+            for graph in (contract.combined_graph, csr):
+                full_stats = TraversalStats()
+                results = self.engine.discover_causal_chain(graph, start_event=start, stats=full_stats)
+                self.assertEqual(list(self.engine.iter_causal_chain(graph, start_event=start)), results)
+                if len(results) < 2:
+                    continue
+
+                stats = TraversalStats()
+                chains = self.engine.iter_causal_chain(graph, start_event=start, stats=stats)
+                self.assertEqual(next(chains), results[0])
+                chains.close()
+                # Abandoning the search settles its stats: less work, fewer paths
+                # (CSR finds a whole level at once)
+                self.assertLess(stats.paths, full_stats.paths)
+                self.assertLess(stats.generated, full_stats.generated)
+                self.assertIn("search", stats.timings)
+
+def reference_weighted_chains(G_combined, start_event, edge_weights, target_costs):
+    """Every chain with its weighted cost, by exhaustive search (the top-k oracle)."""
+    targets = {n: target_costs.get(t, 0.0) for n, t in G_combined.nodes(data="type") if t in RISK_TARGET_TYPES}
+    if not targets:
+        targets = {n: 0.0 for n, t in G_combined.nodes(data="type") if t == "Company"}
+    queue = [([start_event], 0.0)]
+    found = []
+    while queue:
+        path, cost = queue.pop(0)
+        node = path[-1]
+        if node in targets and node != start_event:
+            found.append((cost + targets[node], path))
+            continue
+        if len(path) > 10:
+            continue
+        steps = list(G_combined.succ[node].items()) + list(G_combined.pred[node].items())
+        for neighbor, attr in steps:
+            if neighbor not in path:
+                queue.append((path + [neighbor], cost + edge_weights.get(attr.get("type"), 1.0)))
+    return sorted(found, key=lambda item: item[0])
+
+class TestTopKChains(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = ReasoningEngine()
+        forest = SyntheticForest(SyntheticConfig(n_contracts=8, nodes_per_contract=25, cycle_density=0.4,
+                                                 target_ratio=0.15, news_bridges=2, seed=5))
+        with tempfile.TemporaryDirectory() as tmp:
+            self.contracts = DataLoader(forest.write(os.path.join(tmp, "forest.json"))).load(verbose=False)
+        self.edge_weights = {"LOCATED_IN": 0.25, "SUPPLIES": 0.5, "DEPENDS_ON": 2.0, "HITS": 0.1}
+        self.target_costs = {"Penalty": 0.0, "Product": 3.0, "Obligation": 1.0}
+
+    def test_matches_exhaustive_ranking(self):
+        for contract in self.contracts:
+            start = contract.contract_id + "_Event"
+            G = contract.combined_graph.graph
+            expected = reference_weighted_chains(G, start, self.edge_weights, self.target_costs)
+            for backend in (contract.combined_graph, CSRGraph.from_networkx(G)):
+                top = self.engine.discover_top_k_chains(backend, start_event=start, k=5, edge_weights=self.edge_weights,
+                                                        target_costs=self.target_costs)
+                self.assertEqual(len(top), min(5, len(expected)))
+                self.assertEqual([round(r["cost"], 9) for r in top], [round(c, 9) for c, _ in expected[:len(top)]])
+                all_paths = {tuple(p) for _, p in expected}
+                self.assertTrue(all(tuple(r["path"]) in all_paths for r in top))
+
+    def test_uniform_weights_give_shortest_chains(self):
+        """With unit weights and equal target costs, the top k are the k shortest chains."""
+        contract = self.contracts[0]
+        start = contract.contract_id + "_Event"
+        full = self.engine.discover_causal_chain(contract.combined_graph, start_event=start)
+        top = self.engine.discover_top_k_chains(contract.combined_graph, start_event=start, k=len(full) + 5,
+                                                edge_weights={}, target_costs={})
+        self.assertEqual(sorted(map(tuple, (r["path"] for r in top))), sorted(map(tuple, (r["path"] for r in full))))
+        self.assertEqual([r["length"] for r in top], [r["length"] for r in full])
+
+    def test_priorities_reorder_targets(self):
+        G = nx.DiGraph()
+        G.add_node("Event", type="Event")
+        G.add_node("Hub", type="Company")
+        G.add_node("Chip", type="Product")
+        G.add_node("Fine", type="Penalty")
+        G.add_edge("Event", "Hub", type="HITS")
+        G.add_edge("Hub", "Chip", type="PRODUCES")
+        G.add_edge("Hub", "Fine", type="OWES")
+        top = self.engine.discover_top_k_chains(G, nx.DiGraph(), "Event", k=1)
+        self.assertEqual(top[0]["target"], "Fine")
+        top = self.engine.discover_top_k_chains(G, nx.DiGraph(), "Event", k=1, edge_weights={"PRODUCES": 0.1, "OWES": 5})
+        self.assertEqual(top[0]["target"], "Chip")
+
+    def test_prepared_inputs_follow_graph_version(self):
+        """Adjacency and heuristic are built once per graph version and weights, not per call."""
+        contract = self.contracts[0]
+        combined = contract.combined_graph
+        start = contract.contract_id + "_Event"
+        built = []
+        prepare = self.engine._best_first_inputs
+        self.engine._best_first_inputs = lambda *args: built.append(args) or prepare(*args)
+
+        first = self.engine.discover_top_k_chains(combined, start_event=start, k=3)
+        self.assertEqual(self.engine.discover_top_k_chains(combined, start_event=start, k=3), first)
+        self.assertEqual(len(built), 1)
+        self.engine.discover_top_k_chains(combined, start_event=start, k=3, edge_weights=self.edge_weights)
+        self.assertEqual(len(built), 2)
+
+        contract.news_graph.add_edge(start, "Fresh_Penalty", type="HITS")
+        contract.news_graph.add_node("Fresh_Penalty", type="Penalty")
+        top = self.engine.discover_top_k_chains(combined, start_event=start, k=1)
+        self.assertEqual(len(built), 3)
+        self.assertEqual(top[0]["path"], [start, "Fresh_Penalty"])
+
+    def test_search_stops_early(self):
+        """Finding one chain expands far fewer partial paths than full enumeration."""
+        from src.path_engine import BestFirstEnumerator, target_distances
+        contract = max(self.contracts, key=lambda c: len(self.engine.discover_causal_chain(
+            c.combined_graph, start_event=c.contract_id + "_Event")))
+        start = contract.contract_id + "_Event"
+        stats = TraversalStats()
+        self.engine.discover_causal_chain(contract.combined_graph, start_event=start, stats=stats)
+
+        node_ids, index, types, adjacency = self.engine._weighted_adjacency(contract.combined_graph, None, {})
+        cost = [0.0 if t in RISK_TARGET_TYPES else None for t in types]
+        search = BestFirstEnumerator(adjacency.__getitem__)
+        list(search.search(index[start], cost, target_distances(adjacency.__getitem__, len(node_ids), cost), k=1))
+        self.assertLess(search.expanded * 5, stats.expanded)
+
+    def test_invalid_weights(self):
+        contract = self.contracts[0]
+        with self.assertRaises(ValueError):
+            self.engine.discover_top_k_chains(contract.combined_graph, start_event="x", edge_weights={"HITS": -1})
+        self.assertEqual(self.engine.discover_top_k_chains(contract.combined_graph, start_event="missing"), [])
+
 if __name__ == '__main__':
     unittest.main()
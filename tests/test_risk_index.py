@@ -0,0 +1,96 @@
+import unittest
+import sys
+import os
+import tempfile
+
+import networkx as nx
+
+# Adjust path to import from src
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from main import find_news_root_cause
+from src.data_loader import DataLoader
+from src.reasoning_engine import MAX_PATH_LENGTH, RISK_TARGET_TYPES, ReasoningEngine
+from src.risk_index import RiskDistanceIndex
+from src.synthetic_data import SyntheticConfig, SyntheticForest
+
+DATA_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data', 'raw', 'contracts_and_news.json'))
+
+class TestRiskDistanceIndex(unittest.TestCase):
+
+    def setUp(self):
+        config = SyntheticConfig(n_contracts=25, nodes_per_contract=30, cycle_density=0.4,
+                                 shared_ratio=0.2, target_ratio=0.2, news_bridges=2)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = SyntheticForest(config).write(os.path.join(tmp, "forest.json"))
+            self.contracts = DataLoader(path).load(verbose=False)
+        self.contracts += DataLoader(DATA_PATH).load(verbose=False)
+
+    def assert_valid_chain(self, G, path):
+        self.assertEqual(len(path), len(set(path)))
+        self.assertLessEqual(len(path), MAX_PATH_LENGTH + 1)
+        for u, v in zip(path, path[1:]):
+            self.assertTrue(G.has_edge(u, v) or G.has_edge(v, u), (u, v))
+        # Only the last node is a target
+        for node in path[1:-1]:
+            self.assertNotIn(G.nodes[node].get("type"), RISK_TARGET_TYPES)
+
+    def test_matches_shortest_enumerated_chain(self):
+        engine = ReasoningEngine()
+        for c in self.contracts:
+            start = find_news_root_cause(c.news_graph)
+            G = c.combined_graph.graph
+            shortest = {}
+            for r in engine.discover_causal_chain(c.base_graph, c.news_graph, start_event=start):
+                target_type = G.nodes[r["target"]].get("type")
+                shortest[target_type] = min(shortest.get(target_type, r["length"]), r["length"])
+            shortest.pop("Company", None)
+
+            chains = c.risk_index.shortest_chains(c.news_graph, start)
+            self.assertEqual({t: r["length"] for t, r in chains.items()}, shortest, c.contract_id)
+            for target_type, r in chains.items():
+                self.assertEqual(r["path"][0], start)
+                self.assertEqual(G.nodes[r["target"]]["type"], target_type)
+                self.assert_valid_chain(G, r["path"])
+
+    def test_reaches(self):
+        c = next(c for c in self.contracts if c.contract_id == "C01")
+        chain = c.risk_index.reaches(c.news_graph, "Typhoon_Krathon", "Product")
+        self.assertEqual(chain["path"], ['Typhoon_Krathon', 'Taiwan', 'SiliconFoundry', 'GPU_Chips'])
+        self.assertIsNone(c.risk_index.reaches(c.news_graph, "Typhoon_Krathon", "Penalty"))
+        self.assertEqual(c.risk_index.shortest_chains(c.news_graph, "Unknown_Event"), {})
+
+    def test_rebuilt_only_when_base_changes(self):
+        c = self.contracts[0]
+        index = c.risk_index
+        self.assertIs(c.risk_index, index)
+        before = index.distance
+
+        c.news_graph.add_edge(find_news_root_cause(c.news_graph), "Extra_News")
+        self.assertIs(c.risk_index.distance, before)
+
+        # A new target next to the owner changes the base graph
+        owner = next(n for n, d in c.base_graph.nodes(data=True) if n.endswith("_Owner"))
+        c.base_graph.add_node("New_Penalty", type="Penalty")
+        c.base_graph.add_edge(owner, "New_Penalty")
+        self.assertIsNot(c.risk_index.distance, before)
+        self.assertEqual(index.distance["Penalty"][index.index[owner]], 1)
+
+    def test_chain_ends_at_first_target(self):
+        base = nx.DiGraph()
+        base.add_node("A", type="Company")
+        base.add_node("P", type="Penalty")
+        base.add_node("R", type="RiskCondition")
+        base.add_edges_from([("A", "P"), ("P", "R")])
+        news = nx.DiGraph()
+        news.add_node("Storm", type="WeatherEvent")
+        news.add_node("A", type="Company")
+        news.add_edge("Storm", "A")
+
+        index = RiskDistanceIndex(base)
+        self.assertEqual(index.shortest_chains(news, "Storm"),
+                         {"Penalty": {"target": "P", "path": ["Storm", "A", "P"], "length": 3,
+                                      "target_type": "Penalty"}})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,153 @@
+import unittest
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+# Adjust path to import from src
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.data_loader import DataLoader
+from src.reasoning_engine import ReasoningEngine
+from src.server import ContractStore, LatencyStats, RiskServer, RiskService
+
+DATA_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data', 'raw', 'contracts_and_news.json'))
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+class TestRiskServer(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.data = os.path.join(self.tmp, "contracts.json")
+        shutil.copy(DATA_PATH, self.data)
+        self.store = ContractStore(self.data, poll_interval=0.05)
+        self.service = RiskService(self.store)
+        self.server = RiskServer(self.service, port=0)
+        self.url = "http://%s:%d" % self.server.server_address[:2]
+        self.thread = threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True)
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.store.stop_watching()
+        shutil.rmtree(self.tmp)
+
+    def request(self, path, body=None):
+        data = None if body is None else json.dumps(body).encode("utf-8")
+        try:
+            with urllib.request.urlopen(urllib.request.Request(self.url + path, data=data)) as response:
+                return response.status, json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            return e.code, json.loads(e.read())
+
+    def test_analyze_matches_engine(self):
+        engine = ReasoningEngine()
+        contract = DataLoader(DATA_PATH).load(verbose=False)[0]
+        expected = engine.discover_causal_chain(contract.combined_graph, start_event="Typhoon_Krathon")
+
+        status, body = self.request("/analyze", {"contract_id": contract.contract_id, "event": "Typhoon_Krathon"})
+        self.assertEqual(status, 200)
+        report = body["contracts"][contract.contract_id]
+        self.assertEqual([r["path"] for r in report["paths"]], [r["path"] for r in expected])
+        self.assertEqual(report["paths"][0]["chain"],
+                         engine.get_formatted_chain(expected[0]["path"], contract.combined_graph))
+
+        status, body = self.request("/analyze", {"contract_id": contract.contract_id,
+                                                 "event": "Typhoon_Krathon", "limit": 1})
+        self.assertEqual(len(body["contracts"][contract.contract_id]["paths"]), 1)
+
+    def test_ad_hoc_news_graph(self):
+        news = {
+            "entities": [{"id": "Storm_Q", "type": "WeatherEvent"}, {"id": "Taiwan", "type": "Country"}],
+            "relations": [{"source": "Storm_Q", "target": "Taiwan", "type": "HITS"}],
+        }
+        status, body = self.request("/analyze", {"news": news})
+        self.assertEqual(status, 200)
+        self.assertIn("C01", body["contracts"])
+        for report in body["contracts"].values():
+            self.assertEqual(report["bridges"], ["Taiwan"])
+            self.assertTrue(all(r["path"][:2] == ["Storm_Q", "Taiwan"] for r in report["paths"]))
+
+        status, body = self.request("/nearest", {"news": news})
+        self.assertEqual(body["contracts"]["C01"]["nearest"]["Product"]["path"],
+                         ["Storm_Q", "Taiwan", "SiliconFoundry", "GPU_Chips"])
+
+    def test_errors(self):
+        self.assertEqual(self.request("/analyze", {"contract_id": "nope", "event": "x"})[0], 404)
+        self.assertEqual(self.request("/analyze", {"event": "x"})[0], 400)
+        self.assertEqual(self.request("/analyze", {"news": {"entities": [{"type": "X"}]}})[0], 400)
+        self.assertEqual(self.request("/missing")[0], 404)
+
+    def test_concurrent_requests_and_latency(self):
+        body = {"contract_id": "C01", "event": "Typhoon_Krathon"}
+        with ThreadPoolExecutor(8) as pool:
+            responses = list(pool.map(lambda _: self.request("/analyze", body), range(40)))
+        self.assertTrue(all(status == 200 for status, _ in responses))
+        self.assertEqual(len({json.dumps(r, sort_keys=True) for _, r in responses}), 1)
+
+        status, stats = self.request("/stats")
+        row = stats["latency"]["analyze"]
+        self.assertEqual(row["count"], 40)
+        self.assertLessEqual(row["p50_ms"], row["p90_ms"])
+        self.assertLessEqual(row["p90_ms"], row["p99_ms"])
+
+    def test_hot_reload(self):
+        with open(self.data, encoding="utf-8") as f:
+            entries = json.load(f)
+        self.assertFalse(self.store.maybe_reload())
+
+        with open(self.data, "w", encoding="utf-8") as f:
+            json.dump(entries[:3], f)
+        self.assertTrue(self.store.maybe_reload())
+        status, health = self.request("/health")
+        self.assertEqual((health["contracts"], health["version"]), (3, 2))
+
+        # A broken file keeps the previous snapshot in service
+        with open(self.data, "w", encoding="utf-8") as f:
+            f.write("[{")
+        self.assertFalse(self.store.maybe_reload())
+        status, health = self.request("/health")
+        self.assertEqual(health["contracts"], 3)
+        self.assertIsNotNone(health["reload_error"])
+
+    def test_watcher_survives_bad_data(self):
+        """A file that is valid JSON but not a list of contracts is reported; polling goes on."""
+        self.store.start_watching()
+        with open(self.data, "w", encoding="utf-8") as f:
+            json.dump([1, 2], f)
+        self.assertTrue(wait_for(lambda: self.store.reload_error is not None))
+        self.assertIn("AttributeError", self.store.reload_error)
+        self.assertTrue(self.store._watcher.is_alive())
+
+        shutil.copy(DATA_PATH, self.data)
+        self.assertTrue(wait_for(lambda: self.store.snapshot.version == 2))
+        self.assertIsNone(self.store.reload_error)
+
+    def test_invalid_counts(self):
+        for key, value in (("limit", -1), ("limit", "many"), ("top_k", 2.5), ("top_k", True)):
+            status, body = self.request("/analyze", {"contract_id": "C01", "event": "Typhoon_Krathon", key: value})
+            self.assertEqual(status, 400, (key, value))
+            self.assertIn(key, body["error"])
+
+    def test_percentiles(self):
+        stats = LatencyStats()
+        for ms in range(1, 101):
+            stats.record("x", ms / 1000)
+        self.assertEqual(stats.summary()["x"], {"count": 100, "p50_ms": 50.0, "p90_ms": 90.0, "p99_ms": 99.0})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+import unittest
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+from unittest import mock
+
+# Adjust path to import from src
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.data_loader import DataLoader
+from src.reasoning_engine import ReasoningEngine
+from src import show_graphs
+from src.show_graphs import (DEFAULT_MAX_PATHS, LAYOUT_DIR, MANIFEST_NAME, causal_nodes, collapse_job,
+                             contract_job, generate_visualizations)
+from src.show_graphs import main as show_graphs_main
+from src.synthetic_data import SyntheticConfig, SyntheticForest
+
+class TestIncrementalRendering(unittest.TestCase):
+
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        # pyvis copies its lib folder into the working directory
+        os.chdir(self.tmp.name)
+        self.forest = SyntheticForest(SyntheticConfig(n_contracts=6, nodes_per_contract=15))
+        self.entries = self.forest.generate()
+        self.data = os.path.join(self.tmp.name, "forest.json")
+        self.write(self.entries)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def write(self, entries):
+        with open(self.data, "w", encoding="utf-8") as f:
+            json.dump(entries, f)
+
+    def render(self, **kwargs):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return generate_visualizations(self.data, "out", **kwargs)
+
+    def read(self, name):
+        with open(os.path.join("out", name), encoding="utf-8") as f:
+            return f.read()
+
+    def test_only_changed_contracts_are_redrawn(self):
+        self.assertEqual(len(self.render(workers=3)), 6)
+        parallel = [self.read(f"c{i}.html") for i in range(6)]
+        self.assertEqual(self.render(workers=3), [])
+
+        # The pool writes the same files as a sequential run
+        self.assertEqual(len(self.render(workers=1, force=True)), 6)
+        self.assertEqual([self.read(f"c{i}.html") for i in range(6)], parallel)
+
+        self.entries[2]["news_sequence"]["relations"].append(
+            {"source": self.entries[2]["news_sequence"]["entities"][0]["id"],
+             "target": self.entries[2]["base_graph"]["entities"][0]["id"], "type": "HITS"})
+        self.write(self.entries)
+        self.assertEqual(self.render(workers=3), [os.path.join("out", "c2.html")])
+
+    def test_unchanged_run_builds_no_jobs(self):
+        """With the graph cache, a no-op run decides from stored digests and composes no graph."""
+        self.render(workers=1)
+        with mock.patch.object(show_graphs, "contract_job", side_effect=AssertionError("composed")):
+            self.assertEqual(self.render(workers=1), [])
+
+    def test_without_graph_cache(self):
+        """If the cache cannot be opened, jobs are hashed directly and unchanged ones still skipped."""
+        with mock.patch.object(DataLoader, "_open_cache", return_value=None):
+            self.assertEqual(len(self.render(workers=1)), 6)
+            self.assertEqual(self.render(workers=1), [])
+
+    def test_stale_files_are_removed(self):
+        self.render(workers=1)
+        self.write(self.entries[:4])
+        self.assertEqual(self.render(workers=1), [])
+        self.assertEqual(sorted(os.listdir("out")), sorted([MANIFEST_NAME] + [f"c{i}.html" for i in range(4)]))
+
+    def test_inserted_contract_redraws_nothing_else(self):
+        """Files follow contract ids, so an insertion only renders the new contract."""
+        self.render(workers=1)
+        before = {f"c{i}.html": self.read(f"c{i}.html") for i in range(6)}
+        extra = SyntheticForest(SyntheticConfig(n_contracts=7, nodes_per_contract=15, seed=3)).generate()[-1]
+        self.write([extra] + self.entries)
+        self.assertEqual(self.render(workers=1), [os.path.join("out", "c6.html")])
+        self.assertEqual({name: self.read(name) for name in before}, before)
+
+    def test_force_removes_stale_files(self):
+        self.render(workers=1)
+        self.write(self.entries[:4])
+        self.assertEqual(len(self.render(workers=1, force=True)), 4)
+        self.assertEqual(sorted(os.listdir("out")), sorted([MANIFEST_NAME] + [f"c{i}.html" for i in range(4)]))
+
+    def test_causal_detail_with_precomputed_layout(self):
+        contract = DataLoader(self.data).load(verbose=False)[0]
+        job = contract_job(contract, os.path.join("out", "c0.html"), "causal", "precomputed")
+        G = contract.combined_graph.graph
+        # The parent only hashes the graph and options; the chain search is left to the worker
+        self.assertEqual(len(job["nodes"]), len(G))
+        self.assertEqual(job["causal"]["max_paths"], DEFAULT_MAX_PATHS)
+
+        collapsed = collapse_job(job)
+        keep = causal_nodes(ReasoningEngine(), G, job["causal"]["start"], contract.news_graph.nodes())
+        # Chain nodes are kept, every other node is counted in its type's cluster
+        self.assertEqual({node for node, _, _ in collapsed["nodes"]}, set(keep))
+        self.assertEqual(sum(count for _, _, count in collapsed["clusters"]), len(G) - len(keep))
+        endpoints = set(keep) | {cid for cid, _, _ in collapsed["clusters"]}
+        self.assertTrue(all(u in endpoints and v in endpoints for u, v, _ in collapsed["cluster_edges"]))
+
+        self.render(workers=1, detail="causal", layout="precomputed")
+        html = self.read("c0.html")
+        self.assertIn('"enabled": false', html)
+        self.assertIn('"x": ', html)
+        layouts = os.path.join("out", LAYOUT_DIR)
+        self.assertEqual(len(os.listdir(layouts)), 6)
+
+        # Layouts of contracts no longer drawn are pruned
+        self.write(self.entries[:2])
+        self.render(workers=1, detail="causal", layout="precomputed")
+        self.assertEqual(len(os.listdir(layouts)), 2)
+
+    def test_negative_max_paths_is_rejected(self):
+        with self.assertRaises(ValueError):
+            self.render(detail="causal", max_paths=-1)
+        with self.assertRaises(SystemExit), contextlib.redirect_stderr(io.StringIO()):
+            show_graphs_main(["--data", self.data, "--max-paths", "-1"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+import sys
+import os
+import tempfile
+
+# Adjust path to import from src
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.data_loader import DataLoader
+from src.reasoning_engine import RISK_TARGET_TYPES
+from src.synthetic_data import SyntheticConfig, SyntheticForest
+
+class TestSyntheticForest(unittest.TestCase):
+
+    def test_deterministic(self):
+        config = SyntheticConfig(n_contracts=5, seed=7)
+        self.assertEqual(SyntheticForest(config).generate(), SyntheticForest(config).generate())
+        self.assertNotEqual(SyntheticForest(config).generate(), SyntheticForest(SyntheticConfig(n_contracts=5, seed=8)).generate())
+
+    def test_shape_follows_config(self):
+        config = SyntheticConfig(n_contracts=20, nodes_per_contract=40, shared_ratio=0.3,
+                                 target_ratio=0.5, target_mix={"Penalty": 1.0}, news_bridges=2)
+        forest = SyntheticForest(config).generate()
+        for entry in forest:
+            entities = entry["base_graph"]["entities"]
+            self.assertEqual(len(entities), 40)
+            types = {e["type"] for e in entities}
+            self.assertIn("Penalty", types)
+            self.assertFalse((types & RISK_TARGET_TYPES) - {"Penalty"})
+
+        # Shared entities appear in more than one contract
+        owners = {}
+        for entry in forest:
+            for e in entry["base_graph"]["entities"]:
+                owners.setdefault(e["id"], set()).add(entry["contract_id"])
+        self.assertTrue(any(len(c) > 1 for c in owners.values()))
+
+    def test_loadable_with_bridges(self):
+        forest = SyntheticForest(SyntheticConfig(n_contracts=4, news_bridges=3))
+        for suffix in (".json", ".jsonl"):
+            with tempfile.TemporaryDirectory() as tmp:
+                contracts = DataLoader(forest.write(os.path.join(tmp, "forest" + suffix))).load(verbose=False)
+            self.assertEqual(len(contracts), 4)
+            for contract in contracts:
+                self.assertEqual(len(contract.combined_graph.bridge_nodes()), 3)
+
+if __name__ == '__main__':
+    unittest.main()